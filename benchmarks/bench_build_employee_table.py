@@ -0,0 +1,68 @@
+"""
+Benchmark `build_employee_table` on a synthetic roster.
+
+    python benchmarks/bench_build_employee_table.py [--employees 1000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "cron", "discord_reports"))
+sys.path.insert(0, os.path.join(ROOT, "layers", "shared", "python"))
+
+POSITIONS = ["Manager", "Sales Assistant", "Trainer", "Marketer", "Store Clerk", "Cleaner"]
+
+
+def synthetic_roster(count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "employee_name": f"Employee{i}",
+            "position": rng.choice(POSITIONS),
+            "effectiveness_total": rng.randint(0, 160),
+            "addiction": -rng.randint(0, 12),
+            "allowable_addiction": -rng.randint(6, 10),
+            "inactivity": -rng.randint(1, 5) if rng.random() < 0.05 else 0,
+        }
+        for i in range(count)
+    ]
+
+
+def load_module():
+    # The report fetches its secrets at import time; hand it empty ones
+    fake_secret = {"SecretString": json.dumps({})}
+    with mock.patch("boto3.client") as client:
+        client.return_value.get_secret_value.return_value = fake_secret
+        import daily_report_employees
+    return daily_report_employees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    module = load_module()
+    roster = synthetic_roster(args.employees)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        module.build_employee_table(roster)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"build_employee_table: {args.employees} employees, {args.repeat} runs")
+    print(f"  min    {timings[0] * 1000:8.2f} ms")
+    print(f"  median {timings[len(timings) // 2] * 1000:8.2f} ms")
+    print(f"  max    {timings[-1] * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark the cron handlers end-to-end on the offline harness at synthetic scale.
+
+    python benchmarks/bench_cron_jobs.py [--directors 10 100 1000] [--employees 10 100]
+                                         [--latency 0.05] [--functions PopulateEmployeesCron ...]
+                                         [--baseline benchmarks/baseline.json] [--save-baseline]
+
+For each director count a fresh world is generated and every cron in src/cron
+is run once, reporting wall time, virtual sleep, Torn / Supabase / Discord
+call counts and peak traced memory. The work a cron leaves behind (its
+shard worker runs and any follow-up invocations) is drained with
+Harness.drain() and counted with it. Runs where any invocation's wall time
+plus sleep exceeds its Lambda timeout are marked TIMEOUT.
+
+With --baseline, results are compared against a previous --save-baseline run
+with the same settings: more calls, or wall time / memory growing by more
+than --threshold, is reported as a regression and the exit status is 1.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from offline import Harness, generate_world  # noqa: E402
+from offline.harness import QUEUE_WORKERS  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+CALL_KEYS = ("torn", "supabase", "discord")
+
+# Imported up front so the first handler measured does not pay for them
+LIBRARIES = ("requests", "supabase", "gspread", "pandas", "numpy")
+
+
+def run_scale(directors: int, args) -> dict:
+    world = generate_world(directors, tuple(args.employees), args.prospective, args.seed)
+    results = {}
+    with Harness(world, latency=args.latency) as harness:
+        workers = set(QUEUE_WORKERS.values())
+        names = args.functions or [
+            n for n, f in harness.functions.items() if f.code_uri.startswith("src/cron") and n not in workers
+        ]
+        for name in names:
+            function = harness.functions[name]
+            output = io.StringIO()
+            error = None
+            # The target, then every shard and follow-up invocation it led to
+            invocations = []
+            try:
+                with contextlib.redirect_stdout(output):
+                    run = harness.run(name, measure_memory=True)
+                    invocations.append(run)
+                    invocations.extend(harness.drain(measure_memory=True))
+                status = run.result.get("statusCode") if isinstance(run.result, dict) else None
+                if status and status >= 400:
+                    error = f"statusCode {status}"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+            calls = {}
+            for r in invocations:
+                for k, v in r.calls.items():
+                    calls[k] = calls.get(k, 0) + v
+            peaks = [r.peak_memory for r in invocations if r.peak_memory is not None]
+            results[name] = {
+                "seconds": round(sum(r.seconds for r in invocations), 3),
+                "slept": round(sum(r.slept for r in invocations), 3),
+                "peak_memory": max(peaks) if peaks else None,
+                "calls": {k: calls.get(k, 0) for k in CALL_KEYS},
+                "discord_429": calls.get("discord_429", 0),
+                "invocations": len(invocations),
+                "timeout": function.timeout,
+                # Each invocation, the target or work it left, against its own timeout
+                "timed_out": any(r.seconds + r.slept > harness.functions[r.name].timeout for r in invocations),
+                "error": error,
+            }
+    return results
+
+
+def print_scale(directors: int, results: dict):
+    print(f"\n== {directors} directors ==")
+    print(f"{'function':<48}{'wall s':>9}{'sleep s':>9}{'torn':>7}{'supa':>7}{'disc':>7}{'429':>5}{'peak MB':>9}  status")
+    for name, r in results.items():
+        peak = f"{r['peak_memory'] / 1e6:.1f}" if r["peak_memory"] is not None else "-"
+        status = r["error"] or ("TIMEOUT" if r["timed_out"] else "ok")
+        c = r["calls"]
+        print(f"{name:<48}{r['seconds']:>9.2f}{r['slept']:>9.1f}{c['torn']:>7}{c['supabase']:>7}{c['discord']:>7}"
+              f"{r['discord_429']:>5}{peak:>9}  {status}")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions of `current` against `baseline` ({scale: {function: result}})."""
+    regressions = []
+    for scale, functions in current.items():
+        for name, r in functions.items():
+            old = baseline.get(scale, {}).get(name)
+            if not old:
+                continue
+            label = f"{name} @ {scale} directors"
+            if r["error"] and not old["error"]:
+                regressions.append(f"{label}: now fails ({r['error']})")
+            if r["timed_out"] and not old["timed_out"]:
+                regressions.append(f"{label}: now exceeds the {r['timeout']}s timeout")
+            for key in CALL_KEYS:
+                if r["calls"][key] > old["calls"][key]:
+                    regressions.append(f"{label}: {key} calls {old['calls'][key]} -> {r['calls'][key]}")
+            for key, unit, scale_by in (("seconds", "s", 1), ("peak_memory", "MB", 1e6)):
+                if old[key] and r[key] and r[key] > old[key] * (1 + threshold):
+                    regressions.append(f"{label}: {key} {old[key] / scale_by:.2f}{unit} -> {r[key] / scale_by:.2f}{unit}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directors", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--employees", type=int, nargs=2, default=(10, 100), metavar=("MIN", "MAX"))
+    parser.add_argument("--prospective", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every fake API call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--functions", nargs="+", help="logical names from template.yaml (default: every cron)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed wall time / memory growth (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    for library in LIBRARIES:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(library)
+
+    settings = {"employees": list(args.employees), "prospective": args.prospective, "latency": args.latency, "seed": args.seed}
+    results = {}
+    for directors in args.directors:
+        results[str(directors)] = run_scale(directors, args)
+        print_scale(directors, results[str(directors)])
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["settings"] != settings:
+        print(f"\nBaseline settings {baseline['settings']} differ from this run; not comparing.")
+        return 0
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+    for line in regressions:
+        print(f"  - {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import json
+import time
+import hashlib
+import requests
+from utils.log import get_logger
+from utils.metrics import span
+
+log = get_logger(__name__)
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
+
+# Discord limits
+MESSAGE_LIMIT = 2000          # message content
+
+MAX_RETRIES = 3
+CODE_FENCE = "```"
+
+
+# ---------- Pagination ----------
+def paginate(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    Split text into parts of at most `limit` characters on line boundaries.
+    A code block cut by a split is closed at the end of one part and reopened
+    at the start of the next, so tables keep rendering as tables.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    closing = len(CODE_FENCE) + 1          # "\n```"
+    max_piece = limit - 2 * closing - 16   # room for a reopened fence line
+    parts = []
+    lines = []
+    size = 0
+    fence = None  # opening fence line of the code block we are inside, if any
+
+    for line in text.split("\n"):
+        pieces = [line[i:i + max_piece] for i in range(0, len(line), max_piece)] or [""]
+        for piece in pieces:
+            next_fence = (None if fence else piece) if piece.startswith(CODE_FENCE) else fence
+            added = len(piece) + (1 if lines else 0)
+
+            if lines and size + added + (closing if next_fence else 0) > limit:
+                parts.append("\n".join(lines) + ("\n" + CODE_FENCE if fence else ""))
+                lines = [fence] if fence else []
+                size = len(fence) if fence else 0
+                next_fence = (None if fence else piece) if piece.startswith(CODE_FENCE) else fence
+                added = len(piece) + (1 if lines else 0)
+
+            lines.append(piece)
+            size += added
+            fence = next_fence
+
+    if lines and lines != [fence]:
+        parts.append("\n".join(lines))
+
+    return parts
+
+
+def content_payloads(text: str) -> list[dict]:
+    """Plain-message payloads for `text`, one per 2,000-character part."""
+    return [{"content": part} for part in paginate(text, MESSAGE_LIMIT)]
+
+
+# ---------- Sending ----------
+def payload_hash(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def discord_request(method: str, url: str, **kwargs) -> requests.Response | None:
+    """
+    Make a Discord API request, waiting out 429s (retry_after) and pausing
+    when the bucket reports no remaining requests, so a batch of parts is
+    sent in order without tripping the rate limiter.
+    """
+    kwargs.setdefault("timeout", 10)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            r = requests.request(method, url, **kwargs)
+        except Exception as e:
+            log.error(f"{method.upper()} failed: {e}")
+            return None
+
+        if r.status_code == 429 and attempt < MAX_RETRIES:
+            try:
+                retry_after = float(r.json().get("retry_after", 1))
+            except ValueError:
+                retry_after = float(r.headers.get("Retry-After", 1))
+            log.warning(f"Rate limited, retrying in {retry_after:.2f}s")
+            time.sleep(retry_after)
+            continue
+
+        if r.headers.get("X-RateLimit-Remaining") == "0":
+            time.sleep(float(r.headers.get("X-RateLimit-Reset-After", 0)))
+        return r
+    return None
+
+
+def webhook_target(webhook_url: str) -> tuple[str, str]:
+    """(create_url, message_url) for a webhook or interaction-token webhook."""
+    base = webhook_url.split("?")[0].rstrip("/")
+    return f"{base}?wait=true", f"{base}/messages/{{message_id}}"
+
+
+def channel_target(channel_id) -> tuple[str, str]:
+    """(create_url, message_url) for posting to a channel as the bot."""
+    base = f"{DISCORD_API_BASE}/channels/{channel_id}/messages"
+    return base, f"{base}/{{message_id}}"
+
+
+@span("discord_send")
+def send_parts(
+    payloads: list[dict],
+    target: tuple[str, str],
+    previous: list[dict] | None = None,
+    headers: dict | None = None,
+) -> list[dict]:
+    """
+    Send `payloads` in order as one batch.
+
+    `previous` is the state returned by an earlier call ([{"id", "hash"}, ...]).
+    A part whose content hash is unchanged is skipped, a changed part edits the
+    existing message (reposting only if it was deleted), extra parts are posted
+    and leftover old messages deleted.
+    Returns the new state so callers can persist it for the next run.
+    """
+    create_url, message_url = target
+    previous = previous or []
+    state = []
+
+    for i, payload in enumerate(payloads):
+        digest = payload_hash(payload)
+        old = previous[i] if i < len(previous) else None
+
+        if old and old.get("id"):
+            if old.get("hash") == digest:
+                state.append(old)
+                continue
+            r = discord_request("patch", message_url.format(message_id=old["id"]), headers=headers, json=payload)
+            if r is not None and r.ok:
+                state.append({"id": old["id"], "hash": digest})
+                continue
+            if r is None or r.status_code != 404:
+                # The message may still exist; keep it and retry the edit next run
+                log.error(f"Edit of message {old['id']} failed: {getattr(r, 'status_code', None)}")
+                state.append({"id": old["id"], "hash": None})
+                continue
+            log.warning(f"Message {old['id']} no longer exists, posting instead")
+
+        r = discord_request("post", create_url, headers=headers, json=payload)
+        if r is None or not r.ok:
+            log.error(f"Failed to send part {i + 1}/{len(payloads)}: {getattr(r, 'status_code', None)}")
+            state.append({"id": None, "hash": None})
+            continue
+        message_id = r.json().get("id") if r.content else None
+        state.append({"id": message_id, "hash": digest})
+
+    for old in previous[len(payloads):]:
+        if old.get("id") and old["id"] != "@original":
+            discord_request("delete", message_url.format(message_id=old["id"]), headers=headers)
+
+    return state
+
+
+def send_webhook_message(webhook_url: str, message: str) -> list[dict]:
+    """Send a (possibly long) plain-text message to a webhook, split into parts."""
+    if not webhook_url:
+        log.warning("Discord webhook missing")
+        return []
+    return send_parts(content_payloads(message), webhook_target(webhook_url))
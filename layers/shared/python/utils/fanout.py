@@ -0,0 +1,75 @@
+import json
+import os
+import time
+import boto3
+from utils.log import get_logger
+from utils.run_ledger import SHARD_DONE, SHARD_PLANNED, SHARD_QUEUED
+
+log = get_logger(__name__)
+
+# Set on the populate crons; unset (e.g. sam local invoke) runs everything inline
+SHARD_QUEUE_URL = os.environ.get("CRON_SHARD_QUEUE_URL")
+SHARD_SIZE = int(os.environ.get("CRON_SHARD_SIZE", "5"))  # directors per worker message
+SEND_BATCH = 10  # SendMessageBatch accepts at most 10 entries
+
+
+def schedule(ledger, directors: list[dict]) -> bool:
+    """
+    Fan-out mode: split the directors not yet done in this run into shards
+    of SHARD_SIZE and enqueue one message per shard for the cron shard worker
+    (src/cron/shard_worker.py), which runs the same handler on each shard in
+    parallel. Returns True if the run was handed off.
+
+    The shards are recorded in the ledger before any is sent and marked
+    queued as their messages are accepted, so a retry of a run that failed
+    part way through sending only sends the shards still unsent.
+
+    Stays inline (returns False) for shard messages themselves, when no
+    queue is configured, when {"inline": true} is passed, or when everything
+    left fits in one shard.
+    """
+    if ledger.event.get("shard_index") is not None or ledger.event.get("inline") or not SHARD_QUEUE_URL:
+        return False
+
+    planned = ledger.shards()
+    if any(s["status"] != SHARD_DONE for s in planned.values()):
+        # A retry of this scheduler: send only the shards not yet accepted
+        shards = {i: s["director_ids"] for i, s in sorted(planned.items()) if s["status"] == SHARD_PLANNED}
+        log.info(f"Run {ledger.run_id} ({ledger.stage}): {len(planned) - len(shards)} shards already queued")
+    else:
+        # A new run, or a resumed one whose earlier shards all finished
+        pending = [d["torn_user_id"] for d in directors if d["torn_user_id"] not in ledger.done]
+        if len(pending) <= SHARD_SIZE:
+            return False
+        first = max(planned, default=-1) + 1
+        shards = {first + n: pending[i:i + SHARD_SIZE] for n, i in enumerate(range(0, len(pending), SHARD_SIZE))}
+        ledger.plan_shards(shards)
+
+    base = {
+        **{k: v for k, v in ledger.event.items() if k not in ("id", "resume", "continuation")},
+        "stage": ledger.stage,
+        "run_id": ledger.run_id,
+        "shard_total": len(directors),
+        "scheduled_at": time.time(),
+    }
+    entries = [
+        {"Id": str(index), "MessageBody": json.dumps({**base, "shard_index": index, "director_ids": ids})}
+        for index, ids in shards.items()
+    ]
+    client = boto3.client("sqs")
+    for i in range(0, len(entries), SEND_BATCH):
+        resp = client.send_message_batch(QueueUrl=SHARD_QUEUE_URL, Entries=entries[i:i + SEND_BATCH])
+        ledger.mark_shards([int(ok["Id"]) for ok in resp.get("Successful", [])], SHARD_QUEUED)
+        if resp.get("Failed"):
+            raise RuntimeError(f"Could not enqueue {len(resp['Failed'])} {ledger.stage} shard(s): {resp['Failed']}")
+    log.info(f"Run {ledger.run_id} ({ledger.stage}): {len(entries)} shards enqueued")
+    return True
+
+
+def shard(directors: list[dict], event: dict | None) -> list[dict]:
+    """The directors this invocation should process: all of them, or a shard message's share."""
+    ids = (event or {}).get("director_ids")
+    if ids is None:
+        return directors
+    wanted = {int(i) for i in ids}
+    return [d for d in directors if int(d["torn_user_id"]) in wanted]
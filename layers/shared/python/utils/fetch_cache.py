@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+TABLE = "torn_fetch_cache"
+
+# Minimum hours between Torn fetches of a selection for one director.
+# Override per selection with TORN_MIN_REFRESH_<SELECTION> (e.g. TORN_MIN_REFRESH_EDUCATION=24).
+MIN_REFRESH_HOURS = {
+    "education": 72,  # courses take days to complete
+    "stocks": 20,     # just under the daily schedule, so blocks are re-checked every run
+}
+
+
+def min_refresh(selection: str) -> timedelta:
+    hours = os.environ.get(f"TORN_MIN_REFRESH_{selection.upper()}", MIN_REFRESH_HOURS.get(selection, 0))
+    return timedelta(hours=float(hours))
+
+
+def payload_hash(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class FetchCache:
+    """
+    Per-director record of the last Torn fetch of one selection, loaded in
+    one query at the start of a run and written back in one upsert:
+
+        cache = FetchCache(supabase, "education", force=event.get("force"))
+        for director in directors:
+            if cache.fresh(torn_user_id):
+                continue                      # fetched recently: skip Torn entirely
+            data = ...                        # Torn call
+            if cache.changed(torn_user_id, data):
+                ...                           # upsert only when the data changed
+            cache.record(torn_user_id, data)  # after the upsert succeeded
+        cache.save()
+    """
+
+    def __init__(self, supabase, selection: str, force: bool = False):
+        self.supabase = supabase
+        self.selection = selection
+        self.interval = min_refresh(selection)
+        self.force = bool(force)
+        self.now = datetime.now(timezone.utc)
+        rows = (
+            supabase.table(TABLE)
+            .select("torn_user_id, payload_hash, fetched_at")
+            .eq("selection", selection)
+            .execute()
+            .data
+            or []
+        )
+        self.entries = {int(row["torn_user_id"]): row for row in rows}
+        self.pending = {}
+
+    def fresh(self, torn_user_id: int) -> bool:
+        """True if this director's selection was fetched less than the refresh interval ago."""
+        entry = self.entries.get(int(torn_user_id))
+        if self.force or not entry or not entry.get("fetched_at"):
+            return False
+        return self.now - datetime.fromisoformat(str(entry["fetched_at"])) < self.interval
+
+    def changed(self, torn_user_id: int, payload) -> bool:
+        entry = self.entries.get(int(torn_user_id)) or {}
+        return self.force or entry.get("payload_hash") != payload_hash(payload)
+
+    def record(self, torn_user_id: int, payload):
+        digest = payload_hash(payload)
+        row = {
+            "torn_user_id": int(torn_user_id),
+            "selection": self.selection,
+            "payload_hash": digest,
+            "fetched_at": self.now.isoformat(),
+        }
+        if (self.entries.get(int(torn_user_id)) or {}).get("payload_hash") != digest:
+            row["changed_at"] = self.now.isoformat()
+        self.pending[int(torn_user_id)] = row
+
+    def save(self):
+        # Rows with and without changed_at are upserted separately so an
+        # unchanged fetch never clears the stored changed_at
+        groups = {}
+        for row in self.pending.values():
+            groups.setdefault("changed_at" in row, []).append(row)
+        for rows in groups.values():
+            self.supabase.table(TABLE).upsert(rows, on_conflict="torn_user_id,selection").execute()
+        self.pending.clear()
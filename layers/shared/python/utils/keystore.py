@@ -0,0 +1,91 @@
+import json
+import re
+import boto3
+from utils.log import get_logger
+from utils.metrics import span
+
+log = get_logger(__name__)
+
+REGION = "ap-southeast-1"
+REPLICA_REGIONS = [{"Region": "ap-southeast-2"}]
+
+# One secret per director: torn_director_api_keys/<key_ref> = {"api_key": "..."}
+PREFIX = "torn_director_api_keys/"
+# The old single JSON blob {key_ref: api_key}; read only for key_refs not yet
+# migrated (scripts/migrate_director_api_keys.py), never written
+LEGACY_SECRET = "torn_director_api_keys"
+BATCH_SIZE = 20  # BatchGetSecretValue accepts at most 20 ids per call
+
+
+def secret_id(key_ref: str) -> str:
+    # Secret names allow letters, digits and /_+=.@-
+    return PREFIX + re.sub(r"[^\w/+=.@-]", "-", key_ref)
+
+
+def put_api_key(key_ref: str, api_key: str):
+    """
+    Create or replace one director's API key. Only that director's secret is
+    written, so concurrent registrations can't overwrite each other.
+    """
+    client = boto3.client("secretsmanager", region_name=REGION)
+    name = secret_id(key_ref)
+    value = json.dumps({"api_key": api_key})
+    try:
+        client.put_secret_value(SecretId=name, SecretString=value)
+        log.info(f"Secret {name} updated")
+    except client.exceptions.ResourceNotFoundException:
+        try:
+            client.create_secret(
+                Name=name,
+                SecretString=value,
+                Description="Torn director API key",
+                AddReplicaRegions=REPLICA_REGIONS,
+            )
+            log.info(f"Secret {name} created")
+        except client.exceptions.ResourceExistsException:
+            # Created by a concurrent registration since our put failed
+            client.put_secret_value(SecretId=name, SecretString=value)
+            log.info(f"Secret {name} updated")
+
+
+@span("api_keys")
+def get_api_keys(key_refs) -> dict[str, str]:
+    """
+    Batch-read API keys for `key_refs` (20 per call). Returns {key_ref: api_key}
+    for the keys found; refs with no per-director secret fall back to the
+    legacy blob.
+    """
+    wanted = list(dict.fromkeys(k for k in key_refs if k))
+    if not wanted:
+        return {}
+
+    client = boto3.client("secretsmanager", region_name=REGION)
+    by_name = {secret_id(k): k for k in wanted}
+    keys = {}
+    names = list(by_name)
+    for i in range(0, len(names), BATCH_SIZE):
+        resp = client.batch_get_secret_value(SecretIdList=names[i:i + BATCH_SIZE])
+        for secret in resp.get("SecretValues", []):
+            api_key = json.loads(secret["SecretString"]).get("api_key")
+            if api_key:
+                keys[by_name[secret["Name"]]] = api_key
+        for error in resp.get("Errors", []):
+            if error.get("ErrorCode") != "ResourceNotFoundException":
+                log.error(f"Error reading secret {error.get('SecretId')}: {error.get('ErrorCode')}")
+
+    missing = [k for k in wanted if k not in keys]
+    if missing:
+        legacy = _legacy_keys(client)
+        keys.update({k: legacy[k] for k in missing if legacy.get(k)})
+    return keys
+
+
+def get_api_key(key_ref: str) -> str | None:
+    return get_api_keys([key_ref]).get(key_ref)
+
+
+def _legacy_keys(client) -> dict[str, str]:
+    try:
+        return json.loads(client.get_secret_value(SecretId=LEGACY_SECRET)["SecretString"])
+    except client.exceptions.ResourceNotFoundException:
+        return {}
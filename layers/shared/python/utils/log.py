@@ -0,0 +1,97 @@
+import contextvars
+import json
+import os
+import random
+import sys
+import time
+import traceback
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LEVEL = LEVELS.get(os.environ.get("LOG_LEVEL", "INFO").upper(), 20)
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.01"))  # share of runs logging DEBUG
+MAX_FIELD = int(os.environ.get("LOG_MAX_FIELD", "1000"))  # characters per field before truncation
+
+_run = {"request_id": None, "debug": LEVEL <= LEVELS["DEBUG"]}
+_context = contextvars.ContextVar("log_context", default={})
+
+
+def begin_run(context=None):
+    """
+    Start a new invocation: take the request id from the Lambda context,
+    clear correlation fields, and decide whether this run logs DEBUG lines.
+    """
+    _run["request_id"] = getattr(context, "aws_request_id", None)
+    _run["debug"] = LEVEL <= LEVELS["DEBUG"] or random.random() < DEBUG_SAMPLE_RATE
+    _context.set({})
+
+
+def set_context(**fields):
+    """
+    Replace the correlation fields (director, company, interaction id, ...)
+    added to every line until the next call. set_context() clears them.
+    """
+    _context.set({k: v for k, v in fields.items() if v is not None})
+
+
+def truncate(value):
+    """JSON-safe `value` with long strings and large payloads cut to MAX_FIELD characters."""
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    if len(text) > MAX_FIELD:
+        return f"{text[:MAX_FIELD]}…(+{len(text) - MAX_FIELD} chars)"
+    return value if isinstance(value, str) else json.loads(text)
+
+
+class Logger:
+    """
+    One JSON object per line:
+
+        {"ts": ..., "level": "INFO", "logger": "populate_employees",
+         "msg": "...", "request_id": ..., "director_id": ..., **fields}
+    """
+
+    def __init__(self, name: str, **fields):
+        self.name = name
+        self.fields = fields
+
+    def bind(self, **fields) -> "Logger":
+        return Logger(self.name, **self.fields, **fields)
+
+    def set_context(self, **fields):
+        set_context(**fields)
+
+    def _log(self, level: str, msg: str, fields: dict):
+        if level == "DEBUG":
+            if not _run["debug"]:
+                return
+        elif LEVELS[level] < LEVEL:
+            return
+
+        line = {"ts": round(time.time(), 3), "level": level, "logger": self.name, "msg": truncate(str(msg))}
+        if _run["request_id"]:
+            line["request_id"] = _run["request_id"]
+        line.update(_context.get())
+        line.update(self.fields)
+        line.update({k: truncate(v) for k, v in fields.items()})
+        sys.stdout.write(json.dumps(line, default=str, ensure_ascii=False) + "\n")
+
+    def debug(self, msg: str, **fields):
+        self._log("DEBUG", msg, fields)
+
+    def info(self, msg: str, **fields):
+        self._log("INFO", msg, fields)
+
+    def warning(self, msg: str, **fields):
+        self._log("WARNING", msg, fields)
+
+    def error(self, msg: str, **fields):
+        self._log("ERROR", msg, fields)
+
+    def exception(self, msg: str, **fields):
+        """error() with the current exception's traceback attached."""
+        self._log("ERROR", msg, {**fields, "traceback": traceback.format_exc()[-MAX_FIELD:]})
+
+
+def get_logger(name: str) -> Logger:
+    return Logger(name)
@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import urlsplit
+from utils.log import begin_run
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "THLC")
+MAX_VALUES = 100  # EMF accepts at most 100 values per metric in one document
+
+_imported_at = time.perf_counter()
+_cold = True
+_stages = defaultdict(list)  # stage -> durations (ms)
+_calls = defaultdict(lambda: {"calls": 0, "errors": 0, "latency": []})  # dependency -> stats
+_counters = Counter()
+
+
+# ---------- Recording ----------
+@contextmanager
+def span(stage: str):
+    """
+    Time a block of work as one sample of `stage`:
+
+        with span("build_report"):
+            ...
+
+    or every call of a function, as a decorator:
+
+        @span("upsert")
+        def process_company(...):
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def observe(stage: str, seconds: float):
+    _stages[stage].append(round(seconds * 1000, 2))
+
+
+def count(name: str, value: int = 1):
+    _counters[name] += value
+
+
+def record_call(dependency: str, seconds: float, ok: bool):
+    stats = _calls[dependency]
+    stats["calls"] += 1
+    stats["errors"] += 0 if ok else 1
+    stats["latency"].append(round(seconds * 1000, 2))
+
+
+# ---------- Dependency auto-instrumentation ----------
+def dependency_for(url: str) -> str:
+    parts = urlsplit(str(url))
+    host = parts.hostname or ""
+    if host.endswith("torn.com"):
+        return "Torn"
+    if host.endswith(("discord.com", "discordapp.com")):
+        return "Discord"
+    if host.endswith("supabase.co") or parts.path.startswith(("/rest/v1/", "/auth/v1/", "/storage/v1/")):
+        return "Supabase"
+    if host.endswith("googleapis.com"):
+        return "Sheets"
+    return "Other"
+
+
+def _instrument(owner, attr: str, dependency_of):
+    """
+    Wrap owner.attr so every call is timed and counted against the dependency
+    `dependency_of(args)` names. Wrapping is idempotent: a re-imported module
+    re-points the existing wrapper at its own recorder.
+    """
+    original = getattr(owner, attr)
+    if hasattr(original, "_record_call"):
+        original._record_call = record_call
+        return
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = original(*args, **kwargs)
+            ok = getattr(result, "status_code", 200) < 400
+            return result
+        finally:
+            wrapper._record_call(dependency_of(args, kwargs), time.perf_counter() - started, ok)
+
+    wrapper._record_call = record_call
+    setattr(owner, attr, wrapper)
+
+
+def install():
+    """Count and time outbound calls made through requests, httpx and boto3."""
+    try:
+        import requests
+        _instrument(requests.Session, "request", lambda a, k: dependency_for(k.get("url") or a[2]))
+    except ImportError:
+        pass
+    try:
+        import httpx
+        _instrument(httpx.Client, "send", lambda a, k: dependency_for(a[1].url))
+    except ImportError:
+        pass
+    try:
+        import botocore.client
+        _instrument(
+            botocore.client.BaseClient,
+            "_make_api_call",
+            lambda a, k: a[0].meta.service_model.service_id.replace(" ", ""),
+        )
+    except ImportError:
+        pass
+
+
+install()
+
+
+# ---------- CloudWatch Embedded Metric Format ----------
+def _emit(dimensions: dict, metrics: dict, timestamp: int):
+    """Print one EMF document; metrics maps name -> (unit, value or list of values)."""
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": timestamp,
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [list(dimensions)],
+                "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _) in metrics.items()],
+            }],
+        },
+        **dimensions,
+        **{name: value for name, (_, value) in metrics.items()},
+    }))
+
+
+def _chunks(values: list) -> list[list]:
+    return [values[i:i + MAX_VALUES] for i in range(0, len(values), MAX_VALUES)] or [[]]
+
+
+def flush(function: str):
+    """Emit everything recorded since the last flush as EMF, then reset."""
+    timestamp = int(time.time() * 1000)
+
+    for stage, durations in _stages.items():
+        for chunk in _chunks(durations):
+            _emit({"Function": function, "Stage": stage}, {"Duration": ("Milliseconds", chunk)}, timestamp)
+
+    for dependency, stats in _calls.items():
+        for i, chunk in enumerate(_chunks(stats["latency"])):
+            metrics = {"Latency": ("Milliseconds", chunk)}
+            if i == 0:
+                metrics["Calls"] = ("Count", stats["calls"])
+                metrics["Errors"] = ("Count", stats["errors"])
+            _emit({"Function": function, "Dependency": dependency}, metrics, timestamp)
+
+    if _counters:
+        _emit({"Function": function}, {name: ("Count", value) for name, value in _counters.items()}, timestamp)
+
+    _stages.clear()
+    _calls.clear()
+    _counters.clear()
+
+
+def instrumented(handler):
+    """
+    Decorate a Lambda handler: start a new logging run, time the invocation
+    (plus cold-start init on the first call), count invocations and failures,
+    and flush all metrics recorded during the invocation as EMF when it returns.
+    """
+    function = handler.__module__
+
+    @wraps(handler)
+    def wrapper(event=None, context=None):
+        global _cold
+        begin_run(context)
+        started = time.perf_counter()
+        if _cold:
+            observe("init", started - _imported_at)
+            _cold = False
+
+        count("Invocations")
+        try:
+            result = handler(event, context)
+            if isinstance(result, dict) and result.get("statusCode", 200) >= 500:
+                count("Failures")
+            return result
+        except Exception:
+            count("Failures")
+            raise
+        finally:
+            observe("total", time.perf_counter() - started)
+            flush(function)
+
+    return wrapper
@@ -0,0 +1,122 @@
+import time
+from datetime import datetime, timezone
+from utils.metrics import observe
+
+MAX_LISTED = 10  # entries listed per section before collapsing into "(+N more)"
+
+
+class RunSummary:
+    """
+    Collect per-director outcomes during a cron run and render them as one
+    Discord summary, instead of posting a webhook message per director.
+
+        summary = RunSummary("Stock")
+        started = time.perf_counter()
+        try:
+            ...
+            summary.success(label, started)
+        except Exception as e:
+            summary.failure(label, started, e)
+        send_discord_message(summary.render())
+
+    With a RunLedger, each outcome is also recorded against the director
+    the ledger last claimed.
+    """
+
+    def __init__(self, title: str, ledger=None):
+        self.title = title
+        self.ledger = ledger
+        self.run_started = time.perf_counter()
+        self.succeeded = []  # (label, seconds, note)
+        self.failed = []     # (label, seconds, reason)
+        self.skipped = []    # (label, reason)
+        self.elapsed = None  # wall time of the whole run, when not this invocation's
+        self.unfinished = 0  # directors of a fanned-out run with no ledger row
+
+    @classmethod
+    def from_ledger(cls, title: str, rows: list[dict], elapsed: float, unfinished: int = 0):
+        """Rebuild a run's summary from its cron_run_ledger rows (fanned-out runs)."""
+        summary = cls(title)
+        summary.elapsed = elapsed
+        summary.unfinished = unfinished
+        for row in rows:
+            label = row.get("label") or str(row["torn_user_id"])
+            seconds = float(row.get("seconds") or 0)
+            if row["status"] == "success":
+                summary.succeeded.append((label, seconds, row.get("note")))
+            elif row["status"] == "failed":
+                summary.failed.append((label, seconds, row.get("note") or ""))
+            else:
+                summary.skipped.append((label, row.get("note") or ""))
+        return summary
+
+    def success(self, label: str, started: float, note: str | None = None):
+        seconds = time.perf_counter() - started
+        observe("director", seconds)
+        self.succeeded.append((label, seconds, note))
+        if self.ledger:
+            self.ledger.finish("success", seconds, note, label)
+
+    def failure(self, label: str, started: float, reason):
+        seconds = time.perf_counter() - started
+        observe("director", seconds)
+        self.failed.append((label, seconds, str(reason)))
+        if self.ledger:
+            self.ledger.finish("failed", seconds, reason, label)
+
+    def skip(self, label: str, reason: str, retry: bool = False):
+        """
+        Record a director that was not processed. With retry=True (e.g. its
+        API key could not be loaded) the ledger records it as skipped_retry,
+        which a resumed run tries again instead of treating it as done.
+        """
+        self.skipped.append((label, reason))
+        if self.ledger:
+            self.ledger.finish("skipped_retry" if retry else "skipped", None, reason, label)
+
+    @property
+    def has_failures(self) -> bool:
+        return bool(self.failed)
+
+    def render(self) -> str:
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.run_started
+        timings = [t for _, t, _ in self.succeeded + self.failed]
+
+        summary = f"**[{self.title} Cron Summary]**\n"
+        summary += f"🕒 {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')} ({elapsed:.1f}s)\n\n"
+        summary += f"✅ Updated: {len(self.succeeded)}\n❌ Failed: {len(self.failed)}\n"
+        if self.skipped:
+            summary += f"⏭️ Skipped: {len(self.skipped)}\n"
+        if self.unfinished:
+            summary += f"⚠️ Unfinished: {self.unfinished}\n"
+        if self.ledger and self.ledger.resumed:
+            summary += f"🔁 Done earlier in this run: {self.ledger.resumed}\n"
+        if self.ledger and self.ledger.deferred:
+            summary += f"⏳ Left for a follow-up invocation: {self.ledger.deferred}\n"
+        if timings:
+            summary += f"⏱️ Per director: avg {sum(timings) / len(timings):.2f}s, max {max(timings):.2f}s\n"
+
+        # Slowest first so outliers show up before the list is collapsed
+        if self.succeeded:
+            lines = [
+                f"{label} – {seconds:.2f}s" + (f" ({note})" if note else "")
+                for label, seconds, note in sorted(self.succeeded, key=lambda s: -s[1])
+            ]
+            summary += "\n**Success:**\n" + collapse(lines) + "\n"
+
+        if self.failed:
+            lines = [f"{label} – {seconds:.2f}s: {reason}" for label, seconds, reason in self.failed]
+            summary += "\n**Failed:**\n" + collapse(lines) + "\n"
+
+        if self.skipped:
+            lines = [f"{label}: {reason}" for label, reason in self.skipped]
+            summary += "\n**Skipped:**\n" + collapse(lines) + "\n"
+
+        return summary.rstrip()
+
+
+def collapse(lines: list[str], limit: int = MAX_LISTED) -> str:
+    text = "\n".join(lines[:limit])
+    if len(lines) > limit:
+        text += f"\n(+{len(lines) - limit} more)"
+    return text
@@ -0,0 +1,56 @@
+import os
+from typing import Callable, Iterator
+
+PAGE_SIZE = int(os.environ.get("SUPABASE_PAGE_SIZE", "1000"))  # PostgREST max-rows defaults to 1000
+
+
+def stream_rows(
+    supabase,
+    table: str,
+    columns: str = "*",
+    key: str = "id",
+    page_size: int = PAGE_SIZE,
+    where: Callable | None = None,
+) -> Iterator[dict]:
+    """
+    Yield every row of `table` one page at a time using keyset pagination:
+    each page is `key > last key seen ORDER BY key LIMIT page_size`, so
+    PostgREST's max-rows cap can't truncate the result, late pages cost the
+    same as early ones (no OFFSET scan) and only one page is held in memory.
+
+        for emp in stream_rows(supabase, "employees", "torn_user_id, company_id",
+                               where=lambda q: q.in_("company_id", ids)):
+            ...
+
+    `key` must be unique and non-null (normally the primary key); it is added
+    to `columns` if missing. `where` adds filters to each page's query.
+    """
+    if not _selects(columns, key):
+        columns = f"{key}, {columns}"
+
+    last = None
+    while True:
+        query = supabase.table(table).select(columns)
+        if where:
+            query = where(query)
+        if last is not None:
+            query = query.gt(key, last)
+        page = query.order(key).limit(page_size).execute().data or []
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1][key]
+
+
+def _selects(columns: str, key: str) -> bool:
+    """True if the top level of a PostgREST select list already returns `key`."""
+    depth, token, tokens = 0, "", []
+    for char in columns:
+        depth += (char == "(") - (char == ")")
+        if char == "," and depth == 0:
+            tokens.append(token.strip())
+            token = ""
+        else:
+            token += char
+    tokens.append(token.strip())
+    return "*" in tokens or key in tokens
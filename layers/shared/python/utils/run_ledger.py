@@ -0,0 +1,252 @@
+import json
+import os
+import time
+import uuid
+import boto3
+from datetime import datetime, timezone
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+TABLE = "cron_run_ledger"
+DONE = ("success", "skipped")  # "failed" and "skipped_retry" directors are retried when a run resumes
+# Marker rows of a fanned-out run (see utils.fanout) share the ledger: one
+# per shard at torn_user_id -(index + 1), going planned -> queued -> done,
+# and REPORTED, claimed by whoever posts the run's summary
+REPORTED = 0
+SHARD_PLANNED, SHARD_QUEUED, SHARD_DONE = "shard_planned", "shard_queued", "shard_done"
+
+
+def shard_marker(index: int) -> int:
+    return -(int(index) + 1)
+
+# Stop claiming directors this many seconds before the Lambda timeout and
+# hand the rest to a follow-up invocation
+DEADLINE_MARGIN = float(os.environ.get("CRON_DEADLINE_MARGIN", "8"))
+MAX_CONTINUATIONS = int(os.environ.get("CRON_MAX_CONTINUATIONS", "5"))
+
+
+class RunLedger:
+    """
+    Per-director record of one cron run, written as each director finishes,
+    so a retried or follow-up invocation of the same run only processes the
+    directors that haven't finished yet:
+
+        ledger = RunLedger(supabase, "employees", event, context)
+        summary = RunSummary("Employees", ledger=ledger)
+        for director in directors:
+            if not ledger.claim(director["torn_user_id"]):
+                continue                   # done earlier in this run, or out of time
+            ...
+            summary.success(label, started)  # also records the ledger row
+        ledger.follow_up()
+
+    The run id is event["run_id"] if given, else the scheduled event's id
+    (Lambda retries redeliver the same event), else a new one.
+    {"resume": true} picks up the stage's most recent run instead.
+    """
+
+    def __init__(self, supabase, stage: str, event: dict | None = None, context=None):
+        event = event or {}
+        self.event = event
+        self.supabase = supabase
+        self.stage = stage
+        self.context = context
+        self.continuation = int(event.get("continuation", 0))
+        self.run_id = str(event.get("run_id") or (event.get("resume") and self._latest_run()) or event.get("id") or uuid.uuid4())
+        self.current = None
+        self.claimed = 0
+        self.resumed = 0
+        self.deferred = 0
+        self.followed_up = False
+
+        try:
+            rows = (
+                supabase.table(TABLE)
+                .select("torn_user_id, status")
+                .eq("run_id", self.run_id)
+                .eq("stage", stage)
+                .execute()
+                .data
+                or []
+            )
+        except Exception as e:
+            log.error(f"Could not load run ledger for {stage} run {self.run_id}: {e}")
+            rows = []
+        self.done = {int(row["torn_user_id"]) for row in rows if row["status"] in DONE}
+        log.info(f"Run {self.run_id} ({stage}): {len(self.done)} directors already done")
+
+    def _latest_run(self) -> str | None:
+        try:
+            rows = (
+                self.supabase.table(TABLE)
+                .select("run_id")
+                .eq("stage", self.stage)
+                .order("finished_at", desc=True)
+                .limit(1)
+                .execute()
+                .data
+            )
+        except Exception as e:
+            log.error(f"Could not find the latest {self.stage} run: {e}")
+            return None
+        return rows[0]["run_id"] if rows else None
+
+    def _out_of_time(self) -> bool:
+        if self.context is None:
+            return False
+        return self.context.get_remaining_time_in_millis() < DEADLINE_MARGIN * 1000
+
+    def claim(self, torn_user_id) -> bool:
+        """True if this invocation should process the director now."""
+        torn_user_id = int(torn_user_id)
+        if torn_user_id in self.done:
+            self.resumed += 1
+            return False
+        if self._out_of_time():
+            self.deferred += 1
+            return False
+        self.current = torn_user_id
+        self.claimed += 1
+        return True
+
+    def finish(self, status: str, seconds: float | None = None, note=None, label: str | None = None):
+        """Record the outcome of the director last claimed."""
+        if self.current is None:
+            return
+        row = {
+            "run_id": self.run_id,
+            "stage": self.stage,
+            "torn_user_id": self.current,
+            "label": label,
+            "status": status,
+            "seconds": round(seconds, 3) if seconds is not None else None,
+            "note": str(note)[:500] if note else None,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            self.supabase.table(TABLE).upsert(row, on_conflict="run_id,stage,torn_user_id").execute()
+            if status in DONE:
+                self.done.add(self.current)
+        except Exception as e:
+            log.error(f"Could not record {status} for director {self.current} in run {self.run_id}: {e}")
+        self.current = None
+
+    def follow_up(self) -> bool:
+        """
+        Invoke this function again, asynchronously, for the directors
+        deferred by the deadline. Only when this invocation made progress and
+        fewer than MAX_CONTINUATIONS follow-ups have run.
+        """
+        if not self.deferred:
+            return False
+        if not self.claimed or self.continuation >= MAX_CONTINUATIONS:
+            log.warning(f"Run {self.run_id}: {self.deferred} directors left unfinished, not continuing")
+            return False
+        try:
+            boto3.client("lambda").invoke(
+                FunctionName=self.context.function_name,
+                InvocationType="Event",
+                Payload=json.dumps({**self.event, "run_id": self.run_id, "continuation": self.continuation + 1}),
+            )
+            log.info(f"Run {self.run_id}: {self.deferred} directors handed to follow-up {self.continuation + 1}")
+            self.followed_up = True
+            return True
+        except Exception as e:
+            log.error(f"Could not start follow-up for run {self.run_id}: {e}")
+            return False
+
+    def _rows(self) -> list[dict]:
+        return (
+            self.supabase.table(TABLE)
+            .select("torn_user_id, label, status, seconds, note")
+            .eq("run_id", self.run_id)
+            .eq("stage", self.stage)
+            .execute()
+            .data
+            or []
+        )
+
+    def shards(self) -> dict[int, dict]:
+        """{shard index: {"status", "director_ids"}} planned for this run so far."""
+        return {
+            -int(row["torn_user_id"]) - 1: {"status": row["status"], "director_ids": json.loads(row.get("note") or "[]")}
+            for row in self._rows()
+            if int(row["torn_user_id"]) < REPORTED
+        }
+
+    def plan_shards(self, shards: dict[int, list]):
+        """
+        Record the shards of a fanned-out run before any of them is sent.
+        Clears the REPORTED marker, so a resumed run posts a summary again.
+        """
+        (
+            self.supabase.table(TABLE)
+            .delete()
+            .eq("run_id", self.run_id)
+            .eq("stage", self.stage)
+            .eq("torn_user_id", REPORTED)
+            .execute()
+        )
+        rows = [
+            {
+                "run_id": self.run_id,
+                "stage": self.stage,
+                "torn_user_id": shard_marker(index),
+                "status": SHARD_PLANNED,
+                "note": json.dumps(director_ids),
+            }
+            for index, director_ids in shards.items()
+        ]
+        self.supabase.table(TABLE).upsert(rows, on_conflict="run_id,stage,torn_user_id").execute()
+
+    def mark_shards(self, indexes, status: str):
+        markers = [shard_marker(i) for i in indexes]
+        if markers:
+            (
+                self.supabase.table(TABLE)
+                .update({"status": status, "finished_at": datetime.now(timezone.utc).isoformat()})
+                .eq("run_id", self.run_id)
+                .eq("stage", self.stage)
+                .in_("torn_user_id", markers)
+                .execute()
+            )
+
+    def report(self, summary) -> str | None:
+        """
+        The Discord summary to post for this invocation. Inline runs post
+        their own. A shard of a fanned-out run (see utils.fanout) marks
+        itself done, unless a follow-up invocation is finishing it; the shard
+        that finds every shard done posts one summary built from the whole
+        run's ledger, counting directors that never got a row as unfinished.
+        Other shards return None.
+        """
+        index = self.event.get("shard_index")
+        if index is None:
+            return summary.render()
+        if self.followed_up:
+            return None
+        try:
+            self.mark_shards([index], SHARD_DONE)
+            rows = self._rows()
+            shards = [row for row in rows if int(row["torn_user_id"]) < REPORTED]
+            waiting = sum(1 for row in shards if row["status"] != SHARD_DONE)
+            if waiting:
+                log.info(f"Run {self.run_id} ({self.stage}): {waiting}/{len(shards)} shards still running")
+                return None
+            marker = {"run_id": self.run_id, "stage": self.stage, "torn_user_id": REPORTED, "status": "reported"}
+            claimed = (
+                self.supabase.table(TABLE)
+                .upsert(marker, on_conflict="run_id,stage,torn_user_id", ignore_duplicates=True)
+                .execute()
+                .data
+            )
+        except Exception as e:
+            log.error(f"Could not check completion of run {self.run_id}: {e}")
+            return None
+        if not claimed:
+            return None  # another shard is posting it
+        directors = [row for row in rows if int(row["torn_user_id"]) > REPORTED]
+        unfinished = max(int(self.event.get("shard_total") or 0) - len(directors), 0)
+        elapsed = time.time() - float(self.event.get("scheduled_at") or time.time())
+        return type(summary).from_ledger(summary.title, directors, elapsed, unfinished).render()
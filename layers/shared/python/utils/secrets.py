@@ -1,5 +1,9 @@
 import json
 import boto3
+from utils.log import get_logger
+from utils.metrics import span
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
 
@@ -21,6 +25,7 @@ REGION = "ap-southeast-1"
 
 
 
+@span("secrets")
 def get_secrets(secret_ids=None): 
     """ 
     Load only the specified AWS Secrets Manager secrets. 
@@ -39,8 +44,8 @@ def get_secrets(secret_ids=None):
             val = json.loads(client.get_secret_value(SecretId=sid)["SecretString"]) 
             secrets.update(val) 
         except client.exceptions.ResourceNotFoundException: 
-            print(f"Secret {sid} not found") 
+            log.warning(f"Secret {sid} not found") 
         except client.exceptions.AccessDeniedException: 
-            print(f"No permission to read secret {sid}") 
+            log.error(f"No permission to read secret {sid}") 
     
     return secrets
\ No newline at end of file
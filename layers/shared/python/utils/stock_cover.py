@@ -0,0 +1,6 @@
+import os
+
+# Order horizon shared by the stock forecast and the stock report's order planner
+LEAD_TIME_DAYS = int(os.environ.get("STOCK_LEAD_TIME_DAYS", "1"))  # days between placing an order and it arriving
+COVER_DAYS = int(os.environ.get("STOCK_COVER_DAYS", "7"))  # days of sales an order should cover once it arrives
+COVER_HORIZON = LEAD_TIME_DAYS + COVER_DAYS
@@ -0,0 +1,16 @@
+"""
+Offline harness for running the Lambda handlers end-to-end without AWS,
+Supabase, Torn or Discord.
+
+    from offline import Harness, generate_world
+
+    with Harness(generate_world(directors=10)) as h:
+        h.run("PopulateEmployeesCron")
+        print(h.report())
+
+See offline/README.md for the command line runner.
+"""
+from offline.world import World, generate_world
+from offline.harness import Harness
+
+__all__ = ["Harness", "World", "generate_world"]
@@ -0,0 +1,68 @@
+"""
+Run handlers offline from the command line.
+
+    python -m offline --list
+    python -m offline PopulateEmployeesCron DailyReportEmployeesCron --directors 10
+    python -m offline all --directors 100 --employees 10 100 --latency 0.02 --quiet
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+
+from offline.harness import QUEUE_WORKERS, Harness
+from offline.world import generate_world
+
+# Interaction entry points need a crafted event, so "all" runs the crons only.
+INTERACTIVE = {"DiscordBotFunction", "SlashCommandWorkerFunction", "SlowCommandWorkerFunction"}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m offline", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("functions", nargs="*", help='logical names from template.yaml, a handler path, or "all"')
+    parser.add_argument("--list", action="store_true", help="list the functions in template.yaml")
+    parser.add_argument("--directors", type=int, default=10)
+    parser.add_argument("--prospective", type=int, default=0)
+    parser.add_argument("--employees", type=int, nargs=2, default=(10, 100), metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake API call")
+    parser.add_argument("--quiet", action="store_true", help="hide handler output")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    world = generate_world(args.directors, tuple(args.employees), args.prospective, args.seed)
+    with Harness(world, latency=args.latency) as harness:
+        if args.list or not args.functions:
+            for name, fn in harness.functions.items():
+                print(f"{name:<48} {fn.code_uri}{fn.handler}")
+            return 0
+
+        skip = INTERACTIVE | set(QUEUE_WORKERS.values())
+        targets = [n for n in harness.functions if n not in skip] if args.functions == ["all"] else args.functions
+        failed = False
+        for target in targets:
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output) if args.quiet else contextlib.nullcontext():
+                    run = harness.run(target)
+                print(f"{target}: {run.seconds:.3f}s {json.dumps(run.calls)}")
+                # Queue consumers and async follow-ups run after each target, as AWS would
+                with contextlib.redirect_stdout(output) if args.quiet else contextlib.nullcontext():
+                    workers = harness.drain()
+                for run in workers:
+                    print(f"  {run.name}: {run.seconds:.3f}s {json.dumps(run.calls)}")
+            except Exception as e:
+                failed = True
+                print(f"{target}: FAILED {type(e).__name__}: {e}", file=sys.stderr)
+
+        report = harness.report()
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print(f"totals: {json.dumps(report['totals'])} slept={report['slept_seconds']}s")
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+In-memory stand-ins for the boto3 clients the handlers create: Secrets
+Manager, S3 and SQS. `FakeAws.client(name, **kwargs)` has boto3.client's
+signature so the harness can patch it in directly.
+"""
+import json
+import threading
+from collections import Counter, defaultdict
+
+
+class _ClientError(Exception):
+    code = "ClientError"
+
+    def __init__(self, message: str = ""):
+        super().__init__(message)
+        self.response = {"Error": {"Code": self.code, "Message": message}}
+
+
+class ResourceNotFoundException(_ClientError):
+    code = "ResourceNotFoundException"
+
+
+class ResourceExistsException(_ClientError):
+    code = "ResourceExistsException"
+
+
+class AccessDeniedException(_ClientError):
+    code = "AccessDeniedException"
+
+
+class NoSuchKey(_ClientError):
+    code = "NoSuchKey"
+
+
+class _Exceptions:
+    ClientError = _ClientError
+    ResourceNotFoundException = ResourceNotFoundException
+    ResourceExistsException = ResourceExistsException
+    AccessDeniedException = AccessDeniedException
+    NoSuchKey = NoSuchKey
+
+
+class _Client:
+    exceptions = _Exceptions
+
+    def __init__(self, aws: "FakeAws", service: str):
+        self.aws = aws
+        self.service = service
+
+    def _count(self, operation: str):
+        with self.aws.lock:
+            self.aws.calls[f"{self.service}.{operation}"] += 1
+
+
+class SecretsManagerClient(_Client):
+    def get_secret_value(self, SecretId: str, **kwargs):
+        self._count("get_secret_value")
+        if SecretId not in self.aws.secrets:
+            raise ResourceNotFoundException(f"Secrets Manager can't find the specified secret: {SecretId}")
+        return {"Name": SecretId, "SecretString": self.aws.secrets[SecretId]}
+
+    def batch_get_secret_value(self, SecretIdList: list[str], **kwargs):
+        self._count("batch_get_secret_value")
+        values, errors = [], []
+        for sid in SecretIdList:
+            if sid in self.aws.secrets:
+                values.append({"Name": sid, "SecretString": self.aws.secrets[sid]})
+            else:
+                errors.append({"SecretId": sid, "ErrorCode": "ResourceNotFoundException"})
+        return {"SecretValues": values, "Errors": errors}
+
+    def create_secret(self, Name: str, SecretString: str, **kwargs):
+        self._count("create_secret")
+        with self.aws.lock:
+            if Name in self.aws.secrets:
+                raise ResourceExistsException(f"The operation failed because the secret {Name} already exists.")
+            self.aws.secrets[Name] = SecretString
+        return {"Name": Name}
+
+    def update_secret(self, SecretId: str, SecretString: str, **kwargs):
+        self._count("update_secret")
+        with self.aws.lock:
+            if SecretId not in self.aws.secrets:
+                raise ResourceNotFoundException(f"Secrets Manager can't find the specified secret: {SecretId}")
+            self.aws.secrets[SecretId] = SecretString
+        return {"Name": SecretId}
+
+    put_secret_value = update_secret
+
+
+class S3Client(_Client):
+    def put_object(self, Bucket: str, Key: str, Body=b"", **kwargs):
+        self._count("put_object")
+        body = Body.encode() if isinstance(Body, str) else Body if isinstance(Body, bytes) else Body.read()
+        self.aws.objects[(Bucket, Key)] = body
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        self._count("get_object")
+        if (Bucket, Key) not in self.aws.objects:
+            raise NoSuchKey("The specified key does not exist.")
+        return {"Body": _Body(self.aws.objects[(Bucket, Key)])}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, **kwargs):
+        self._count("upload_file")
+        with open(Filename, "rb") as f:
+            self.aws.objects[(Bucket, Key)] = f.read()
+
+    def download_file(self, Bucket: str, Key: str, Filename: str, **kwargs):
+        self._count("download_file")
+        if (Bucket, Key) not in self.aws.objects:
+            raise _ClientError("An error occurred (404) when calling the HeadObject operation: Not Found")
+        with open(Filename, "wb") as f:
+            f.write(self.aws.objects[(Bucket, Key)])
+
+
+class SQSClient(_Client):
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs):
+        self._count("send_message")
+        with self.aws.lock:
+            self.aws.queues[QueueUrl].append({"Body": MessageBody, **kwargs})
+            return {"MessageId": f"{len(self.aws.queues[QueueUrl]):08d}"}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list[dict], **kwargs):
+        self._count("send_message_batch")
+        with self.aws.lock:
+            for entry in Entries:
+                self.aws.queues[QueueUrl].append({"Body": entry["MessageBody"]})
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read(self) -> bytes:
+        return self.data
+
+
+class LambdaClient(_Client):
+    def invoke(self, FunctionName: str, Payload=b"", InvocationType: str = "RequestResponse", **kwargs):
+        self._count("invoke")
+        payload = Payload.decode() if isinstance(Payload, bytes) else Payload
+        with self.aws.lock:
+            self.aws.invocations.append({"FunctionName": FunctionName, "InvocationType": InvocationType, "Payload": payload})
+        return {"StatusCode": 202 if InvocationType == "Event" else 200}
+
+CLIENTS = {"secretsmanager": SecretsManagerClient, "s3": S3Client, "sqs": SQSClient, "lambda": LambdaClient}
+
+
+class FakeAws:
+    def __init__(self, secrets: dict[str, dict] | None = None):
+        self.secrets = {name: json.dumps(value) for name, value in (secrets or {}).items()}
+        self.objects = {}               # (bucket, key) -> bytes
+        self.queues = defaultdict(list)  # queue url -> messages
+        self.invocations = []            # lambda.invoke calls, in order
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def client(self, service_name: str, *args, **kwargs):
+        if service_name not in CLIENTS:
+            raise ValueError(f"offline harness has no fake for boto3 client {service_name!r}")
+        return CLIENTS[service_name](self, service_name)
+
+    def secret(self, name: str) -> dict:
+        return json.loads(self.secrets[name])
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
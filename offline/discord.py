@@ -0,0 +1,313 @@
+"""
+Fake Discord API: webhooks, interaction follow-ups, channel messages,
+guild members and roles, permission overwrites and command registration.
+
+Payloads are validated against Discord's message limits (400 / 50035 like
+the real API), and each route bucket enforces a rate limit with the same
+429 body and X-RateLimit-* headers. `rate_limited` counts 429s and
+`violations` counts requests a client sent into a bucket it had already
+been told to wait on (ignoring retry_after).
+"""
+import itertools
+import re
+from collections import defaultdict
+
+from offline.service import FakeService, Request, Response
+
+API_PREFIX = re.compile(r"^/api(?:/v\d+)?")
+
+CONTENT_LIMIT = 2000
+EMBED_TITLE_LIMIT = 256
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBEDS_TOTAL_LIMIT = 6000
+EMBEDS_PER_MESSAGE = 10
+
+ROUTES = [
+    ("interaction_callback", re.compile(r"^/interactions/(?P<major>\d+)/(?P<token>[^/]+)/callback$")),
+    ("webhook_message", re.compile(r"^/webhooks/(?P<major>\d+)/(?P<token>[^/]+)/messages/(?P<message>[^/]+)$")),
+    ("webhook", re.compile(r"^/webhooks/(?P<major>\d+)/(?P<token>[^/]+)$")),
+    ("channel_message", re.compile(r"^/channels/(?P<major>\d+)/messages/(?P<message>\d+)$")),
+    ("channel_messages", re.compile(r"^/channels/(?P<major>\d+)/messages$")),
+    ("channel_permission", re.compile(r"^/channels/(?P<major>\d+)/permissions/(?P<overwrite>\d+)$")),
+    ("member_role", re.compile(r"^/guilds/(?P<major>\d+)/members/(?P<user>\d+)/roles/(?P<role>\d+)$")),
+    ("member", re.compile(r"^/guilds/(?P<major>\d+)/members/(?P<user>\d+)$")),
+    ("members", re.compile(r"^/guilds/(?P<major>\d+)/members$")),
+    ("commands", re.compile(r"^/applications/(?P<major>\d+)(?:/guilds/(?P<guild>\d+))?/commands$")),
+]
+
+
+class FakeDiscord(FakeService):
+    name = "discord"
+
+    def __init__(self, world, latency: float = 0.0, clock=None, bucket_limit: int = 5, bucket_window: float = 2.0):
+        super().__init__(latency, clock)
+        self.members = {m["user"]["id"]: m for m in world.members}
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.buckets = {}                 # bucket -> {"remaining", "reset_at", "limited"}
+        self.messages = {}                # message id -> message
+        self.originals = {}               # interaction token -> @original message
+        self.callbacks = []               # interaction callback bodies
+        self.commands = {}                # scope -> registered commands
+        self.overwrites = {}              # (channel, overwrite) -> body
+        self.role_changes = []            # (method, user, role)
+        self.rejected = defaultdict(int)  # route -> 400s from validation
+        self.rate_limited = 0
+        self.violations = 0
+        self.ids = itertools.count(1_300_000_000_000_000_000)
+
+    # --- Routing ---
+    def match(self, request: Request):
+        path = API_PREFIX.sub("", request.path).rstrip("/")
+        for name, pattern in ROUTES:
+            m = pattern.match(path)
+            if m:
+                return name, m.groupdict()
+        return None, {}
+
+    def route(self, request: Request) -> str:
+        name, _ = self.match(request)
+        return f"{request.method} {name or request.path}"
+
+    def handle(self, request: Request) -> Response:
+        name, args = self.match(request)
+        if name is None:
+            return Response(404, {"message": "404: Not Found", "code": 0})
+
+        limited, headers = self._rate_limit(f"{name}:{args['major']}")
+        if limited:
+            return limited
+
+        response = getattr(self, f"_{name}")(request, args)
+        response.headers.update(headers)
+        return response
+
+    # --- Rate limiting ---
+    def _rate_limit(self, bucket: str):
+        now = self.clock.now()
+        with self.lock:
+            state = self.buckets.get(bucket)
+            if state is None or now >= state["reset_at"]:
+                state = self.buckets[bucket] = {"remaining": self.bucket_limit, "reset_at": now + self.bucket_window, "limited": False}
+
+            reset_after = round(state["reset_at"] - now, 3)
+            if state["remaining"] == 0:
+                self.rate_limited += 1
+                if state["limited"]:
+                    self.violations += 1
+                state["limited"] = True
+                headers = {
+                    "Retry-After": reset_after,
+                    "X-RateLimit-Limit": self.bucket_limit,
+                    "X-RateLimit-Remaining": 0,
+                    "X-RateLimit-Reset-After": reset_after,
+                    "X-RateLimit-Bucket": bucket,
+                    "X-RateLimit-Scope": "user",
+                }
+                body = {"message": "You are being rate limited.", "retry_after": reset_after, "global": False}
+                return Response(429, body, headers), {}
+
+            state["remaining"] -= 1
+            return None, {
+                "X-RateLimit-Limit": self.bucket_limit,
+                "X-RateLimit-Remaining": state["remaining"],
+                "X-RateLimit-Reset-After": reset_after,
+                "X-RateLimit-Bucket": bucket,
+            }
+
+    # --- Messages ---
+    def _message(self, channel: str, payload: dict, message_id: str | None = None) -> dict:
+        message = {
+            "id": message_id or str(next(self.ids)),
+            "channel_id": channel,
+            "content": payload.get("content", ""),
+            "embeds": payload.get("embeds", []),
+        }
+        with self.lock:
+            self.messages[message["id"]] = message
+        return message
+
+    def _invalid(self, request: Request, payload) -> Response | None:
+        error = validate_message(payload)
+        if error is None:
+            return None
+        with self.lock:
+            self.rejected[self.route(request)] += 1
+        return Response(400, error)
+
+    def _webhook(self, request: Request, args: dict) -> Response:
+        if request.method != "POST":
+            return Response(405, {"message": "405: Method Not Allowed", "code": 0})
+        payload = request.json() or {}
+        invalid = self._invalid(request, payload)
+        if invalid:
+            return invalid
+        message = self._message(f"webhook:{args['major']}", payload)
+        if request.params.get("wait") == "true":
+            return Response(200, message)
+        return Response(204)
+
+    def _webhook_message(self, request: Request, args: dict) -> Response:
+        message_id = args["message"]
+        if message_id == "@original":
+            message_id = self.originals.get(args["token"], {}).get("id")
+        message = self.messages.get(message_id) if message_id else None
+
+        if request.method == "GET":
+            return Response(200, message) if message else unknown_message()
+        if request.method == "DELETE":
+            if not message:
+                return unknown_message()
+            with self.lock:
+                self.messages.pop(message_id, None)
+            return Response(204)
+        if request.method == "PATCH":
+            payload = request.json() or {}
+            invalid = self._invalid(request, payload)
+            if invalid:
+                return invalid
+            if args["message"] == "@original":
+                # The deferred response creates @original; edits fill it in.
+                message = self._message(f"interaction:{args['token']}", payload, message_id)
+                self.originals[args["token"]] = message
+                return Response(200, message)
+            if not message:
+                return unknown_message()
+            return Response(200, self._message(message["channel_id"], payload, message_id))
+        return Response(405, {"message": "405: Method Not Allowed", "code": 0})
+
+    def _interaction_callback(self, request: Request, args: dict) -> Response:
+        with self.lock:
+            self.callbacks.append(request.json())
+        return Response(204)
+
+    def _channel_messages(self, request: Request, args: dict) -> Response:
+        if request.method == "GET":
+            channel = args["major"]
+            return Response(200, [m for m in self.messages.values() if m["channel_id"] == channel])
+        payload = request.json() or {}
+        invalid = self._invalid(request, payload)
+        if invalid:
+            return invalid
+        return Response(200, self._message(args["major"], payload))
+
+    def _channel_message(self, request: Request, args: dict) -> Response:
+        message = self.messages.get(args["message"])
+        if not message or message["channel_id"] != args["major"]:
+            return unknown_message()
+        if request.method == "DELETE":
+            with self.lock:
+                self.messages.pop(args["message"], None)
+            return Response(204)
+        if request.method == "PATCH":
+            payload = request.json() or {}
+            invalid = self._invalid(request, payload)
+            if invalid:
+                return invalid
+            return Response(200, self._message(args["major"], {**message, **payload}, args["message"]))
+        return Response(200, message)
+
+    def _channel_permission(self, request: Request, args: dict) -> Response:
+        with self.lock:
+            if request.method == "DELETE":
+                self.overwrites.pop((args["major"], args["overwrite"]), None)
+            else:
+                self.overwrites[(args["major"], args["overwrite"])] = request.json()
+        return Response(204)
+
+    # --- Guild members and roles ---
+    def _members(self, request: Request, args: dict) -> Response:
+        limit = min(int(request.params.get("limit", 1)), 1000)
+        after = int(request.params.get("after", 0))
+        with self.lock:
+            ids = sorted(int(uid) for uid in self.members if int(uid) > after)[:limit]
+            return Response(200, [self.members[str(uid)] for uid in ids])
+
+    def _member(self, request: Request, args: dict) -> Response:
+        member = self.members.get(args["user"])
+        if not member:
+            return Response(404, {"message": "Unknown Member", "code": 10007})
+        if request.method == "PATCH":
+            body = request.json() or {}
+            with self.lock:
+                if "roles" in body:
+                    before = set(member["roles"])
+                    member["roles"] = [str(r) for r in body["roles"]]
+                    for role in set(member["roles"]) - before:
+                        self.role_changes.append(("PUT", args["user"], role))
+                    for role in before - set(member["roles"]):
+                        self.role_changes.append(("DELETE", args["user"], role))
+                if "nick" in body:
+                    member["nick"] = body["nick"]
+        return Response(200, member)
+
+    def _member_role(self, request: Request, args: dict) -> Response:
+        member = self.members.get(args["user"])
+        if not member:
+            return Response(404, {"message": "Unknown Member", "code": 10007})
+        role = args["role"]
+        with self.lock:
+            if request.method == "PUT" and role not in member["roles"]:
+                member["roles"].append(role)
+            elif request.method == "DELETE" and role in member["roles"]:
+                member["roles"].remove(role)
+            self.role_changes.append((request.method, args["user"], role))
+        return Response(204)
+
+    # --- Application commands ---
+    def _commands(self, request: Request, args: dict) -> Response:
+        scope = args.get("guild") or "global"
+        if request.method == "PUT":
+            commands = [{"id": str(next(self.ids)), **c} for c in (request.json() or [])]
+            with self.lock:
+                self.commands[scope] = commands
+            return Response(200, commands)
+        if request.method == "POST":
+            command = {"id": str(next(self.ids)), **(request.json() or {})}
+            with self.lock:
+                self.commands.setdefault(scope, []).append(command)
+            return Response(201, command)
+        return Response(200, self.commands.get(scope, []))
+
+    # --- Inspection ---
+    def channel_messages(self, channel: str) -> list[dict]:
+        """Messages currently in a channel ("webhook:<id>" for webhooks)."""
+        return [m for m in self.messages.values() if m["channel_id"] == channel]
+
+
+def unknown_message() -> Response:
+    return Response(404, {"message": "Unknown Message", "code": 10008})
+
+
+def validate_message(payload: dict) -> dict | None:
+    """Discord's "Invalid Form Body" error for a payload over the limits, else None."""
+    errors = {}
+    content = payload.get("content") or ""
+    embeds = payload.get("embeds") or []
+
+    if not content and not embeds:
+        return {"message": "Cannot send an empty message", "code": 50006}
+    if len(content) > CONTENT_LIMIT:
+        errors["content"] = field_error("BASE_TYPE_MAX_LENGTH", f"Must be {CONTENT_LIMIT} or fewer in length.")
+    if len(embeds) > EMBEDS_PER_MESSAGE:
+        errors["embeds"] = field_error("BASE_TYPE_MAX_LENGTH", f"Must be {EMBEDS_PER_MESSAGE} or fewer in length.")
+
+    total = 0
+    for i, embed in enumerate(embeds):
+        title = embed.get("title") or ""
+        description = embed.get("description") or ""
+        total += len(title) + len(description)
+        if len(title) > EMBED_TITLE_LIMIT:
+            errors[f"embeds.{i}.title"] = field_error("BASE_TYPE_MAX_LENGTH", f"Must be {EMBED_TITLE_LIMIT} or fewer in length.")
+        if len(description) > EMBED_DESCRIPTION_LIMIT:
+            errors[f"embeds.{i}.description"] = field_error("BASE_TYPE_MAX_LENGTH", f"Must be {EMBED_DESCRIPTION_LIMIT} or fewer in length.")
+    if total > EMBEDS_TOTAL_LIMIT:
+        errors["embeds"] = field_error("MAX_EMBED_SIZE_EXCEEDED", "Embed size exceeds maximum size of 6000")
+
+    if not errors:
+        return None
+    return {"message": "Invalid Form Body", "code": 50035, "errors": errors}
+
+
+def field_error(code: str, message: str) -> dict:
+    return {"_errors": [{"code": code, "message": message}]}
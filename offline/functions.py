@@ -0,0 +1,94 @@
+"""
+Python equivalents of the SQL functions and triggers in src/db, run by the
+PostgREST stand-in against its SQLite database. Each RPC takes the service
+followed by the same named arguments the real function does.
+"""
+from datetime import date, timedelta
+
+
+def company_financials_window(service, p_window_days: int = 7, p_end_date: str | None = None):
+    """src/db/16_function_company_financials_window.sql"""
+    end = date.fromisoformat(p_end_date) if p_end_date else date.today()
+    start = end - timedelta(days=int(p_window_days) - 1)
+    return service.execute(
+        """
+        SELECT cf.company_id,
+               COALESCE(c.company_name, 'Company ' || cf.company_id) AS company_name,
+               COALESCE(c.days_old, 0) AS days_old,
+               COUNT(*) AS days_captured,
+               COALESCE(SUM(cf.revenue), 0) AS revenue,
+               COALESCE(SUM(cf.stock_cost), 0) AS stock_cost,
+               COALESCE(SUM(cf.wages), 0) AS wages,
+               COALESCE(SUM(cf.advertising), 0) AS advertising,
+               COALESCE(SUM(cf.profit), 0) AS profit
+        FROM company_financials cf
+        LEFT JOIN company c ON c.company_id = cf.company_id
+        WHERE cf.capture_date BETWEEN ? AND ?
+        GROUP BY cf.company_id, c.company_name, c.days_old
+        """,
+        (start.isoformat(), end.isoformat()),
+    )
+
+
+def refresh_company_financials_rollups(service, p_company_id: int, p_capture_date: str):
+    """src/db/17_create_company_financials_rollups.sql"""
+    day = date.fromisoformat(p_capture_date)
+    week_start = day - timedelta(days=day.weekday())
+    month_start = day.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    iso_year, iso_week, _ = week_start.isocalendar()
+
+    totals = """
+        SELECT COUNT(*) AS days, COALESCE(SUM(revenue), 0), COALESCE(SUM(stock_cost), 0),
+               COALESCE(SUM(wages), 0), COALESCE(SUM(advertising), 0), COALESCE(SUM(profit), 0)
+        FROM company_financials WHERE company_id = ? AND capture_date >= ? AND capture_date < ?
+    """
+    db = service.db
+
+    db.execute("DELETE FROM company_financials_weekly WHERE company_id = ? AND week_start = ?",
+               (p_company_id, week_start.isoformat()))
+    week = db.execute(totals, (p_company_id, week_start.isoformat(), (week_start + timedelta(days=7)).isoformat())).fetchone()
+    if week[0]:
+        db.execute(
+            "INSERT INTO company_financials_weekly (company_id, iso_year, iso_week, week_start, days_captured, "
+            "revenue, stock_cost, wages, advertising, profit, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, now())",
+            (p_company_id, iso_year, iso_week, week_start.isoformat(), *week),
+        )
+
+    db.execute("DELETE FROM company_financials_monthly WHERE company_id = ? AND month_start = ?",
+               (p_company_id, month_start.isoformat()))
+    month = db.execute(totals, (p_company_id, month_start.isoformat(), next_month.isoformat())).fetchone()
+    if month[0]:
+        db.execute(
+            "INSERT INTO company_financials_monthly (company_id, month_start, days_captured, "
+            "revenue, stock_cost, wages, advertising, profit, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, now())",
+            (p_company_id, month_start.isoformat(), *month),
+        )
+    return None
+
+
+def update_company_investments_from_transaction(service, rows: list[dict]):
+    """src/db/13_trigger_update_investment_totals.sql (AFTER INSERT OR UPDATE)"""
+    for investment_id in {r["investment_id"] for r in rows if r.get("status") == "confirmed"}:
+        service.db.execute(
+            """
+            UPDATE company_investments SET
+                total_invested = (SELECT COALESCE(SUM(amount), 0) FROM company_investment_transactions
+                                  WHERE investment_id = ? AND transaction_type = 'investment' AND status = 'confirmed'),
+                total_returned = (SELECT COALESCE(SUM(amount), 0) FROM company_investment_transactions
+                                  WHERE investment_id = ? AND transaction_type = 'return' AND status = 'confirmed'),
+                updated_at = now()
+            WHERE id = ?
+            """,
+            (investment_id, investment_id, investment_id),
+        )
+
+
+DEFAULT_RPCS = {
+    "company_financials_window": company_financials_window,
+    "refresh_company_financials_rollups": refresh_company_financials_rollups,
+}
+
+DEFAULT_TRIGGERS = {
+    "company_investment_transactions": update_company_investments_from_transaction,
+}
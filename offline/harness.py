@@ -0,0 +1,367 @@
+"""
+Runs the Lambda handlers from template.yaml against the fake services.
+
+While a Harness is active:
+- boto3.client returns in-memory Secrets Manager / S3 / SQS clients whose
+  secrets point at the fakes (supabase_keys, discord_keys,
+  google_service_account and one torn_director_api_keys/<key_ref> per director);
+- requests to api.torn.com and discord.com are rewritten to the local fake
+  servers, and any other non-local URL raises ConnectionError;
+- gspread / oauth2client are replaced with in-memory sheets;
+- time.sleep advances the shared virtual clock instead of blocking;
+- template functions get a Lambda context whose remaining time counts down
+  from their Timeout on that clock, so deadline checks behave as deployed.
+
+Each run imports the handler module fresh, with sys.path set the way Lambda
+would set it (CodeUri, plus the shared layer if the function attaches it).
+"""
+import json
+import os
+import re
+import sys
+import time
+import importlib
+import tracemalloc
+from urllib.parse import urlsplit
+
+import boto3
+import requests
+import gspread  # type: ignore
+import oauth2client.service_account  # type: ignore
+from nacl.signing import SigningKey  # type: ignore
+
+from offline.aws import FakeAws
+from offline.discord import FakeDiscord
+from offline.postgrest import FakePostgrest
+from offline.service import Clock
+from offline.sheets import FakeCredentials, FakeSheets
+from offline.torn import FakeTorn
+from offline.world import APPLICATION_ID, World
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_PATH = os.path.join("layers", "shared", "python")
+SUPABASE_KEY = "offline.anon.key"
+BOT_TOKEN = "offline-bot-token"
+LOCAL_HOSTS = {"127.0.0.1", "localhost"}
+# Queue consumers, run once per message a target enqueued, as SQS would
+QUEUE_WORKERS = {"offline-CronShardQueue": "CronShardWorkerFunction"}
+MAX_DRAINED_RUNS = 10000  # drain() gives up on work that keeps enqueueing more
+
+
+class Function:
+    def __init__(self, name: str, code_uri: str, handler: str, layers: bool, environment: dict, timeout: int):
+        self.name = name
+        self.code_uri = code_uri
+        self.handler = handler
+        self.layers = layers
+        self.environment = environment
+        self.timeout = timeout
+
+
+class LambdaContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    def __init__(self, function: Function, clock: Clock):
+        self.function_name = function.name
+        self.aws_request_id = f"offline-{function.name}-{time.time_ns()}"
+        self.clock = clock
+        self.deadline = clock.now() + function.timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self.deadline - self.clock.now()) * 1000))
+
+
+def load_functions(template_path: str) -> dict[str, Function]:
+    """AWS::Serverless::Function resources in template.yaml, by logical name."""
+    with open(template_path) as f:
+        text = f.read()
+
+    default_timeout = re.search(r"\nGlobals:\n  Function:\n(?:    .*\n)*?    Timeout: (\d+)", text)
+    default_timeout = int(default_timeout.group(1)) if default_timeout else 3
+
+    functions = {}
+    for block in re.split(r"\n(?=  [A-Za-z0-9]+:\n)", text):
+        header = re.match(r"  ([A-Za-z0-9]+):\n", block)
+        if not header or "Type: AWS::Serverless::Function" not in block:
+            continue
+        code_uri = re.search(r"\n      CodeUri: (\S+)", block)
+        handler = re.search(r"\n      Handler: (\S+)", block)
+        if not code_uri or not handler:
+            continue
+        environment = {}
+        variables = re.search(r"\n        Variables:\n((?:          .*\n?)+)", block)
+        if variables:
+            for line in variables.group(1).splitlines():
+                key, _, value = line.strip().partition(": ")
+                ref = re.match(r"!(?:Ref|GetAtt) (\S+)", value)
+                environment[key] = f"offline-{ref.group(1)}" if ref else value.strip("\"'")
+        timeout = re.search(r"\n      Timeout: (\d+)", block)
+        functions[header.group(1)] = Function(
+            header.group(1),
+            code_uri.group(1),
+            handler.group(1),
+            "!Ref SharedLayer" in block,
+            environment,
+            int(timeout.group(1)) if timeout else default_timeout,
+        )
+    return functions
+
+
+class RunResult:
+    def __init__(self, name: str, result, seconds: float, calls: dict, peak_memory: int | None, slept: float = 0.0):
+        self.name = name
+        self.result = result
+        self.seconds = seconds
+        self.calls = calls
+        self.peak_memory = peak_memory
+        self.slept = slept  # virtual seconds time.sleep advanced the clock by
+
+
+class Harness:
+    def __init__(
+        self,
+        world: World,
+        latency: float = 0.0,
+        torn_latency: float | None = None,
+        supabase_latency: float | None = None,
+        discord_latency: float | None = None,
+        torn_requests_per_minute: int | None = 100,
+        discord_bucket: tuple[int, float] = (5, 2.0),
+        root: str = REPO_ROOT,
+    ):
+        self.world = world
+        self.root = root
+        self.clock = Clock()
+        self.torn = FakeTorn(world, _pick(torn_latency, latency), self.clock, torn_requests_per_minute)
+        self.supabase = FakePostgrest(os.path.join(root, "src", "db"), _pick(supabase_latency, latency), self.clock)
+        self.discord = FakeDiscord(world, _pick(discord_latency, latency), self.clock, *discord_bucket)
+        self.aws = FakeAws()
+        self.sheets = FakeSheets()
+        self.signing_key = SigningKey.generate()
+        self.functions = load_functions(os.path.join(root, "template.yaml"))
+        self.runs: list[RunResult] = []
+        self._patches = []
+        self._interactions = 0
+        self._invoked = 0  # aws.invocations already run by drain()
+
+    # --- Lifecycle ---
+    def __enter__(self) -> "Harness":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self) -> "Harness":
+        for service in self.services:
+            service.start()
+        self.world.seed(self.supabase)
+        self.aws = FakeAws(self._secrets())
+
+        rewrites = {
+            "https://api.torn.com": self.torn.url,
+            "https://discord.com": self.discord.url,
+            "https://discordapp.com": self.discord.url,
+        }
+        send = requests.Session.request
+
+        def request(session, method, url, *args, **kwargs):
+            for prefix, target in rewrites.items():
+                if url.startswith(prefix):
+                    url = target + url[len(prefix):]
+                    break
+            if urlsplit(url).hostname not in LOCAL_HOSTS:
+                raise requests.exceptions.ConnectionError(f"offline harness blocked request to {url}")
+            return send(session, method, url, *args, **kwargs)
+
+        self._patch(requests.Session, "request", request)
+        self._patch(boto3, "client", self.aws.client)
+        self._patch(gspread, "authorize", self.sheets.authorize)
+        self._patch(oauth2client.service_account, "ServiceAccountCredentials", FakeCredentials)
+        self._patch(time, "sleep", self.clock.sleep)
+        return self
+
+    def stop(self):
+        while self._patches:
+            target, attr, original = self._patches.pop()
+            setattr(target, attr, original)
+        for service in self.services:
+            service.stop()
+
+    def _patch(self, target, attr: str, value):
+        self._patches.append((target, attr, getattr(target, attr)))
+        setattr(target, attr, value)
+
+    @property
+    def services(self):
+        return [self.torn, self.supabase, self.discord]
+
+    def _secrets(self) -> dict[str, dict]:
+        thlc_bot = next(c["discord_webhook_url"] for c in self.world.channels if c["company_id"] == 0)
+        return {
+            "supabase_keys": {"SUPABASE_URL": self.supabase.url, "SUPABASE_KEY": SUPABASE_KEY},
+            "discord_keys": {
+                "DISCORD_BOT_TOKEN": BOT_TOKEN,
+                "DISCORD_APPLICATION_ID": APPLICATION_ID,
+                "DISCORD_PUBLIC_KEY": self.signing_key.verify_key.encode().hex(),
+                "DISCORD_WEBHOOK_CHANNEL_THLC_BOT": thlc_bot,
+                "DISCORD_WEBHOOK": thlc_bot,
+            },
+            **{f"torn_director_api_keys/{ref}": {"api_key": key} for ref, key in self.world.api_keys.items()},
+            "google_service_account": {"type": "service_account", "client_email": "offline@example.invalid"},
+            **self.world.secrets,
+        }
+
+    # --- Running handlers ---
+    def run(self, target: str, event: dict | None = None, context=None, measure_memory: bool = False) -> RunResult:
+        """
+        Run a handler by logical name from template.yaml ("PopulateEmployeesCron")
+        or by path ("src/cron/populate_employees.py[:lambda_handler]").
+        """
+        if target in self.functions:
+            function = self.functions[target]
+            code_dir = os.path.join(self.root, function.code_uri)
+            module_name, handler_name = function.handler.rsplit(".", 1)
+            with_layer, environment = function.layers, function.environment
+            context = context if context is not None else LambdaContext(function, self.clock)
+        else:
+            path, _, handler_name = target.partition(":")
+            path = os.path.join(self.root, path)
+            code_dir, module_name = os.path.dirname(path), os.path.splitext(os.path.basename(path))[0]
+            handler_name = handler_name or "lambda_handler"
+            with_layer, environment = True, {}
+
+        saved_path, saved_env = list(sys.path), dict(os.environ)
+        before = self.calls()
+        slept_before = self.clock.slept
+        self._purge_modules()
+        sys.path[:0] = [code_dir] + ([os.path.join(self.root, LAYER_PATH)] if with_layer else [])
+        os.environ.update(environment)
+
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+            result = getattr(module, handler_name)(event if event is not None else {}, context)
+        finally:
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+            if measure_memory:
+                tracemalloc.stop()
+            sys.path[:] = saved_path
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        after = self.calls()
+        run = RunResult(
+            target, result, seconds, {k: after[k] - before.get(k, 0) for k in after}, peak, self.clock.slept - slept_before
+        )
+        self.runs.append(run)
+        return run
+
+    def _purge_modules(self):
+        """Drop modules loaded from the repo so the next import is a cold start."""
+        prefixes = (os.path.join(self.root, "src"), os.path.join(self.root, "layers"), os.path.join(self.root, "scripts"))
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None) or ""
+            if path.startswith(prefixes):
+                del sys.modules[name]
+
+    # --- Events ---
+    def interaction_event(self, payload: dict) -> dict:
+        """API Gateway event carrying a correctly signed Discord interaction."""
+        body = json.dumps(payload)
+        timestamp = str(int(time.time()))
+        signature = self.signing_key.sign((timestamp + body).encode()).signature.hex()
+        return {
+            "body": body,
+            "headers": {"x-signature-ed25519": signature, "x-signature-timestamp": timestamp},
+        }
+
+    def command_payload(self, name: str, *subcommands: str, options: list | None = None,
+                        roles: list | None = None, channel_id=None, user_id: str = "42") -> dict:
+        """A slash-command interaction, e.g. command_payload("company", "info", roles=[ROLE_HOKAGE])."""
+        options = options or []
+        for sub in reversed(subcommands):
+            options = [{"type": 1, "name": sub, "options": options}]
+        self._interactions += 1
+        return {
+            "type": 2,
+            "id": str(self._interactions),
+            "token": f"offline-token-{self._interactions}",
+            "application_id": APPLICATION_ID,
+            "channel": {"id": str(channel_id or 0)},
+            "member": {"user": {"id": user_id}, "roles": [str(r) for r in roles or []]},
+            "data": {"name": name, "options": options},
+        }
+
+    def sqs_event(self, queue_url: str | None = None) -> dict:
+        """SQS event with (and draining) the messages sent to `queue_url` (default: all queues)."""
+        records = []
+        for url in list(self.aws.queues):
+            if queue_url is None or url == queue_url:
+                records.extend({"body": m["Body"], "messageId": str(i)} for i, m in enumerate(self.aws.queues.pop(url)))
+        return {"Records": records}
+
+    def drain(self, measure_memory: bool = False) -> list[RunResult]:
+        """
+        Run the work earlier runs left behind until none is left, as AWS
+        would: each QUEUE_WORKERS consumer once per message on its queue, and
+        every asynchronous (InvocationType Event) invoke of a template
+        function, e.g. a deadline follow-up. Work those runs leave in turn,
+        such as a shard's own follow-up, is run as well.
+        """
+        runs = []
+        while True:
+            pending = [
+                (worker, {"Records": [record]})
+                for queue_url, worker in QUEUE_WORKERS.items()
+                for record in self.sqs_event(queue_url)["Records"]
+            ]
+            invocations, self._invoked = self.aws.invocations[self._invoked:], len(self.aws.invocations)
+            pending += [
+                (call["FunctionName"], json.loads(call["Payload"] or "{}"))
+                for call in invocations
+                if call["InvocationType"] == "Event" and call["FunctionName"] in self.functions
+            ]
+            if not pending:
+                return runs
+            for name, event in pending:
+                if len(runs) >= MAX_DRAINED_RUNS:
+                    raise RuntimeError(f"drain() stopped after {MAX_DRAINED_RUNS} runs; work keeps being enqueued")
+                runs.append(self.run(name, event, measure_memory=measure_memory))
+
+    # --- Reporting ---
+    def calls(self) -> dict[str, int]:
+        return {
+            "torn": self.torn.total_calls,
+            "supabase": self.supabase.total_calls,
+            "discord": self.discord.total_calls,
+            "aws": sum(self.aws.calls.values()),
+            "discord_429": self.discord.rate_limited,
+            "discord_violations": self.discord.violations,
+            "discord_rejected": sum(self.discord.rejected.values()),
+            "torn_throttled": self.torn.throttled,
+        }
+
+    def report(self) -> dict:
+        return {
+            "totals": self.calls(),
+            "slept_seconds": round(self.clock.slept, 3),
+            "routes": {service.name: dict(service.calls.most_common()) for service in self.services},
+            "aws": dict(self.aws.calls.most_common()),
+            "runs": [
+                {"name": r.name, "seconds": round(r.seconds, 3), "calls": r.calls, "peak_memory": r.peak_memory}
+                for r in self.runs
+            ],
+        }
+
+    def reset_counters(self):
+        for service in self.services:
+            service.reset_counters()
+        self.aws.reset_counters()
+        self.runs.clear()
+
+
+def _pick(value, default):
+    return default if value is None else value
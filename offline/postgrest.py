@@ -0,0 +1,471 @@
+"""
+PostgREST-compatible stand-in backed by SQLite.
+
+The real supabase-py client is pointed at this service unchanged. Tables
+come from src/db/*.sql (see schema.py). Supported request surface:
+
+- GET /rest/v1/<table>: select lists with aliases and nested embeds over
+  foreign keys, eq/neq/gt/gte/lt/lte/like/ilike/is/in filters (and not.),
+  order, limit/offset, single() and count=exact.
+- POST: insert and upsert (on_conflict, merge/ignore duplicates, columns).
+- PATCH / DELETE with filters; return=representation|minimal.
+- POST /rest/v1/rpc/<name>: Python functions registered with register_rpc().
+
+Errors use PostgREST's JSON shape ({code, message, details, hint}) so the
+client raises APIError the same way it would against Supabase.
+"""
+import csv
+import json
+import re
+import sqlite3
+import threading
+
+from offline.functions import DEFAULT_RPCS, DEFAULT_TRIGGERS
+from offline.schema import Schema, split_top_level
+from offline.service import FakeService, Request, Response
+
+REST_PREFIX = "/rest/v1/"
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+IN_CHUNK = 900
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str, details: str | None = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+    def response(self) -> Response:
+        return Response(self.status, {"code": self.code, "message": self.message, "details": self.details, "hint": None})
+
+
+class SelectNode:
+    def __init__(self, key: str, target: str, children: list | None = None):
+        self.key = key            # output key (alias or name)
+        self.target = target      # column, table or FK column
+        self.children = children  # None for a plain column
+
+
+class FakePostgrest(FakeService):
+    name = "supabase"
+
+    def __init__(self, sql_dir: str, latency: float = 0.0, clock=None):
+        super().__init__(latency, clock)
+        self.schema = Schema.from_directory(sql_dir)
+        self.db = self.schema.create_database()
+        self.db_lock = threading.RLock()
+        self.rpcs = dict(DEFAULT_RPCS)
+        self.triggers = dict(DEFAULT_TRIGGERS)
+
+    def register_rpc(self, name: str, fn):
+        """fn(service, **args) -> JSON-serialisable result."""
+        self.rpcs[name] = fn
+
+    # --- Direct access (seeding and assertions) ---
+    def insert(self, table: str, rows: list[dict]):
+        with self.db_lock:
+            for row in rows:
+                self._write_rows(table, [row], list(row), conflict=None, resolution=None)
+            self.db.commit()
+
+    def rows(self, table: str, **equals) -> list[dict]:
+        where = " AND ".join(f'"{c}" = ?' for c in equals)
+        sql = f'SELECT * FROM "{table}"' + (f" WHERE {where}" if where else "")
+        with self.db_lock:
+            return [self.decode(table, dict(r)) for r in self.db.execute(sql, list(equals.values()))]
+
+    def count(self, table: str) -> int:
+        with self.db_lock:
+            return self.db.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    def execute(self, sql: str, args=()) -> list[dict]:
+        with self.db_lock:
+            rows = [dict(r) for r in self.db.execute(sql, args)]
+            self.db.commit()
+            return rows
+
+    # --- Routing ---
+    def route(self, request: Request) -> str:
+        path = request.path.removeprefix(REST_PREFIX)
+        if path.startswith("rpc/"):
+            return f"RPC {path[4:]}"
+        return f"{request.method} {path}"
+
+    def handle(self, request: Request) -> Response:
+        if not request.path.startswith(REST_PREFIX):
+            return Response(404, {"message": "not found"})
+        path = request.path.removeprefix(REST_PREFIX)
+
+        try:
+            with self.db_lock:
+                if path.startswith("rpc/"):
+                    return self._rpc(path[4:], request)
+                if path not in self.schema.tables:
+                    raise ApiError(404, "42P01", f'relation "public.{path}" does not exist')
+                if request.method in ("GET", "HEAD"):
+                    return self._select(path, request)
+                if request.method == "POST":
+                    return self._insert(path, request)
+                if request.method == "PATCH":
+                    return self._update(path, request)
+                if request.method == "DELETE":
+                    return self._delete(path, request)
+                raise ApiError(405, "PGRST117", f"Unsupported HTTP method: {request.method}")
+        except ApiError as e:
+            self.db.rollback()
+            return e.response()
+        except sqlite3.IntegrityError as e:
+            self.db.rollback()
+            return integrity_error(e).response()
+        except sqlite3.Error as e:
+            self.db.rollback()
+            return ApiError(400, "42601", str(e)).response()
+
+    # --- GET ---
+    def _select(self, table: str, request: Request) -> Response:
+        nodes = parse_select(request.params.get("select", "*"))
+        where, args = self.where_clause(table, request.query)
+        order = self.order_clause(table, request.params.get("order"))
+        limit = request.params.get("limit")
+        offset = int(request.params.get("offset", 0))
+
+        sql = f'SELECT * FROM "{table}"{where}{order}'
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {offset}"
+        elif offset:
+            sql += f" LIMIT -1 OFFSET {offset}"
+        raw = [self.decode(table, dict(r)) for r in self.db.execute(sql, args)]
+        rows = self.project(table, raw, nodes)
+
+        prefer = parse_prefer(request.headers.get("Prefer"))
+        total = "*"
+        if prefer.get("count"):
+            total = self.db.execute(f'SELECT COUNT(*) FROM "{table}"{where}', args).fetchone()[0]
+        content_range = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+
+        return self._respond(request, rows, 200, {"Content-Range": content_range})
+
+    # --- POST ---
+    def _insert(self, table: str, request: Request) -> Response:
+        body = request.json()
+        rows = body if isinstance(body, list) else [body]
+        prefer = parse_prefer(request.headers.get("Prefer"))
+        resolution = prefer.get("resolution")
+
+        columns = None
+        if request.params.get("columns"):
+            columns = [c.strip().strip('"') for c in request.params["columns"].split(",")]
+
+        conflict = None
+        if request.params.get("on_conflict"):
+            conflict = tuple(c.strip() for c in request.params["on_conflict"].split(","))
+        elif resolution:
+            conflict = self.schema.tables[table].primary_key
+
+        written = []
+        if resolution == "merge-duplicates" and conflict:
+            check_single_touch(rows, conflict)
+        for row in rows:
+            row_columns = columns or list(row)
+            if prefer.get("missing") == "default":
+                row_columns = [c for c in row_columns if c in row]
+            written.extend(self._write_rows(table, [row], row_columns, conflict, resolution))
+
+        self.db.commit()
+        self._fire_triggers(table, written)
+        return self._respond(request, written, 201)
+
+    def _write_rows(self, table: str, rows: list[dict], columns: list[str], conflict, resolution) -> list[dict]:
+        self.check_columns(table, columns)
+        schema_table = self.schema.tables[table]
+        for c in columns:
+            if schema_table.columns[c].generated:
+                raise ApiError(400, "428C9", f'cannot insert a non-DEFAULT value into column "{c}"')
+
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})' if columns else f'INSERT INTO "{table}" DEFAULT VALUES'
+
+        if conflict and resolution:
+            target = ", ".join(f'"{c}"' for c in conflict)
+            updates = [c for c in columns if c not in conflict]
+            if resolution == "merge-duplicates" and updates:
+                sets = ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+                sql += f" ON CONFLICT ({target}) DO UPDATE SET {sets}"
+            else:
+                sql += f" ON CONFLICT ({target}) DO NOTHING"
+        sql += " RETURNING *"
+
+        written = []
+        for row in rows:
+            values = [self.encode(table, c, row.get(c)) for c in columns]
+            try:
+                written.extend(self.decode(table, dict(r)) for r in self.db.execute(sql, values).fetchall())
+            except sqlite3.OperationalError as e:
+                if "ON CONFLICT clause does not match" in str(e):
+                    raise ApiError(400, "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification")
+                raise
+        return written
+
+    # --- PATCH ---
+    def _update(self, table: str, request: Request) -> Response:
+        body = request.json() or {}
+        self.check_columns(table, list(body))
+        where, args = self.where_clause(table, request.query)
+        if not body:
+            return self._respond(request, [], 200)
+
+        sets = ", ".join(f'"{c}" = ?' for c in body)
+        values = [self.encode(table, c, v) for c, v in body.items()]
+        sql = f'UPDATE "{table}" SET {sets}{where} RETURNING *'
+        written = [self.decode(table, dict(r)) for r in self.db.execute(sql, values + args).fetchall()]
+        self.db.commit()
+        self._fire_triggers(table, written)
+        return self._respond(request, written, 200)
+
+    # --- DELETE ---
+    def _delete(self, table: str, request: Request) -> Response:
+        where, args = self.where_clause(table, request.query)
+        sql = f'DELETE FROM "{table}"{where} RETURNING *'
+        deleted = [self.decode(table, dict(r)) for r in self.db.execute(sql, args).fetchall()]
+        self.db.commit()
+        return self._respond(request, deleted, 200)
+
+    # --- RPC ---
+    def _rpc(self, name: str, request: Request) -> Response:
+        fn = self.rpcs.get(name)
+        if fn is None:
+            raise ApiError(404, "PGRST202", f"Could not find the function public.{name} in the schema cache")
+        args = request.json() if request.method == "POST" else {
+            k: v for k, v in request.query if k not in RESERVED_PARAMS
+        }
+        result = fn(self, **(args or {}))
+        self.db.commit()
+        if result is None:
+            return Response(204)
+        return Response(200, result)
+
+    def _fire_triggers(self, table: str, rows: list[dict]):
+        trigger = self.triggers.get(table)
+        if trigger and rows:
+            trigger(self, rows)
+            self.db.commit()
+
+    def _respond(self, request: Request, rows: list[dict], status: int, headers: dict | None = None) -> Response:
+        accept = request.headers.get("Accept") or ""
+        if "application/vnd.pgrst.object+json" in accept:
+            if len(rows) != 1:
+                raise ApiError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                               f"The result contains {len(rows)} rows")
+            return Response(status, rows[0], headers)
+
+        if request.method == "HEAD":
+            return Response(status, None, headers)
+        prefer = parse_prefer(request.headers.get("Prefer"))
+        if request.method != "GET" and prefer.get("return", "minimal") == "minimal":
+            return Response(204 if request.method != "POST" else 201, None, headers)
+        return Response(status, rows, headers)
+
+    # --- Query building ---
+    def check_columns(self, table: str, columns):
+        known = self.schema.tables[table].columns
+        for c in columns:
+            if c not in known:
+                raise ApiError(400, "PGRST204", f"Could not find the '{c}' column of '{table}' in the schema cache")
+
+    def where_clause(self, table: str, query: list[tuple[str, str]]) -> tuple[str, list]:
+        clauses = []
+        args = []
+        for column, expression in query:
+            if column in RESERVED_PARAMS:
+                continue
+            if column in ("or", "and") or "." in column:
+                raise ApiError(400, "PGRST100", f"Unsupported filter in offline harness: {column}")
+            self.check_columns(table, [column])
+            clause, values = self.filter_sql(table, column, expression)
+            clauses.append(clause)
+            args.extend(values)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def filter_sql(self, table: str, column: str, expression: str) -> tuple[str, list]:
+        negate = expression.startswith("not.")
+        if negate:
+            expression = expression[4:]
+        op, _, value = expression.partition(".")
+        quoted = f'"{column}"'
+
+        if op in COMPARISONS:
+            clause, values = f"{quoted} {COMPARISONS[op]} ?", [self.coerce(table, column, value)]
+        elif op == "is":
+            mapping = {"null": "IS NULL", "true": "= 1", "false": "= 0", "unknown": "IS NULL"}
+            if value.lower() not in mapping:
+                raise ApiError(400, "PGRST100", f"Invalid is. value: {value}")
+            clause, values = f"{quoted} {mapping[value.lower()]}", []
+        elif op == "in":
+            items = parse_in_list(value)
+            if not items:
+                clause, values = "0", []
+            else:
+                clause = f"{quoted} IN ({', '.join('?' for _ in items)})"
+                values = [self.coerce(table, column, v) for v in items]
+        elif op in ("like", "ilike"):
+            pattern = value.replace("*", "%")
+            if op == "like":
+                clause, values = f"{quoted} GLOB ?", [pattern.replace("%", "*").replace("_", "?")]
+            else:
+                clause, values = f"{quoted} LIKE ?", [pattern]
+        else:
+            raise ApiError(400, "PGRST100", f"Unsupported operator in offline harness: {op}")
+
+        return (f"NOT ({clause})" if negate else clause), values
+
+    def order_clause(self, table: str, order: str | None) -> str:
+        if not order:
+            return ""
+        terms = []
+        for part in order.split(","):
+            pieces = part.strip().split(".")
+            column = pieces[0]
+            self.check_columns(table, [column])
+            direction = "DESC" if "desc" in pieces[1:] else "ASC"
+            nulls = "NULLS FIRST" if ("nullsfirst" in pieces[1:] or (direction == "DESC" and "nullslast" not in pieces[1:])) else "NULLS LAST"
+            terms.append(f'"{column}" {direction} {nulls}')
+        return " ORDER BY " + ", ".join(terms)
+
+    # --- Embedding / projection ---
+    def project(self, table: str, rows: list[dict], nodes: list[SelectNode]) -> list[dict]:
+        embedded = {}
+        for node in nodes:
+            if node.children is None:
+                continue
+            relation = self.schema.relation(table, node.target)
+            if relation is None:
+                raise ApiError(400, "PGRST200", f"Could not find a relationship between '{table}' and '{node.target}' in the schema cache")
+            child, parent_column, child_column, cardinality = relation
+            keys = list({r.get(parent_column) for r in rows if r.get(parent_column) is not None})
+
+            raw_children = []
+            for i in range(0, len(keys), IN_CHUNK):
+                chunk = keys[i:i + IN_CHUNK]
+                sql = f'SELECT * FROM "{child}" WHERE "{child_column}" IN ({", ".join("?" for _ in chunk)})'
+                raw_children.extend(self.decode(child, dict(r)) for r in self.db.execute(sql, chunk))
+            projected = self.project(child, raw_children, node.children)
+
+            grouped = {}
+            for raw, out in zip(raw_children, projected):
+                grouped.setdefault(raw[child_column], []).append(out)
+            embedded[node.key] = (parent_column, cardinality, grouped)
+
+        result = []
+        columns = list(self.schema.tables[table].columns)
+        for row in rows:
+            out = {}
+            for node in nodes:
+                if node.children is not None:
+                    parent_column, cardinality, grouped = embedded[node.key]
+                    matches = grouped.get(row.get(parent_column), [])
+                    out[node.key] = matches if cardinality == "many" else (matches[0] if matches else None)
+                elif node.target == "*":
+                    out.update({c: row.get(c) for c in columns})
+                else:
+                    if node.target not in row:
+                        raise ApiError(400, "42703", f"column {table}.{node.target} does not exist")
+                    out[node.key] = row[node.target]
+            result.append(out)
+        return result
+
+    # --- Value conversion ---
+    def coerce(self, table: str, column: str, value: str):
+        kind = self.schema.tables[table].columns[column].kind
+        if kind == "boolean":
+            return 1 if value.lower() in ("true", "t", "1") else 0
+        if kind == "integer":
+            try:
+                return int(value)
+            except ValueError:
+                return value
+        if kind == "real":
+            try:
+                return float(value)
+            except ValueError:
+                return value
+        return value
+
+    def encode(self, table: str, column: str, value):
+        if value is None:
+            return None
+        kind = self.schema.tables[table].columns[column].kind
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if kind == "integer" and isinstance(value, str) and re.fullmatch(r"-?\d+", value):
+            return int(value)
+        return value
+
+    def decode(self, table: str, row: dict) -> dict:
+        columns = self.schema.tables[table].columns
+        for key, value in row.items():
+            if value is None or key not in columns:
+                continue
+            kind = columns[key].kind
+            if kind == "boolean":
+                row[key] = bool(value)
+            elif kind == "json" and isinstance(value, str):
+                row[key] = json.loads(value)
+        return row
+
+
+# --- Parsing helpers ---
+def parse_select(text: str) -> list[SelectNode]:
+    nodes = []
+    for item in split_top_level(text.strip()):
+        item = item.strip()
+        if not item:
+            continue
+        m = re.match(r"^(?:(\w+):)?([\w*]+)(?:![\w]+)?(?:\((.*)\))?(?:::\w+)?$", item, re.S)
+        if not m:
+            raise ApiError(400, "PGRST100", f"Unsupported select item in offline harness: {item}")
+        alias, target, inner = m.groups()
+        children = parse_select(inner) if inner is not None else None
+        nodes.append(SelectNode(alias or target, target, children))
+    return nodes
+
+
+def parse_in_list(value: str) -> list[str]:
+    inner = value.strip()
+    if inner.startswith("(") and inner.endswith(")"):
+        inner = inner[1:-1]
+    if not inner:
+        return []
+    return next(csv.reader([inner], quotechar='"', skipinitialspace=True))
+
+
+def parse_prefer(header: str | None) -> dict:
+    prefer = {}
+    for part in (header or "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            prefer[key] = value
+    return prefer
+
+
+def check_single_touch(rows: list[dict], conflict: tuple[str, ...]):
+    seen = set()
+    for row in rows:
+        key = tuple(row.get(c) for c in conflict)
+        if key in seen:
+            raise ApiError(500, "21000", "ON CONFLICT DO UPDATE command cannot affect row a second time")
+        seen.add(key)
+
+
+def integrity_error(e: sqlite3.IntegrityError) -> ApiError:
+    message = str(e)
+    if "UNIQUE" in message:
+        return ApiError(409, "23505", f"duplicate key value violates unique constraint ({message})")
+    if "NOT NULL" in message:
+        return ApiError(400, "23502", f"null value violates not-null constraint ({message})")
+    return ApiError(400, "23000", message)
@@ -0,0 +1,306 @@
+"""
+Build a SQLite database from the Postgres DDL in src/db/*.sql.
+
+Only the subset of Postgres the repo's migrations use is understood:
+CREATE TABLE (column types, PRIMARY KEY, UNIQUE, REFERENCES, DEFAULT,
+GENERATED ... STORED), ALTER TABLE ADD COLUMN / ADD CONSTRAINT FOREIGN KEY,
+CREATE UNIQUE INDEX and plain INSERT ... VALUES seed data. Functions,
+triggers, views, RLS and ordinary indexes are skipped; the harness
+provides Python equivalents for the functions it needs (see postgrest.py).
+"""
+import glob
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+INTEGER_TYPES = ("SERIAL", "BIGSERIAL", "SMALLSERIAL", "INT", "INTEGER", "BIGINT", "SMALLINT")
+REAL_TYPES = ("NUMERIC", "DECIMAL", "REAL", "DOUBLE", "FLOAT")
+JSON_TYPES = ("JSON", "JSONB")
+
+CONSTRAINT_KEYWORDS = ("CONSTRAINT", "UNIQUE", "PRIMARY", "FOREIGN", "CHECK", "EXCLUDE")
+DEFAULT_STOP = r"\s+(?:NOT\s+NULL|NULL|CHECK|REFERENCES|PRIMARY\s+KEY|UNIQUE|GENERATED|CONSTRAINT)\b"
+
+
+class Column:
+    def __init__(self, name: str, pg_type: str):
+        self.name = name
+        self.pg_type = pg_type.upper()
+        self.primary_key = False
+        self.not_null = False
+        self.default = None
+        self.generated = None
+
+    @property
+    def kind(self) -> str:
+        base = re.split(r"[\s(]", self.pg_type)[0]
+        if base in ("BOOL", "BOOLEAN"):
+            return "boolean"
+        if base in INTEGER_TYPES:
+            return "integer"
+        if base in REAL_TYPES:
+            return "real"
+        if base in JSON_TYPES:
+            return "json"
+        return "text"
+
+    @property
+    def serial(self) -> bool:
+        return self.pg_type.split()[0].endswith("SERIAL")
+
+
+class Table:
+    def __init__(self, name: str):
+        self.name = name
+        self.columns: dict[str, Column] = {}
+        self.uniques: list[tuple[str, ...]] = []
+        self.primary_key: tuple[str, ...] = ()
+
+    def conflict_targets(self) -> list[tuple[str, ...]]:
+        targets = ([self.primary_key] if self.primary_key else []) + self.uniques
+        return list(dict.fromkeys(targets))
+
+
+class Schema:
+    def __init__(self):
+        self.tables: dict[str, Table] = {}
+        self.foreign_keys: list[tuple[str, str, str, str]] = []  # (table, column, ref_table, ref_column)
+        self.seeds: list[str] = []
+
+    # --- Loading ---
+    @classmethod
+    def from_directory(cls, sql_dir: str) -> "Schema":
+        schema = cls()
+        for path in sorted(glob.glob(os.path.join(sql_dir, "*.sql"))):
+            with open(path, encoding="utf-8") as f:
+                for statement in split_statements(strip_comments(f.read())):
+                    schema.apply(statement)
+        return schema
+
+    def apply(self, statement: str):
+        text = re.sub(r"\bpublic\.", "", statement.strip())
+        upper = text.upper()
+
+        if re.match(r"CREATE\s+TABLE", upper):
+            self._create_table(text)
+        elif re.match(r"ALTER\s+TABLE", upper):
+            self._alter_table(text)
+        elif re.match(r"CREATE\s+UNIQUE\s+INDEX", upper):
+            m = re.match(r"CREATE\s+UNIQUE\s+INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+ON\s+(\w+)\s*\(([^)]*)\)", text, re.I)
+            if m and m.group(1) in self.tables:
+                self.tables[m.group(1)].uniques.append(column_list(m.group(2)))
+        elif re.match(r"INSERT\s+INTO", upper):
+            self.seeds.append(text)
+
+    def _create_table(self, text: str):
+        m = re.match(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*)\)\s*$", text, re.I | re.S)
+        if not m:
+            return
+        table = Table(m.group(1))
+        for item in split_top_level(m.group(2)):
+            self._table_item(table, item.strip())
+        self.tables[table.name] = table
+
+    def _table_item(self, table: Table, item: str):
+        if not item:
+            return
+        first = item.split()[0].upper()
+        if first not in CONSTRAINT_KEYWORDS:
+            self._column(table, item)
+            return
+
+        item = re.sub(r"^CONSTRAINT\s+\w+\s+", "", item, flags=re.I)
+        if m := re.match(r"UNIQUE\s*\(([^)]*)\)", item, re.I):
+            table.uniques.append(column_list(m.group(1)))
+        elif m := re.match(r"PRIMARY\s+KEY\s*\(([^)]*)\)", item, re.I):
+            table.primary_key = column_list(m.group(1))
+        elif m := re.match(r"FOREIGN\s+KEY\s*\((\w+)\)\s*REFERENCES\s+(\w+)\s*\((\w+)\)", item, re.I):
+            self.foreign_keys.append((table.name, m.group(1), m.group(2), m.group(3)))
+
+    def _column(self, table: Table, definition: str):
+        m = re.match(r"(\w+)\s+(.*)$", definition, re.S)
+        name, rest = m.group(1), m.group(2)
+        type_match = re.match(
+            r"((?:TIMESTAMP|TIME)(?:\s*\(\d+\))?(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?|DOUBLE\s+PRECISION|\w+(?:\s*\([^)]*\))?(?:\[\])?)",
+            rest, re.I,
+        )
+        column = Column(name, type_match.group(1))
+        rest = rest[type_match.end():]
+
+        if m := re.search(r"GENERATED\s+ALWAYS\s+AS\s*\((.*)\)\s*STORED", rest, re.I | re.S):
+            column.generated = " ".join(m.group(1).split())
+        if re.search(r"PRIMARY\s+KEY", rest, re.I):
+            column.primary_key = True
+            table.primary_key = (name,)
+        if re.search(r"NOT\s+NULL", rest, re.I):
+            column.not_null = True
+        if re.search(r"\bUNIQUE\b", rest, re.I):
+            table.uniques.append((name,))
+        if m := re.search(r"DEFAULT\s+(.+?)(?=" + DEFAULT_STOP + r"|$)", rest, re.I | re.S):
+            column.default = m.group(1).strip()
+        if m := re.search(r"REFERENCES\s+(\w+)\s*\((\w+)\)", rest, re.I):
+            self.foreign_keys.append((table.name, name, m.group(1), m.group(2)))
+
+        table.columns[name] = column
+
+    def _alter_table(self, text: str):
+        m = re.match(r"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(\w+)\s+(.*)$", text, re.I | re.S)
+        if not m or m.group(1) not in self.tables:
+            return
+        table = self.tables[m.group(1)]
+        for action in split_top_level(m.group(2)):
+            action = action.strip()
+            if am := re.match(r"ADD\s+COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?(.*)$", action, re.I | re.S):
+                self._column(table, am.group(1))
+            elif re.match(r"ADD\s+CONSTRAINT", action, re.I):
+                self._table_item(table, action[len("ADD "):].strip())
+
+    # --- Relationships ---
+    def relation(self, parent: str, target: str) -> tuple[str, str, str, str] | None:
+        """
+        Resolve an embed of `target` from `parent` the way PostgREST does:
+        `target` is either a table name or a foreign key column of `parent`.
+        Returns (child_table, parent_column, child_column, cardinality) where
+        cardinality is "one" (many-to-one) or "many" (one-to-many).
+        """
+        for table, column, ref_table, ref_column in self.foreign_keys:
+            if table == parent and (ref_table == target or column == target):
+                return ref_table, column, ref_column, "one"
+        for table, column, ref_table, ref_column in self.foreign_keys:
+            if ref_table == parent and table == target:
+                return table, ref_column, column, "many"
+        return None
+
+    # --- SQLite ---
+    def create_database(self) -> sqlite3.Connection:
+        db = sqlite3.connect(":memory:", check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.create_function("now", 0, lambda: datetime.now(timezone.utc).isoformat())
+        for table in self.tables.values():
+            db.execute(sqlite_ddl(table))
+        for seed in self.seeds:
+            try:
+                db.execute(seed)
+            except sqlite3.Error as e:
+                print(f"[offline] Skipped seed statement ({e}): {seed[:80]}...")
+        db.commit()
+        return db
+
+
+# --- DDL translation ---
+def sqlite_ddl(table: Table) -> str:
+    single_pk = len(table.primary_key) == 1
+    lines = []
+    for column in table.columns.values():
+        kind = column.kind
+        sql_type = {"integer": "INTEGER", "real": "REAL", "boolean": "INTEGER"}.get(kind, "TEXT")
+        parts = [f'"{column.name}"', sql_type]
+
+        if column.primary_key and single_pk:
+            parts.append("PRIMARY KEY")
+            if column.serial:
+                parts.append("AUTOINCREMENT")
+        if column.generated:
+            parts.append(f"GENERATED ALWAYS AS ({column.generated}) STORED")
+        elif column.default is not None:
+            default = sqlite_default(column.default)
+            if default is not None:
+                parts.append(f"DEFAULT {default}")
+        if column.not_null and not column.serial and not column.primary_key:
+            parts.append("NOT NULL")
+        lines.append(" ".join(parts))
+
+    if table.primary_key and not single_pk:
+        lines.append(f"PRIMARY KEY ({', '.join(table.primary_key)})")
+    for unique in dict.fromkeys(table.uniques):
+        lines.append(f"UNIQUE ({', '.join(unique)})")
+    return f'CREATE TABLE "{table.name}" (\n  ' + ",\n  ".join(lines) + "\n)"
+
+
+def sqlite_default(expression: str) -> str | None:
+    expr = expression.strip()
+    upper = expr.upper()
+    if upper in ("NOW()", "CURRENT_TIMESTAMP", "TIMEZONE('UTC'::TEXT, NOW())"):
+        return "CURRENT_TIMESTAMP"
+    if upper == "CURRENT_DATE":
+        return "CURRENT_DATE"
+    if upper in ("GEN_RANDOM_UUID()", "UUID_GENERATE_V4()"):
+        return "(lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || substr(hex(randomblob(2)), 2) || '-a' || substr(hex(randomblob(2)), 2) || '-' || hex(randomblob(6))))"
+    if upper in ("TRUE", "FALSE"):
+        return "1" if upper == "TRUE" else "0"
+    if re.fullmatch(r"-?\d+(\.\d+)?", expr) or re.fullmatch(r"'(?:[^']|'')*'", expr):
+        return expr
+    if m := re.fullmatch(r"('(?:[^']|'')*')::\w+", expr):
+        return m.group(1)
+    return None
+
+
+# --- SQL text helpers ---
+def strip_comments(sql: str) -> str:
+    out = []
+    in_string = False
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if ch == "'":
+            in_string = not in_string
+        if not in_string and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split on semicolons outside string literals and $$ bodies."""
+    statements = []
+    current = []
+    in_string = False
+    in_dollar = False
+    i = 0
+    while i < len(sql):
+        if not in_string and sql.startswith("$$", i):
+            in_dollar = not in_dollar
+            current.append("$$")
+            i += 2
+            continue
+        ch = sql[i]
+        if ch == "'" and not in_dollar:
+            in_string = not in_string
+        if ch == ";" and not in_string and not in_dollar:
+            statements.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    if "".join(current).strip():
+        statements.append("".join(current))
+    return [s for s in statements if s.strip()]
+
+
+def split_top_level(text: str, sep: str = ",") -> list[str]:
+    """Split on `sep` outside parentheses and string literals."""
+    parts = []
+    depth = 0
+    in_string = False
+    current = []
+    for ch in text:
+        if ch == "'":
+            in_string = not in_string
+        elif not in_string and ch == "(":
+            depth += 1
+        elif not in_string and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not in_string:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def column_list(text: str) -> tuple[str, ...]:
+    return tuple(c.strip().split()[0] for c in text.split(",") if c.strip())
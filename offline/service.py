@@ -0,0 +1,157 @@
+"""
+Base class for the fake HTTP services: a threaded stdlib server on an
+ephemeral localhost port with injectable latency and a per-route call log.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+# Captured at import so a harness that patches time.sleep does not also
+# shorten the latency injected by the fake services.
+_real_sleep = time.sleep
+
+
+class Clock:
+    """
+    Monotonic clock shared by the harness and the fake services. The harness
+    routes time.sleep here, so a handler that waits out a rate limit advances
+    the services' notion of time instead of stalling the run.
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.monotonic() + self.offset
+
+    def sleep(self, seconds: float):
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.offset += max(0.0, seconds)
+
+    @property
+    def slept(self) -> float:
+        return sum(s for s in self.sleeps if s > 0)
+
+
+class Request:
+    def __init__(self, method: str, path: str, query: list[tuple[str, str]], headers, body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    @property
+    def params(self) -> dict:
+        return dict(self.query)
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class Response:
+    def __init__(self, status: int = 200, body=None, headers: dict | None = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class FakeService:
+    """
+    Subclasses implement `handle(request) -> Response` and `route(request)`,
+    which names the request for the call counters (e.g. "GET company").
+    """
+
+    name = "service"
+
+    def __init__(self, latency: float = 0.0, clock: Clock | None = None):
+        self.latency = latency
+        self.clock = clock or Clock()
+        self.calls = Counter()
+        self.log = []
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    # --- Lifecycle ---
+    def start(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                parts = urlsplit(self.path)
+                request = Request(self.command, parts.path, parse_qsl(parts.query, keep_blank_values=True), self.headers, body)
+                response = service.serve(request)
+
+                payload = b""
+                if response.body is not None:
+                    payload = response.body if isinstance(response.body, bytes) else json.dumps(response.body).encode()
+                self.send_response(response.status)
+                if payload:
+                    self.send_header("Content-Type", "application/json")
+                for key, value in response.headers.items():
+                    self.send_header(key, str(value))
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = do_HEAD = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    # --- Request handling ---
+    def serve(self, request: Request) -> Response:
+        if self.latency:
+            _real_sleep(self.latency)
+        route = self.route(request)
+        try:
+            response = self.handle(request)
+        except Exception as e:
+            response = Response(500, {"message": f"{type(e).__name__}: {e}"})
+        with self.lock:
+            self.calls[route] += 1
+            self.log.append((request.method, request.path, response.status))
+        return response
+
+    def route(self, request: Request) -> str:
+        return f"{request.method} {request.path}"
+
+    def handle(self, request: Request) -> Response:
+        raise NotImplementedError
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
+            self.log.clear()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
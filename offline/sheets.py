@@ -0,0 +1,105 @@
+"""
+In-memory Google Sheets for the gSheets report crons: just enough of the
+gspread client surface they use (open/create, worksheet/add_worksheet,
+clear/update/format/freeze/update_title).
+"""
+import itertools
+from collections import Counter
+
+import gspread  # type: ignore
+
+
+class FakeWorksheet:
+    def __init__(self, book: "FakeSpreadsheet", title: str, sheet_id: int):
+        self.book = book
+        self.title = title
+        self.rows = []
+        self._properties = {"sheetId": sheet_id, "title": title}
+
+    def clear(self):
+        self.book.client.calls["clear"] += 1
+        self.rows = []
+
+    def update(self, *args, **kwargs):
+        self.book.client.calls["update"] += 1
+        values = kwargs.get("values")
+        if values is None:
+            values = next((a for a in args if isinstance(a, list)), [])
+        self.rows = [list(r) for r in values]
+
+    def format(self, *args, **kwargs):
+        self.book.client.calls["format"] += 1
+
+    def freeze(self, *args, **kwargs):
+        self.book.client.calls["freeze"] += 1
+
+    def update_title(self, title: str):
+        self.title = self._properties["title"] = title
+
+    def get_all_values(self) -> list[list]:
+        return self.rows
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: "FakeSheets", title: str):
+        self.client = client
+        self.title = title
+        self.worksheets = []
+        self.sheet1 = self.add_worksheet("Sheet1")
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        for ws in self.worksheets:
+            if ws.title == title:
+                return ws
+        raise gspread.WorksheetNotFound(title)
+
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 26, **kwargs) -> FakeWorksheet:
+        ws = FakeWorksheet(self, title, next(self.client.ids))
+        self.worksheets.append(ws)
+        return ws
+
+
+class FakeSheets:
+    """
+    Stand-in for an authorized gspread client. Spreadsheets are created on
+    first open, with any tab the handler asks for.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.calls = Counter()
+        self.ids = itertools.count(1)
+
+    def open(self, title: str) -> FakeSpreadsheet:
+        self.calls["open"] += 1
+        if title not in self.books:
+            self.books[title] = _AutoSpreadsheet(self, title)
+        return self.books[title]
+
+    def create(self, title: str) -> FakeSpreadsheet:
+        self.calls["create"] += 1
+        self.books[title] = FakeSpreadsheet(self, title)
+        return self.books[title]
+
+    def authorize(self, *args, **kwargs) -> "FakeSheets":
+        return self
+
+
+class _AutoSpreadsheet(FakeSpreadsheet):
+    """A spreadsheet that already has whichever tab is requested."""
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        try:
+            return super().worksheet(title)
+        except gspread.WorksheetNotFound:
+            return self.add_worksheet(title)
+
+
+class FakeCredentials:
+    @classmethod
+    def from_json_keyfile_name(cls, *args, **kwargs):
+        return cls()
+
+    @classmethod
+    def from_json_keyfile_dict(cls, *args, **kwargs):
+        return cls()
@@ -0,0 +1,76 @@
+"""
+Fake Torn API serving a World's payloads.
+
+Handles the endpoints the repo calls:
+- GET /company/?selections=a,b&key=K
+- GET /user/?selections=a,b&key=K
+- GET /v2/user/<selection> with "Authorization: ApiKey K"
+
+Unknown keys get Torn's error payload (code 2, "Incorrect key"), and keys
+exceeding `requests_per_minute` get code 5 ("Too many requests").
+"""
+from collections import defaultdict, deque
+
+from offline.service import FakeService, Request, Response
+
+INCORRECT_KEY = {"error": {"code": 2, "error": "Incorrect key"}}
+TOO_MANY_REQUESTS = {"error": {"code": 5, "error": "Too many requests"}}
+
+
+class FakeTorn(FakeService):
+    name = "torn"
+
+    def __init__(self, world, latency: float = 0.0, clock=None, requests_per_minute: int | None = 100):
+        super().__init__(latency, clock)
+        self.world = world
+        self.requests_per_minute = requests_per_minute
+        self.recent = defaultdict(deque)  # key -> request times within the last minute
+        self.throttled = 0
+
+    def route(self, request: Request) -> str:
+        path = request.path.rstrip("/") or "/"
+        if path.startswith("/v2/"):
+            return f"GET {path}"
+        return f"GET {path}?selections={request.params.get('selections', '')}"
+
+    def handle(self, request: Request) -> Response:
+        path = request.path.rstrip("/")
+        key = request.params.get("key")
+        if path.startswith("/v2/"):
+            key = (request.headers.get("Authorization") or "").removeprefix("ApiKey ").strip() or key
+
+        if self._throttle(key):
+            return Response(200, TOO_MANY_REQUESTS)
+
+        if path.startswith("/v2/user/"):
+            return self._selections(self.world.torn_users.get(key), [path.rsplit("/", 1)[-1]])
+        if path == "/company":
+            return self._selections(self.world.torn_companies.get(key), self._requested(request))
+        if path == "/user":
+            return self._selections(self.world.torn_users.get(key), self._requested(request))
+        return Response(404, {"error": {"code": 4, "error": "Wrong type"}})
+
+    def _requested(self, request: Request) -> list[str]:
+        return [s.strip() for s in request.params.get("selections", "").split(",") if s.strip()]
+
+    def _selections(self, payloads: dict | None, selections: list[str]) -> Response:
+        if payloads is None:
+            return Response(200, INCORRECT_KEY)
+        body = {}
+        for selection in selections:
+            body.update(payloads.get(selection, {}))
+        return Response(200, body)
+
+    def _throttle(self, key: str | None) -> bool:
+        if not self.requests_per_minute or not key:
+            return False
+        now = self.clock.now()
+        with self.lock:
+            window = self.recent[key]
+            while window and now - window[0] > 60:
+                window.popleft()
+            if len(window) >= self.requests_per_minute:
+                self.throttled += 1
+                return True
+            window.append(now)
+        return False
@@ -0,0 +1,218 @@
+"""
+Synthetic Torn world: directors, their companies, employees, stock, news,
+education and stock blocks, plus the Discord guild members that go with
+them. One World drives every fake service so their data agrees.
+"""
+import random
+from datetime import datetime, timezone
+
+COMPANY_TYPES = {7: "Game Shop", 8: "Candle Shop", 10: "Adult Novelty Store", 23: "Music Store"}
+ITEMS = ["Rubber Ducky", "Teddy Bear", "Soft Toy", "Lava Lamp", "Candle", "Guitar", "Drum Kit", "Vinyl", "Console", "Poster"]
+POSITIONS = ["Manager", "Sales Assistant", "Trainer", "Marketer", "Store Clerk", "Cleaner"]
+COURSES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 22, 28, 88, 100]
+STOCKS = [3, 8, 11, 13, 23, 25]
+
+DIRECTOR_ID_BASE = 1_000_000
+COMPANY_ID_BASE = 50_000
+EMPLOYEE_ID_BASE = 2_000_000
+GUILD_ID = "1419520053971517633"
+APPLICATION_ID = "1400000000000000000"
+WEBHOOK_BASE = "https://discord.com/api/webhooks"
+
+
+class World:
+    def __init__(self):
+        self.directors: list[dict] = []           # `directors` rows
+        self.companies: list[dict] = []           # `company` rows
+        self.channels: list[dict] = []            # `discord_company_channels` rows
+        self.api_keys: dict[str, str] = {}        # key_ref -> Torn API key (torn_director_api_keys/<key_ref>)
+        self.torn_companies: dict[str, dict] = {}  # API key -> company payloads by selection
+        self.torn_users: dict[str, dict] = {}      # API key -> user payloads by selection
+        self.members: list[dict] = []             # Discord guild members
+        self.secrets: dict[str, dict] = {}        # extra Secrets Manager entries
+
+    @property
+    def employee_count(self) -> int:
+        return sum(len(c["employees"]["company_employees"]) for c in self.torn_companies.values())
+
+    def seed(self, postgrest):
+        """Insert the world's rows into the PostgREST stand-in."""
+        postgrest.insert("company", self.companies)
+        postgrest.insert("directors", self.directors)
+        postgrest.insert("discord_company_channels", self.channels)
+
+
+def generate_world(
+    directors: int = 10,
+    employees: tuple[int, int] = (10, 100),
+    prospective: int = 0,
+    seed: int = 0,
+) -> World:
+    """
+    Build a world with `directors` active directors (plus `prospective`
+    prospective ones), each running one company with a random number of
+    employees in the `employees` range.
+    """
+    rng = random.Random(seed)
+    world = World()
+    now = datetime.now(timezone.utc)
+    employee_id = EMPLOYEE_ID_BASE
+
+    world.channels.append({
+        "company_id": 0,
+        "channel_name": "thlc-bot",
+        "discord_channel_id": 900_000,
+        "discord_webhook_url": f"{WEBHOOK_BASE}/900000/thlc-bot",
+    })
+
+    for i in range(directors + prospective):
+        director_id = DIRECTOR_ID_BASE + i
+        company_id = COMPANY_ID_BASE + i
+        name = f"Director{i}"
+        key_ref = f"{name}_{director_id}"
+        api_key = f"KEY{director_id:012d}"
+        company_type = rng.choice(list(COMPANY_TYPES))
+        rating = rng.randint(1, 10)
+        is_prospective = i >= directors
+
+        world.api_keys[key_ref] = api_key
+        world.directors.append({
+            "torn_user_id": director_id,
+            "director_name": name,
+            "company_id": company_id,
+            "api_key": key_ref,
+            "prospective": is_prospective,
+            "updated_at": now.isoformat(),
+        })
+
+        # --- Employees ---
+        staff = {}
+        profile_staff = {str(director_id): {"name": name, "position": "Director", "days_in_company": 400}}
+        for _ in range(rng.randint(*employees)):
+            employee_id += 1
+            addiction = -rng.randint(0, 12)
+            effectiveness = {
+                "working_stats": rng.randint(20, 100),
+                "settled_in": rng.randint(0, 10),
+                "merits": rng.randint(0, 10),
+                "director_education": rng.randint(0, 10),
+                "management": rng.randint(0, 10),
+                "addiction": addiction,
+                "inactivity": -rng.randint(1, 5) if rng.random() < 0.05 else 0,
+            }
+            effectiveness["total"] = sum(effectiveness.values())
+            staff[str(employee_id)] = {
+                "name": f"Employee{employee_id}",
+                "position": rng.choice(POSITIONS),
+                "days_in_company": rng.randint(1, 900),
+                "wage": rng.randint(0, 50) * 1000,
+                "manual_labor": rng.randint(1_000, 100_000),
+                "intelligence": rng.randint(1_000, 100_000),
+                "endurance": rng.randint(1_000, 100_000),
+                "effectiveness": effectiveness,
+            }
+            profile_staff[str(employee_id)] = {
+                "name": staff[str(employee_id)]["name"],
+                "position": staff[str(employee_id)]["position"],
+                "days_in_company": staff[str(employee_id)]["days_in_company"],
+            }
+
+            # Most employees are in the guild with a "Name [id]" nickname
+            if rng.random() < 0.9:
+                world.members.append({
+                    "user": {"id": str(10**17 + employee_id), "username": f"user{employee_id}"},
+                    "nick": f"Employee{employee_id} [{employee_id}]",
+                    "roles": [],
+                })
+
+        # --- Company payloads (one per Torn selection) ---
+        stock = {}
+        for item in rng.sample(ITEMS, rng.randint(3, 6)):
+            cost = rng.randint(5, 500)
+            sold = rng.randint(0, 2_000)
+            price = int(cost * rng.uniform(1.2, 2.5))
+            stock[item] = {
+                "cost": cost,
+                "rrp": int(price * 1.1),
+                "price": price,
+                "in_stock": rng.randint(0, 20_000),
+                "on_order": rng.randint(0, 5_000),
+                "created_amount": 0,
+                "sold_amount": sold,
+                "sold_worth": sold * price,
+            }
+        revenue = sum(s["sold_worth"] for s in stock.values())
+        storage = rng.choice([25_000, 50_000, 100_000, 150_000])
+
+        world.torn_companies[api_key] = {
+            "profile": {"company": {
+                "ID": company_id,
+                "company_type": company_type,
+                "rating": rating,
+                "name": f"{COMPANY_TYPES[company_type]} {i}",
+                "director": director_id,
+                "employees_hired": len(staff),
+                "employees_capacity": max(len(staff), 10) + 5,
+                "daily_income": revenue,
+                "daily_customers": rng.randint(100, 10_000),
+                "weekly_income": revenue * 7,
+                "days_old": rng.randint(30, 3_000),
+                "employees": profile_staff,
+            }},
+            "detailed": {"company_detailed": {
+                "ID": company_id,
+                "company_funds": rng.randint(0, 100_000_000),
+                "popularity": rng.randint(0, 100),
+                "efficiency": rng.randint(0, 100),
+                "environment": rng.randint(0, 100),
+                "trains_available": rng.randint(0, 50),
+                "advertising_budget": rng.randint(0, 500) * 1000,
+                "value": rng.randint(1, 500) * 1_000_000,
+                "upgrades": {"company_size": 10, "staffroom_size": "Small", "storage_size": "Large", "storage_space": storage},
+            }},
+            "employees": {"company_employees": staff},
+            "stock": {"company_stock": stock},
+            "news": {"news": {
+                str(rng.randint(10**8, 10**9)): {
+                    "news": f"The company has reported a gross income of ${revenue:,} for the day.",
+                    "timestamp": int(now.timestamp()),
+                },
+            }},
+        }
+
+        world.torn_users[api_key] = {
+            "torn_user_id": director_id,
+            "stocks": {"stocks": {
+                str(sid): {
+                    "stock_id": sid,
+                    "total_shares": rng.randint(0, 5_000_000),
+                    "benefit": {"ready": rng.randint(0, 1), "progress": rng.randint(0, 7), "frequency": 7},
+                }
+                for sid in rng.sample(STOCKS, rng.randint(0, len(STOCKS)))
+            }},
+            "education": {"education": {
+                "complete": sorted(rng.sample(COURSES, rng.randint(0, len(COURSES)))),
+                "current": None,
+            }},
+        }
+
+        world.companies.append({
+            "company_id": company_id,
+            "torn_user_id": director_id,
+            "company_name": f"{COMPANY_TYPES[company_type]} {i}",
+            "company_acronym": f"C{i}",
+            "company_type": company_type,
+            "rating": rating,
+            "employees_hired": len(staff),
+            "storage_space": storage,
+            "days_old": world.torn_companies[api_key]["profile"]["company"]["days_old"],
+            "discord_channel_id": 800_000 + i,
+        })
+        world.channels.append({
+            "company_id": company_id,
+            "channel_name": f"c{i}-reports",
+            "discord_channel_id": 800_000 + i,
+            "discord_webhook_url": f"{WEBHOOK_BASE}/{800_000 + i}/c{i}-reports",
+        })
+
+    return world
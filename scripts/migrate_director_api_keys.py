@@ -0,0 +1,30 @@
+"""
+One-off migration: copy every entry of the legacy torn_director_api_keys
+JSON secret into its own torn_director_api_keys/<key_ref> secret.
+
+    python scripts/migrate_director_api_keys.py [--dry-run]
+
+Safe to re-run: existing per-director secrets are overwritten with the
+same value. The legacy secret is left in place; delete it once the crons
+have run cleanly without falling back to it.
+"""
+import os
+import sys
+import json
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "layers", "shared", "python"))
+
+from utils.keystore import LEGACY_SECRET, REGION, put_api_key, secret_id  # noqa: E402
+
+DRY_RUN = "--dry-run" in sys.argv
+
+client = boto3.client("secretsmanager", region_name=REGION)
+legacy = json.loads(client.get_secret_value(SecretId=LEGACY_SECRET)["SecretString"])
+
+for key_ref, api_key in legacy.items():
+    print(f"{'Would copy' if DRY_RUN else 'Copying'} {key_ref} -> {secret_id(key_ref)}")
+    if not DRY_RUN:
+        put_api_key(key_ref, api_key)
+
+print(f"{len(legacy)} key(s) {'to migrate' if DRY_RUN else 'migrated'}")
@@ -81,7 +81,8 @@ COMMANDS = [
                         "name": "acronym",
                         "description": "Company acronym",
                         "type": 3,   # string
-                        "required": True
+                        "required": True,
+                        "autocomplete": True,
                     },
                     {
                         "name": "amount",
@@ -113,7 +114,8 @@ COMMANDS = [
                         "name": "acronym",
                         "description": "Company acronym",
                         "type": 3,   # string
-                        "required": True
+                        "required": True,
+                        "autocomplete": True,
                     },
                     {
                         "name": "amount",
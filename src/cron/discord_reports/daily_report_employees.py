@@ -1,11 +1,20 @@
 import json
 import boto3
-import requests
 from supabase import create_client, Client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from utils.discord import send_webhook_message  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
+SEND_WORKERS = 8
 
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -25,19 +34,14 @@ def get_secrets():
 SECRETS = get_secrets()
 
 def send_discord_message(webhook_url: str, message: str):
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        resp = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Message sent: {resp.status_code}")
-    except Exception as e:
-        print(f"Error sending message: {e}")
+    parts = send_webhook_message(webhook_url, message)
+    log.info(f"Message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
 def shorten(text: str, max_len: int = 9) -> str:
     """Trim text to max_len with ellipsis if needed."""
     return text if len(text) <= max_len else text[:max_len - 1] + "…"
 
+@span("build_report")
 def build_employee_table(employees: list[dict]) -> str:
 
     # Timestamp
@@ -53,7 +57,8 @@ def build_employee_table(employees: list[dict]) -> str:
     header = f"{'Name (Position)':<27}{'Efficiency':<12}{'Addiction':<7}"
     lines = [header, "-" * len(header)]
 
-    inactive_list = []
+    # Find inactive employees (inactivity < 0) in the same pass as the table
+    inactive_employees = []
 
     for emp in employees_sorted:
         eff = emp.get('effectiveness_total', 0)
@@ -77,12 +82,8 @@ def build_employee_table(employees: list[dict]) -> str:
         else:
             addict_icon = "✅"
 
-        # Find inactive employees (inactivity < 0)
-        inactive_employees = [
-            (emp["employee_name"], emp.get("inactivity", 0))
-            for emp in employees_sorted
-            if emp.get("inactivity", 0) < 0
-        ]
+        if (inactivity or 0) < 0:
+            inactive_employees.append((name, inactivity))
 
         lines.append(
             f"{name} ({pos})".ljust(27) +
@@ -112,6 +113,19 @@ def build_employee_table(employees: list[dict]) -> str:
 
     return table
 
+@span("fetch")
+def fetch_employees_by_company(supabase: Client, company_ids: list) -> dict[int, list[dict]]:
+    """Fetch employees for all `company_ids` in one (paged) query, grouped by company_id."""
+    grouped = defaultdict(list)
+    for emp in stream_rows(
+        supabase, "employees",
+        "id, company_id, employee_name, position, effectiveness_total, addiction, allowable_addiction, inactivity",
+        where=lambda q: q.in_("company_id", company_ids),
+    ):
+        grouped[emp["company_id"]].append(emp)
+    return grouped
+
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
@@ -119,34 +133,44 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
+    linked = []
     for ch in channels:
-        company_id = ch.get("company_id")
-        discord_webhook_url = ch.get("discord_webhook_url")
-        if not discord_webhook_url:
-            print(f"No webhook for company {company_id}, skipping")
+        if not ch.get("discord_webhook_url"):
+            log.info(f"No webhook for company {ch.get('company_id')}, skipping")
             continue
+        linked.append(ch)
 
-        # Get all employees for this company
-        try:
-            employees = supabase.table("employees").select(
-                "employee_name, position, effectiveness_total, addiction, allowable_addiction","inactivity"
-            ).eq("company_id", company_id).execute().data
-        except Exception as e:
-            print(f"Error fetching employees for company {company_id}: {e}")
-            continue
+    company_ids = sorted({ch["company_id"] for ch in linked})
+    if not company_ids:
+        log.info("No linked companies, nothing to report.")
+        return
 
+    # Get all employees for every linked company at once
+    try:
+        employees_by_company = fetch_employees_by_company(supabase, company_ids)
+    except Exception as e:
+        log.error(f"Error fetching employees: {e}")
+        return
+
+    messages = {}
+    for company_id in company_ids:
+        employees = employees_by_company.get(company_id)
         if not employees:
-            print(f"No employees found for company {company_id}, skipping")
+            log.info(f"No employees found for company {company_id}, skipping")
             continue
+        messages[company_id] = build_employee_table(employees)
+
+    def deliver(ch):
+        send_discord_message(ch["discord_webhook_url"], messages[ch["company_id"]])
+        log.info(f"Sent employee report for company {ch['company_id']}")
 
-        message = build_employee_table(employees)
-        send_discord_message(discord_webhook_url, message)
-        print(f"Sent employee report for company {company_id}")
+    with ThreadPoolExecutor(max_workers=SEND_WORKERS) as pool:
+        list(pool.map(deliver, [ch for ch in linked if ch["company_id"] in messages]))
 
-    print("Daily employee report job completed.")
+    log.info("Daily employee report job completed.")
 
 if __name__ == "__main__":
     lambda_handler()
@@ -1,13 +1,26 @@
 import json
 import re
 import boto3
-import requests
+import numpy as np
 from supabase import create_client, Client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from order_planner import plan_orders
+from utils.stock_cover import COVER_HORIZON  # type: ignore
+from utils.discord import send_webhook_message  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
+DEFAULT_MAX_STOCK = 100000
+SEND_WORKERS = 8
 
 
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -29,15 +42,9 @@ SECRETS = get_secrets()
 
 
 def send_discord_message(webhook_url: str, message: str):
-    """Send a message to a Discord webhook."""
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        resp = requests.post(webhook_url, json={"content": message}, timeout=10)
-        print(f"Message sent: {resp.status_code}")
-    except Exception as e:
-        print(f"Error sending message: {e}")
+    """Send a message to a Discord webhook, split into 2,000-character parts."""
+    parts = send_webhook_message(webhook_url, message)
+    log.info(f"Message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
 
 def escape_discord_markdown(text: str) -> str:
@@ -54,21 +61,32 @@ def format_generated_timestamp() -> str:
     return s
 
 
-def build_stock_report(rows: list[dict], max_stock: int) -> str:
+@span("build_report")
+def build_stock_report(rows: list[dict], max_stock: int, forecasts: dict | None = None) -> str:
     """
     Build a Discord-ready stock report table.
+    `forecasts` maps item_name -> company_stock_forecast row; when present the
+    forecast remaining days replace the single-day estimate. Rows annotated by
+    `apply_order_plan` show the capacity-aware order and target stock level;
+    otherwise the forecast's uncapped recommended order is shown.
     """
+    forecasts = forecasts or {}
+
     if not rows:
         return "📦 Stock Report: No data available for today."
 
     normalized = []
     for r in rows:
+        forecast = forecasts.get(r.get("item_name")) or {}
+        est_days = forecast.get("forecast_remaining_days") if forecast else r.get("estimated_remaining_days")
         normalized.append({
             "name": escape_discord_markdown(r.get("item_name") or ""),
             "in_stock": int(r.get("in_stock") or 0),
             "on_order": int(r.get("on_order") or 0),
             "sold_amount": int(r.get("sold_amount") or 0),
-            "est_days_remain": int(r["estimated_remaining_days"]) if r.get("estimated_remaining_days") is not None else None
+            "est_days_remain": int(est_days) if est_days is not None else None,
+            "planned_order": r.get("planned_order"),
+            "recommended_order": forecast.get("recommended_order"),
         })
 
     total_sold = sum(r["sold_amount"] for r in normalized)
@@ -79,12 +97,14 @@ def build_stock_report(rows: list[dict], max_stock: int) -> str:
 
     total_in_stock = 0
     total_on_order = 0
+    total_planned = 0
+    total_recommended = 0
 
     # Prepare table header
     table_lines = []
     table_lines.append("```")
-    table_lines.append(f"{' '} {'Item Name':<18} {'InStock':>6} {'Sold':>6} {'OnOrd':>6} {'Days':>6} {'Optimal':>8}")
-    table_lines.append("──────────────────────────────────────────────────────────")
+    table_lines.append(f"{' '} {'Item Name':<18} {'InStock':>6} {'Sold':>6} {'OnOrd':>6} {'Days':>6} {'Optimal':>8} {'Order':>6}")
+    table_lines.append("─────────────────────────────────────────────────────────────────")
 
     for r in normalized:
         name = r["name"]
@@ -94,9 +114,16 @@ def build_stock_report(rows: list[dict], max_stock: int) -> str:
         days = r["est_days_remain"]
         total_in_stock += in_stock
         total_on_order += on_order
+        total_recommended += r["recommended_order"] or 0
 
-        daily_sales_pct = (sold_amount / total_sold) if total_sold > 0 else 0
-        optimal = round(daily_sales_pct * max_stock)
+        planned_order = r["planned_order"]
+        if planned_order is not None:
+            # Target stock level once the planned order arrives
+            optimal = in_stock + on_order + planned_order
+            total_planned += planned_order
+        else:
+            daily_sales_pct = (sold_amount / total_sold) if total_sold > 0 else 0
+            optimal = round(daily_sales_pct * max_stock)
 
         # Icon logic
         icon = "✅"
@@ -108,7 +135,13 @@ def build_stock_report(rows: list[dict], max_stock: int) -> str:
             icon = "⚠️"
 
         days_display = f"{days}d" if days is not None else "-"
-        table_lines.append(f"{icon} {name:<18} {in_stock:>6} {sold_amount:>6} {on_order:>6} {days_display:>6} {optimal:>8}")
+        if planned_order is not None:
+            order_display = planned_order
+        elif r["recommended_order"] is not None:
+            order_display = r["recommended_order"]
+        else:
+            order_display = "-"
+        table_lines.append(f"{icon} {name:<18} {in_stock:>6} {sold_amount:>6} {on_order:>6} {days_display:>6} {optimal:>8} {order_display:>6}")
 
     available_to_order = max_stock - (total_in_stock + total_on_order)
     if available_to_order < 0:
@@ -116,64 +149,170 @@ def build_stock_report(rows: list[dict], max_stock: int) -> str:
 
     table_lines.append("```")
     table_lines.append(f"\n📦 There are {available_to_order} items available to order (of {max_stock:,} total capacity).")
+    if total_planned:
+        expected_profit = sum(r.get("expected_profit") or 0 for r in rows)
+        table_lines.append(f"🛒 Suggested orders total {total_planned:,} items (expected profit ${expected_profit:,.0f}).")
+    if total_planned and total_recommended > total_planned:
+        table_lines.append(f"⚠️ Forecast demand calls for {total_recommended:,} items; storage limits the plan to {total_planned:,}.")
 
     return header + "\n".join(table_lines)
 
 
+@span("plan_orders")
+def apply_order_plan(reports: list[dict]):
+    """
+    Run the order planner once for every item of every company and annotate
+    each stock row with `planned_order` and `expected_profit`.
+    Sales rates come from the forecast when available, else today's sales.
+    """
+    items = [
+        (report, row)
+        for report in reports
+        for row in report["rows"]
+    ]
+    if not items:
+        return
+
+    def daily_sales(report, row):
+        forecast = report["forecasts"].get(row.get("item_name")) or {}
+        rate = forecast.get("forecast_daily_sales")
+        return float(rate) if rate is not None else float(row.get("sold_amount") or 0)
+
+    order_qty, expected_profit = plan_orders(
+        company_ids=np.array([report["company_id"] for report, _ in items]),
+        in_stock=np.array([int(row.get("in_stock") or 0) for _, row in items]),
+        on_order=np.array([int(row.get("on_order") or 0) for _, row in items]),
+        daily_sales=np.array([daily_sales(report, row) for report, row in items]),
+        cost=np.array([int(row.get("cost") or 0) for _, row in items]),
+        price=np.array([int(row.get("price") or 0) for _, row in items]),
+        capacity={report["company_id"]: report["max_stock"] for report in reports},
+        cover_horizon=COVER_HORIZON,
+    )
+
+    for (_, row), qty, profit in zip(items, order_qty, expected_profit):
+        row["planned_order"] = int(qty)
+        row["expected_profit"] = float(profit)
+
+
+@span("fetch")
+def select_for_companies(supabase: Client, table: str, columns: str, company_ids: list, key="id", **filters) -> list[dict]:
+    """
+    Select `columns` from `table` for all `company_ids` with one `in_` filter,
+    streamed in keyset pages so PostgREST's max-rows cap can't truncate them.
+    `key` must identify a row uniquely.
+    """
+    def where(query):
+        query = query.in_("company_id", company_ids)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        return query
+
+    return list(stream_rows(supabase, table, columns, key=key, where=where))
+
+
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     utc_today = datetime.now(timezone.utc).date().isoformat()
 
+    linked = []
     for ch in channels:
-        company_id = ch.get("company_id")
-        discord_webhook_url = ch.get("discord_webhook_url")
-        company_name = ch.get("company_name") or f"Company {company_id}"
-
-        if not discord_webhook_url:
-            print(f"No webhook for company {company_id}, skipping")
+        if not ch.get("discord_webhook_url"):
+            log.info(f"No webhook for company {ch.get('company_id')}, skipping")
             continue
+        linked.append(ch)
 
-        # Fetch the company's current storage capacity (max_stock)
-        try:
-            company_info = (
-                supabase.table("company")
-                .select("storage_space")
-                .eq("company_id", company_id)
-                .single()
-                .execute()
-                .data
-            )
-            max_stock = int(company_info.get("storage_space", 100000)) if company_info else 100000
-        except Exception as e:
-            print(f"Error fetching storage_space for company {company_id}: {e}")
-            max_stock = 100000
-
-        try:
-            rows = supabase.table("company_stock_daily").select(
-                "item_name,in_stock,on_order,sold_amount,estimated_remaining_days"
-            ).eq("company_id", company_id).eq("snapshot_date", utc_today).execute().data
-        except Exception as e:
-            print(f"Error fetching stock for company {company_id}: {e}")
-            continue
+    company_ids = sorted({ch["company_id"] for ch in linked})
+    if not company_ids:
+        log.info("No linked companies, nothing to report.")
+        return
+
+    # Fetch the current storage capacity (max_stock) for every company at once
+    try:
+        companies = select_for_companies(supabase, "company", "company_id,storage_space", company_ids, key="company_id")
+        storage = {c["company_id"]: c.get("storage_space") for c in companies}
+    except Exception as e:
+        log.error(f"Error fetching storage_space: {e}")
+        storage = {}
+
+    try:
+        stock_rows = select_for_companies(
+            supabase, "company_stock_daily",
+            "company_id,item_name,cost,price,in_stock,on_order,sold_amount,estimated_remaining_days",
+            company_ids, snapshot_date=utc_today,
+        )
+    except Exception as e:
+        log.error(f"Error fetching stock rows: {e}")
+        return
 
+    # Forecasts are optional: fall back to the single-day estimate if the forecast job hasn't run
+    try:
+        forecast_rows = select_for_companies(
+            supabase, "company_stock_forecast",
+            "company_id,item_name,forecast_remaining_days,depletion_date,forecast_daily_sales,recommended_order",
+            company_ids, forecast_date=utc_today,
+        )
+    except Exception as e:
+        log.error(f"Error fetching stock forecasts: {e}")
+        forecast_rows = []
+
+    rows_by_company = defaultdict(list)
+    for row in sorted(stock_rows, key=lambda r: r["item_name"]):
+        rows_by_company[row["company_id"]].append(row)
+
+    forecasts_by_company = defaultdict(dict)
+    for f in forecast_rows:
+        forecasts_by_company[f["company_id"]][f["item_name"]] = f
+
+    reports = []
+    for company_id in company_ids:
+        rows = rows_by_company.get(company_id)
         if not rows:
-            print(f"No stock rows for company {company_id} on {utc_today}, skipping")
+            log.info(f"No stock rows for company {company_id} on {utc_today}, skipping")
             continue
 
-        message = build_stock_report(rows, max_stock)
-        full_message = f"{message}"
+        max_stock = int(storage.get(company_id) or DEFAULT_MAX_STOCK)
+        reports.append({
+            "company_id": company_id,
+            "max_stock": max_stock,
+            "rows": rows,
+            "forecasts": forecasts_by_company.get(company_id, {}),
+        })
 
-        send_discord_message(discord_webhook_url, full_message)
-        print(f"Sent stock report for company {company_name} (max_stock={max_stock})")
+    # Plan orders for every company in one batch
+    try:
+        apply_order_plan(reports)
+    except Exception as e:
+        log.error(f"Error planning stock orders: {e}")
 
-    print("Daily stock report job completed.")
+    # Render once per company, then send to every linked channel concurrently
+    messages = {
+        r["company_id"]: build_stock_report(r["rows"], r["max_stock"], r["forecasts"])
+        for r in reports
+    }
+    deliveries = [
+        (ch, messages[ch["company_id"]])
+        for ch in linked
+        if ch["company_id"] in messages
+    ]
+
+    def deliver(item):
+        ch, message = item
+        send_discord_message(ch["discord_webhook_url"], message)
+        company_name = ch.get("company_name") or f"Company {ch['company_id']}"
+        log.info(f"Sent stock report for company {company_name}")
+
+    with ThreadPoolExecutor(max_workers=SEND_WORKERS) as pool:
+        list(pool.map(deliver, deliveries))
+
+    log.info("Daily stock report job completed.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import requests
+from utils.secrets import get_secrets  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+from utils.stock_cover import COVER_HORIZON  # type: ignore
+from datetime import datetime, timedelta, timezone
+from supabase import create_client, Client
+from stock_forecast import HISTORY_COLUMNS, normalize_history, forecast_stock
+
+log = get_logger(__name__)
+
+LOOKBACK_DAYS = 180  # EWMA weight beyond this is negligible at a 7-day half-life
+UPSERT_CHUNK = 500
+
+# Fetch shared secrets once
+SECRETS = get_secrets(["discord_keys", "supabase_keys"])
+DISCORD_WEBHOOK_CHANNEL_THLC_BOT = SECRETS.get("DISCORD_WEBHOOK_CHANNEL_THLC_BOT")
+SUPABASE_URL = SECRETS.get("SUPABASE_URL")
+SUPABASE_KEY = SECRETS.get("SUPABASE_KEY")
+
+
+@span("discord_send")
+def send_discord_message(message: str):
+    webhook_url = DISCORD_WEBHOOK_CHANNEL_THLC_BOT
+    if not webhook_url:
+        log.warning("Discord webhook missing")
+        return
+    try:
+        r = requests.post(webhook_url, json={"content": message}, timeout=5)
+        log.info(f"Discord message sent: {r.status_code}")
+    except Exception as e:
+        log.error(f"Error sending Discord message: {e}")
+
+
+@span("fetch")
+def fetch_stock_history(supabase: Client, since_date: str) -> list[dict]:
+    """Fetch all company_stock_daily rows since `since_date`, one page at a time."""
+    return list(stream_rows(
+        supabase, "company_stock_daily", ", ".join(HISTORY_COLUMNS),
+        where=lambda q: q.gte("snapshot_date", since_date),
+    ))
+
+
+@span("upsert")
+def save_forecasts(supabase: Client, forecasts) -> int:
+    records = forecasts.astype(object).where(forecasts.notna(), None).to_dict("records")
+    for i in range(0, len(records), UPSERT_CHUNK):
+        supabase.table("company_stock_forecast").upsert(
+            records[i:i + UPSERT_CHUNK],
+            on_conflict="company_id,item_name,forecast_date"
+        ).execute()
+    return len(records)
+
+
+@instrumented
+def lambda_handler(event, context):
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    since = (datetime.now(timezone.utc).date() - timedelta(days=LOOKBACK_DAYS)).isoformat()
+
+    try:
+        history = normalize_history(fetch_stock_history(supabase, since))
+    except Exception as e:
+        send_discord_message(f"[Stock Forecast] Error fetching stock history: {e}")
+        return {"statusCode": 500, "body": "Failed to fetch stock history"}
+
+    if history.empty:
+        log.info("No stock history found")
+        return {"statusCode": 200, "body": "No stock history"}
+
+    with span("forecast"):
+        forecasts = forecast_stock(history, COVER_HORIZON)
+
+    try:
+        saved = save_forecasts(supabase, forecasts)
+    except Exception as e:
+        send_discord_message(f"[Stock Forecast] Error saving forecasts: {e}")
+        return {"statusCode": 500, "body": "Failed to save forecasts"}
+
+    companies = forecasts["company_id"].nunique()
+    send_discord_message(f"[Stock Forecast] Forecast {saved} items across {companies} companies ({len(history)} history rows)")
+
+    log.info(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
+    return {"statusCode": 200, "body": "Cron job executed successfully"}
@@ -0,0 +1,112 @@
+# src/cron/forecast/stock_forecast.py
+"""
+Vectorized stock depletion forecasting over `company_stock_daily`.
+
+Every (company_id, item_name) pair is one column of a (date x series) frame,
+so the EWMA, day-of-week seasonality and depletion search run for all
+companies and items in a single batch.
+"""
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS = ["company_id", "item_name", "snapshot_date", "in_stock", "on_order", "sold_amount"]
+
+HALFLIFE_DAYS = 7           # EWMA half-life for daily sales
+SEASONALITY_PRIOR_DAYS = 4  # shrinks weekday factors towards 1.0 until each weekday has data
+HORIZON_DAYS = 60           # how far ahead depletion is searched
+
+
+def normalize_history(rows: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    if df.empty:
+        return df
+    df["snapshot_date"] = pd.to_datetime(df["snapshot_date"]).dt.normalize()
+    df[["in_stock", "on_order", "sold_amount"]] = df[["in_stock", "on_order", "sold_amount"]].fillna(0).astype("int64")
+    return df
+
+
+def weekday_factors(sales: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a (7 x series) frame of day-of-week multipliers, normalised so each
+    series averages 1.0 across the week. Weekdays with little history are
+    pulled towards 1.0 so a single odd day does not skew the forecast.
+    """
+    by_weekday = sales.groupby(sales.index.dayofweek)
+    weekday_mean = by_weekday.mean().reindex(range(7))
+    weekday_count = by_weekday.count().reindex(range(7)).fillna(0)
+
+    overall = sales.mean().replace(0, np.nan)
+    raw = (weekday_mean / overall).fillna(1.0)
+
+    shrunk = (raw * weekday_count + SEASONALITY_PRIOR_DAYS) / (weekday_count + SEASONALITY_PRIOR_DAYS)
+    return shrunk / shrunk.mean()
+
+
+def forecast_stock(history: pd.DataFrame, cover_horizon: int) -> pd.DataFrame:
+    """
+    Forecast depletion for every item on the latest snapshot date.
+
+    Returns one row per (company_id, item_name) with the EWMA level, average
+    forecast daily sales, forecast remaining days / depletion date and the
+    order quantity needed to cover `cover_horizon` days (lead time + cover
+    days) of sales.
+    """
+    if history.empty:
+        return pd.DataFrame()
+
+    sales = history.pivot_table(
+        index="snapshot_date", columns=["company_id", "item_name"], values="sold_amount", aggfunc="sum"
+    )
+    sales = sales.reindex(pd.date_range(sales.index.min(), sales.index.max(), freq="D"))
+    forecast_date = sales.index[-1]
+
+    # Only items still stocked on the latest day are forecast
+    latest = (
+        history[history["snapshot_date"] == forecast_date]
+        .set_index(["company_id", "item_name"])[["in_stock", "on_order"]]
+    )
+    sales = sales.reindex(columns=latest.index)
+
+    # Deseasonalise, then smooth
+    factors = weekday_factors(sales)
+    deseasonalised = sales / factors.reindex(sales.index.dayofweek).to_numpy()
+    level = deseasonalised.ewm(halflife=HALFLIFE_DAYS, ignore_na=True).mean().iloc[-1].fillna(0).to_numpy()
+
+    # (series x horizon) matrix of forecast daily sales
+    future_days = pd.date_range(forecast_date + pd.Timedelta(days=1), periods=HORIZON_DAYS, freq="D")
+    future_factors = factors.reindex(future_days.dayofweek).to_numpy().T
+    daily = np.clip(level[:, None] * future_factors, 0, None)
+    cumulative = np.cumsum(daily, axis=1)
+
+    in_stock = latest["in_stock"].to_numpy()
+    on_order = latest["on_order"].to_numpy()
+
+    # First day on which cumulative sales reach the current stock
+    depleted = cumulative >= np.maximum(in_stock, 1)[:, None]
+    has_depletion = depleted.any(axis=1) & (level > 0)
+    remaining_days = np.where(has_depletion, depleted.argmax(axis=1) + 1, -1)
+
+    # Cover lead time + cover days, net of what is already on hand or ordered
+    demand = cumulative[:, min(cover_horizon, HORIZON_DAYS) - 1]
+    recommended = np.clip(np.ceil(demand - in_stock - on_order), 0, None).astype("int64")
+
+    days_of_history = sales.notna().sum().to_numpy()
+
+    result = pd.DataFrame({
+        "company_id": latest.index.get_level_values("company_id").astype("int64"),
+        "item_name": latest.index.get_level_values("item_name"),
+        "forecast_date": forecast_date.date().isoformat(),
+        "days_of_history": days_of_history.astype("int64"),
+        "ewma_daily_sales": np.round(level, 2),
+        "forecast_daily_sales": np.round(daily.mean(axis=1), 2),
+        "in_stock": in_stock,
+        "on_order": on_order,
+        "forecast_remaining_days": remaining_days,
+        "recommended_order": recommended,
+    })
+    result["depletion_date"] = [
+        (forecast_date + pd.Timedelta(days=int(d))).date().isoformat() if d >= 0 else None
+        for d in remaining_days
+    ]
+    result["forecast_remaining_days"] = result["forecast_remaining_days"].astype("object").where(has_depletion, None)
+    return result
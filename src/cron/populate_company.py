@@ -1,8 +1,18 @@
 import json
+import time
 import boto3
 import requests
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.discord import send_webhook_message  # type: ignore
+from utils.notify import RunSummary  # type: ignore
+from utils.run_ledger import RunLedger  # type: ignore
+from utils import fanout  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.keystore import get_api_keys  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
 
@@ -24,35 +34,15 @@ def get_secrets():
 
 SECRETS = get_secrets()
 
-def get_director_api_key(key_ref: str) -> str | None:
-    client = boto3.client("secretsmanager", region_name=REGION)
-    try:
-        secret_value = client.get_secret_value(SecretId="torn_director_api_keys")
-        secret_dict = json.loads(secret_value["SecretString"])
-    except Exception as e:
-        print(f"Error retrieving Torn API keys: {e}")
-        return None
-
-    api_key = secret_dict.get(key_ref)
-    if not api_key:
-        print(f"Torn API key for {key_ref} not found")
-    return api_key
-
 def send_discord_message(message: str):
-    webhook_url = SECRETS["DISCORD_WEBHOOK_CHANNEL_THLC_BOT"]
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        r = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Discord message sent: {r.status_code}")
-    except Exception as e:
-        print(f"Error sending Discord message: {e}")
+    parts = send_webhook_message(SECRETS["DISCORD_WEBHOOK_CHANNEL_THLC_BOT"], message)
+    log.info(f"Discord message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
+@span("upsert")
 def process_company(supabase: Client, director: dict, company: dict, company_details: dict):
     company_id = company.get("ID")
     if not company_id:
-        print(f"[Company] Missing ID for director {director.get('torn_user_id')}")
+        log.warning(f"Missing ID for director {director.get('torn_user_id')}")
         return None
 
     record = {
@@ -74,77 +64,84 @@ def process_company(supabase: Client, director: dict, company: dict, company_det
 
     try:
         supabase.table("company").upsert(record, on_conflict="company_id").execute()
-        print(f"[Company] Upserted company {company_id} ({record['company_name']})")
+        log.info(f"Upserted company {company_id} ({record['company_name']})")
         return True
     except Exception as e:
-        print(f"[Company] Error upserting company {company_id}: {e}")
+        log.error(f"Error upserting company {company_id}: {e}")
         return False
 
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
-    success_list = []
-    fail_list = []
-
     try:
-        directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
+        with span("directors"):
+            directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
     except Exception as e:
         send_discord_message(f"[Company] ❌ Error fetching directors: {e}")
         return {"statusCode": 500, "body": "Failed to fetch directors"}
 
+    ledger = RunLedger(supabase, "company", event, context)
+    if fanout.schedule(ledger, directors):
+        return {"statusCode": 202, "body": "Directors handed to the cron shard worker"}
+    directors = fanout.shard(directors, event)
+    summary = RunSummary("Company", ledger=ledger)
+
+    try:
+        api_keys = get_api_keys(d.get("api_key") for d in directors if d["torn_user_id"] not in ledger.done)
+    except Exception as e:
+        log.error(f"Error retrieving Torn API keys: {e}")
+        api_keys = {}
+
     for director in directors:
+        if not ledger.claim(director["torn_user_id"]):
+            continue
         key_ref = director.get("api_key")
+        log.set_context(director_id=director.get("torn_user_id"), company_id=director.get("company_id"))
         if not key_ref:
-            print(f"No key_ref for director {director.get('torn_user_id')}")
+            log.warning(f"No key_ref for director {director.get('torn_user_id')}")
+            summary.skip(str(director.get("torn_user_id")), "no key_ref")
             continue
 
-        api_key = get_director_api_key(key_ref)
+        api_key = api_keys.get(key_ref)
         if not api_key:
-            print(f"No Torn API key for {key_ref}")
+            log.warning(f"No Torn API key for {key_ref}")
+            summary.skip(str(director.get("torn_user_id")), "no API key", retry=True)
             continue
 
+        started = time.perf_counter()
         try:
-            resp = requests.get(
-                f"https://api.torn.com/company/?selections=detailed,profile&key={api_key}",
-                headers={"Content-Type": "application/json"},
-                timeout=10,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+            with span("torn_fetch"):
+                resp = requests.get(
+                    f"https://api.torn.com/company/?selections=detailed,profile&key={api_key}",
+                    headers={"Content-Type": "application/json"},
+                    timeout=10,
+                )
+                resp.raise_for_status()
+                data = resp.json()
             #print(data)
 
             company = data.get("company", {})
             company_details = data.get("company_detailed", {})
 
             if company and company_details:
+                label = f"{company.get('name')} ({director.get('torn_user_id')})"
                 ok = process_company(supabase, director, company, company_details)
                 if ok:
-                    success_list.append(f"{company.get('name')} ({director.get('torn_user_id')})")
+                    summary.success(label, started)
                 else:
-                    fail_list.append(f"{company.get('name')} ({director.get('torn_user_id')})")
+                    summary.failure(label, started, "DB update failed")
             else:
-                fail_list.append(f"{director.get('torn_user_id')} (no company data)")
+                summary.failure(str(director.get("torn_user_id")), started, "no company data")
         except Exception as e:
-            print(f"Error fetching company for {director.get('torn_user_id')}: {e}")
-            fail_list.append(f"{director.get('torn_user_id')} (API error)")
-
-    # Summary message
-    summary = "**[Company Cron Summary]**\n"
-    summary += f"🕒 {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}\n\n"
-    summary += f"✅ Updated: {len(success_list)}\n❌ Failed: {len(fail_list)}\n\n"
-
-    if success_list:
-        summary += "**Success:**\n" + "\n".join(success_list[:10])
-        if len(success_list) > 10:
-            summary += f"\n(+{len(success_list)-10} more)"
-        summary += "\n\n"
-
-    if fail_list:
-        summary += "**Failed:**\n" + "\n".join(fail_list[:10])
-        if len(fail_list) > 10:
-            summary += f"\n(+{len(fail_list)-10} more)"
+            log.error(f"Error fetching company for {director.get('torn_user_id')}: {e}")
+            summary.failure(str(director.get("torn_user_id")), started, "API error")
 
-    send_discord_message(summary)
+    log.set_context()
+    ledger.follow_up()
+    report = ledger.report(summary)
+    if report:
+        send_discord_message(report)
 
-    print(f"[Company Cron] Completed at {datetime.now(timezone.utc).isoformat()}")
+    log.info(f"Completed at {datetime.now(timezone.utc).isoformat()}")
     return {"statusCode": 200, "body": "Company cron executed successfully"}
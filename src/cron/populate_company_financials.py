@@ -1,9 +1,19 @@
 import json
+import time
 import boto3
 import requests
 import re
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.discord import send_webhook_message  # type: ignore
+from utils.notify import RunSummary  # type: ignore
+from utils.run_ledger import RunLedger  # type: ignore
+from utils import fanout  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.keystore import get_api_keys  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
 
@@ -25,36 +35,17 @@ def get_secrets():
 
 SECRETS = get_secrets()
 
-def get_director_api_key(key_ref: str) -> str | None:
-    client = boto3.client("secretsmanager", region_name=REGION)
-    try:
-        secret_value = client.get_secret_value(SecretId="torn_director_api_keys")
-        secret_dict = json.loads(secret_value["SecretString"])
-    except Exception as e:
-        print(f"Error retrieving Torn API keys: {e}")
-        return None
-
-    api_key = secret_dict.get(key_ref)
-    if not api_key:
-        print(f"Torn API key for {key_ref} not found")
-    return api_key
-
 def send_discord_message(message: str):
     #webhook_url = SECRETS["DISCORD_WEBHOOK_CHANNEL_THLC_BOT"]
     
     # leave this for testing please
     webhook_url = "https://discord.com/api/webhooks/1425300955481636977/jHhYH1mJTjaYQX9H4hUcq-dwWFrDoWPIwLWjXLMpqhc4xZXKsa3Xurj5SJ999Y9wHuWY"
 
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        r = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Discord message sent: {r.status_code}")
-    except Exception as e:
-        print(f"Error sending Discord message: {e}")
+    parts = send_webhook_message(webhook_url, message)
+    log.info(f"Discord message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
 
+@span("upsert")
 def process_company_financials(supabase: Client, director_torn_id: int, company_id, stock: dict, company_details: dict, employees: dict, news: dict):
     """
     Calculate daily company financials and upsert into Supabase table `company_financials`.
@@ -72,7 +63,7 @@ def process_company_financials(supabase: Client, director_torn_id: int, company_
                     revenue = int(revenue_str.replace(",", "").replace(".", ""))
                     break
                 except Exception as e:
-                    print(f"[Company Financials] Failed to parse revenue: {e}")
+                    log.error(f"Failed to parse revenue: {e}")
 
     # --- Stock cost (on_order * cost) ---
     stock_cost = 0
@@ -107,51 +98,96 @@ def process_company_financials(supabase: Client, director_torn_id: int, company_
         ).execute()
         resp_dict = resp.__dict__
         if resp_dict.get("error"):
-            print(f"[Company Financials] Error upserting record: {resp_dict['error']}")
+            log.error(f"Error upserting record: {resp_dict['error']}")
         else:
-            print(f"[Company Financials] Successfully upserted financials for company {company_id} on {today_str}")
+            log.info(f"Successfully upserted financials for company {company_id} on {today_str}")
+            refresh_financial_rollups(supabase, company_id, today_str)
     except Exception as e:
-        print(f"[Company Financials] Exception during upsert: {e}")
+        log.error(f"Exception during upsert: {e}")
 
 
+def refresh_financial_rollups(supabase: Client, company_id, capture_date: str):
+    """
+    Re-aggregate the weekly and monthly rollups containing `capture_date`.
+    The RPC recomputes the whole period from `company_financials`, so calling it
+    again after a late correction simply overwrites the rollup rows.
+    """
+    try:
+        supabase.rpc(
+            "refresh_company_financials_rollups",
+            {"p_company_id": company_id, "p_capture_date": capture_date},
+        ).execute()
+        log.info(f"Refreshed rollups for company {company_id} ({capture_date})")
+    except Exception as e:
+        log.error(f"Error refreshing rollups for company {company_id}: {e}")
+
+
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
     try:
-        directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
+        with span("directors"):
+            directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
     except Exception as e:
         send_discord_message(f"[Company Financials] Error fetching directors: {e}")
         return {"statusCode": 500, "body": "Failed to fetch directors"}
 
+    ledger = RunLedger(supabase, "company_financials", event, context)
+    if fanout.schedule(ledger, directors):
+        return {"statusCode": 202, "body": "Directors handed to the cron shard worker"}
+    directors = fanout.shard(directors, event)
+    summary = RunSummary("Company Financials", ledger=ledger)
+
+    try:
+        api_keys = get_api_keys(d.get("api_key") for d in directors if d["torn_user_id"] not in ledger.done)
+    except Exception as e:
+        log.error(f"Error retrieving Torn API keys: {e}")
+        api_keys = {}
+
     for director in directors:
+        if not ledger.claim(director["torn_user_id"]):
+            continue
         key_ref = director.get("api_key")
         company_id = director.get("company_id")
+        label = f"{director.get('director_name')} ({director.get('torn_user_id')})"
+        log.set_context(director_id=director.get("torn_user_id"), company_id=company_id)
         
         if not key_ref:
-            print(f"No key_ref for director {director.get('torn_user_id')}")
+            log.warning(f"No key_ref for director {director.get('torn_user_id')}")
+            summary.skip(label, "no key_ref")
             continue
 
-        api_key = get_director_api_key(key_ref)
+        api_key = api_keys.get(key_ref)
         if not api_key:
-            print(f"No Torn API key for {key_ref}")
+            log.warning(f"No Torn API key for {key_ref}")
+            summary.skip(label, "no API key", retry=True)
             continue
 
+        started = time.perf_counter()
         headers = {"Content-Type": "application/json"}
         try:
-            resp = requests.get(f"https://api.torn.com/company/?selections=stock,detailed,employees,news&key={api_key}", headers=headers, timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
+            with span("torn_fetch"):
+                resp = requests.get(f"https://api.torn.com/company/?selections=stock,detailed,employees,news&key={api_key}", headers=headers, timeout=5)
+                resp.raise_for_status()
+                data = resp.json()
             stock = data.get("company_stock", {})
             company_details= data.get("company_detailed", {})
             employees = data.get("company_employees", {})
             news = data.get("news")
 
             process_company_financials(supabase, director["torn_user_id"], company_id, stock, company_details, employees, news)
-            send_discord_message(f"[Company Financials] Processed for {director.get('director_name')} ({director.get('torn_user_id')})")
+            summary.success(label, started)
 
         except Exception as e:
-            print(f"Error fetching employees for {director.get('torn_user_id')}: {e}")
-            send_discord_message(f"[Company Financials] Error fetching education for {director.get('director_name')}: {e}")
+            log.error(f"Error fetching financials for {director.get('torn_user_id')}: {e}")
+            summary.failure(label, started, e)
+
+    log.set_context()
+    ledger.follow_up()
+    report = ledger.report(summary)
+    if report:
+        send_discord_message(report)
 
-    print(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
+    log.info(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
     return {"statusCode": 200, "body": "Cron job executed successfully"}
\ No newline at end of file
@@ -1,8 +1,18 @@
 import json
+import time
 import boto3
 import requests
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.discord import send_webhook_message  # type: ignore
+from utils.notify import RunSummary  # type: ignore
+from utils.run_ledger import RunLedger  # type: ignore
+from utils import fanout  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.keystore import get_api_keys  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
 
@@ -24,31 +34,12 @@ def get_secrets():
 
 SECRETS = get_secrets()
 
-def get_director_api_key(key_ref: str) -> str | None:
-    client = boto3.client("secretsmanager", region_name=REGION)
-    try:
-        secret_value = client.get_secret_value(SecretId="torn_director_api_keys")
-        secret_dict = json.loads(secret_value["SecretString"])
-    except Exception as e:
-        print(f"Error retrieving Torn API keys: {e}")
-        return None
-
-    api_key = secret_dict.get(key_ref)
-    if not api_key:
-        print(f"Torn API key for {key_ref} not found")
-    return api_key
-
 def send_discord_message(message: str):
     webhook_url = SECRETS["DISCORD_WEBHOOK_CHANNEL_THLC_BOT"]
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        r = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Discord message sent: {r.status_code}")
-    except Exception as e:
-        print(f"Error sending Discord message: {e}")
+    parts = send_webhook_message(webhook_url, message)
+    log.info(f"Discord message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
+@span("upsert")
 def process_company_stock(supabase, company_id: int, company_stock: dict, snapshot_date):
     """
     Inserts or updates company stock snapshot for the given company_id.
@@ -81,7 +72,7 @@ def process_company_stock(supabase, company_id: int, company_stock: dict, snapsh
         })
 
     if not rows_to_insert:
-        print(f"[Stock] No valid rows to insert for company_id={company_id}")
+        log.info(f"No valid rows to insert for company_id={company_id}")
         return
 
     try:
@@ -90,57 +81,85 @@ def process_company_stock(supabase, company_id: int, company_stock: dict, snapsh
             on_conflict="company_id,item_name,snapshot_date"
         ).execute()
 
-        print(f"[Stock] Inserted {len(rows_to_insert)} records for company_id={company_id}")
+        log.info(f"Inserted {len(rows_to_insert)} records for company_id={company_id}")
 
     except Exception as e:
-        print(f"[Stock] ❌ Error inserting stock records for company_id={company_id}: {e}")
+        log.error(f"Error inserting stock records for company_id={company_id}: {e}")
 
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
     utc_today = datetime.now(timezone.utc).date()
 
     try:
-        directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
+        with span("directors"):
+            directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
     except Exception as e:
         send_discord_message(f"[Employees] Error fetching directors: {e}")
         return {"statusCode": 500, "body": "Failed to fetch directors"}
 
+    ledger = RunLedger(supabase, "company_stock", event, context)
+    if fanout.schedule(ledger, directors):
+        return {"statusCode": 202, "body": "Directors handed to the cron shard worker"}
+    directors = fanout.shard(directors, event)
+    summary = RunSummary("Stock", ledger=ledger)
+
+    try:
+        api_keys = get_api_keys(d.get("api_key") for d in directors if d["torn_user_id"] not in ledger.done)
+    except Exception as e:
+        log.error(f"Error retrieving Torn API keys: {e}")
+        api_keys = {}
+
     for director in directors:
+        if not ledger.claim(director["torn_user_id"]):
+            continue
         key_ref = director.get("api_key")
         company_id = director.get("company_id")
+        label = f"{director.get('director_name')} ({director.get('torn_user_id')})"
+        log.set_context(director_id=director.get("torn_user_id"), company_id=company_id)
         
         if not key_ref:
-            print(f"No key_ref for director {director.get('torn_user_id')}")
+            log.warning(f"No key_ref for director {director.get('torn_user_id')}")
+            summary.skip(label, "no key_ref")
             continue
 
-        api_key = get_director_api_key(key_ref)
+        api_key = api_keys.get(key_ref)
         if not api_key:
-            print(f"No Torn API key for {key_ref}")
+            log.warning(f"No Torn API key for {key_ref}")
+            summary.skip(label, "no API key", retry=True)
             continue
 
+        started = time.perf_counter()
         headers = {"Content-Type": "application/json"}
         try:
-            resp = requests.get(
-                f"https://api.torn.com/company/?selections=stock&key={api_key}",
-                headers=headers,
-                timeout=10
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            print(data)
+            with span("torn_fetch"):
+                resp = requests.get(
+                    f"https://api.torn.com/company/?selections=stock&key={api_key}",
+                    headers=headers,
+                    timeout=10
+                )
+                resp.raise_for_status()
+                data = resp.json()
+            log.debug("Torn stock payload", payload=data)
             company_stock = data.get("company_stock", {})
 
             if not company_stock:
-                print(f"[Stock] No stock data for company_id={company_id}")
+                log.info(f"No stock data for company_id={company_id}")
+                summary.skip(label, "no stock data")
                 continue
 
             process_company_stock(supabase, company_id, company_stock, utc_today)
-
-            send_discord_message(f"[Stock] Processed for {director.get('director_name')} ({director.get('torn_user_id')})")
+            summary.success(label, started, f"{len(company_stock)} items")
 
         except Exception as e:
-            print(f"Error fetching stock for {director.get('torn_user_id')}: {e}")
-            send_discord_message(f"[Stock] Error fetching stock for {director.get('director_name')}: {e}")
+            log.error(f"Error fetching stock for {director.get('torn_user_id')}: {e}")
+            summary.failure(label, started, e)
+
+    log.set_context()
+    ledger.follow_up()
+    report = ledger.report(summary)
+    if report:
+        send_discord_message(report)
 
-    print(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
+    log.info(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
     return {"statusCode": 200, "body": "Cron job executed successfully"}
@@ -1,10 +1,21 @@
 import json
+import time
 import boto3
 import requests
 from utils.secrets import get_secrets  # type: ignore
+from utils.discord import send_webhook_message  # type: ignore
+from utils.notify import RunSummary  # type: ignore
+from utils.run_ledger import RunLedger  # type: ignore
+from utils import fanout  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.keystore import get_api_keys  # type: ignore
+from utils.fetch_cache import FetchCache  # type: ignore
 from datetime import datetime, timezone
 from supabase import create_client, Client
 
+log = get_logger(__name__)
+
 REGION = "ap-southeast-1"
 TARGET_STOCKS = [3,8,11,13,23,25]
 
@@ -32,33 +43,11 @@ SUPABASE_KEY = SECRETS.get("SUPABASE_KEY")
 
 # SECRETS = get_secrets()
 
-def get_director_api_key(key_ref: str) -> str | None:
-    """
-    Fetch a single director API key using the shared get_secrets() function.
-    Keeps the code simple by fetching only the 'torn_director_api_keys' secret
-    each time this function is called.
-    """
-    secrets = get_secrets(["torn_director_api_keys"])
-    api_key = secrets.get(key_ref)
-    if not api_key:
-        print(f"Torn API key for {key_ref} not found")
-    return api_key
-
 def send_discord_message(message: str):
-    webhook_url = DISCORD_WEBHOOK_CHANNEL_THLC_BOT
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        r = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Discord message sent: {r.status_code}")
-    except Exception as e:
-        print(f"Error sending Discord message: {e}")
-
-def process_director_stock_blocks_raw(supabase: Client, torn_user_id: int, stock_blocks: dict):
-    now = datetime.utcnow().isoformat()
+    parts = send_webhook_message(DISCORD_WEBHOOK_CHANNEL_THLC_BOT, message)
+    log.info(f"Discord message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
-    # Build all records for bulk upsert
+def build_stock_block_records(torn_user_id: int, stock_blocks: dict) -> list[dict]:
     records = []
     for sid, details in stock_blocks.items():
         stock_id = int(sid)
@@ -75,62 +64,111 @@ def process_director_stock_blocks_raw(supabase: Client, torn_user_id: int, stock
                 "stock_id": stock_id,
                 "shares_held": shares_held,
                 "has_block": has_block,
-                "updated_at": now,
             }
         )
+    return sorted(records, key=lambda r: r["stock_id"])
+
 
+@span("upsert")
+def process_director_stock_blocks_raw(supabase: Client, torn_user_id: int, records: list[dict]) -> bool:
     if not records:
-        return
+        return True
 
+    now = datetime.utcnow().isoformat()
     try:
         supabase.table("director_stock_blocks").upsert(
-            records,
+            [{**record, "updated_at": now} for record in records],
             on_conflict="torn_user_id,stock_id",
         ).execute()
+        return True
     except Exception as e:
-        print(f"Error upserting stock blocks for user {torn_user_id}: {e}")
+        log.error(f"Error upserting stock blocks for user {torn_user_id}: {e}")
+        return False
 
 
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
     try:
         # This will also get prospective directors
-        directors = supabase.table("directors").select("*").execute().data
+        with span("directors"):
+            directors = supabase.table("directors").select("*").execute().data
     except Exception as e:
         send_discord_message(f"[Director Stock Blocks] Error fetching directors: {e}")
         return {"statusCode": 500, "body": "Failed to fetch directors"}
 
+    ledger = RunLedger(supabase, "stocks", event, context)
+    if fanout.schedule(ledger, directors):
+        return {"statusCode": 202, "body": "Directors handed to the cron shard worker"}
+    directors = fanout.shard(directors, event)
+    summary = RunSummary("Director Stock Blocks", ledger=ledger)
+    cache = FetchCache(supabase, "stocks", force=(event or {}).get("force"))
+    try:
+        api_keys = get_api_keys(
+            d.get("api_key") for d in directors
+            if d["torn_user_id"] not in ledger.done and not cache.fresh(d["torn_user_id"])
+        )
+    except Exception as e:
+        log.error(f"Error retrieving Torn API keys: {e}")
+        api_keys = {}
+
     for director in directors:
+        if not ledger.claim(director["torn_user_id"]):
+            continue
         key_ref = director.get("api_key")
+        label = f"{director.get('director_name')} ({director.get('torn_user_id')})"
+        log.set_context(director_id=director.get("torn_user_id"), company_id=director.get("company_id"))
         if not key_ref:
-            print(f"No key_ref for director {director.get('torn_user_id')}")
+            log.warning(f"No key_ref for director {director.get('torn_user_id')}")
+            summary.skip(label, "no key_ref")
+            continue
+
+        if cache.fresh(director["torn_user_id"]):
+            summary.skip(label, "fetched recently")
             continue
 
-        api_key = get_director_api_key(key_ref)
+        api_key = api_keys.get(key_ref)
         if not api_key:
-            print(f"No Torn API key for {key_ref}")
+            log.warning(f"No Torn API key for {key_ref}")
+            summary.skip(label, "no API key", retry=True)
             continue
 
+        started = time.perf_counter()
+
         try:
-            resp = requests.get(f"https://api.torn.com/user/?selections=stocks&key={api_key}", timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
+            with span("torn_fetch"):
+                resp = requests.get(f"https://api.torn.com/user/?selections=stocks&key={api_key}", timeout=5)
+                resp.raise_for_status()
+                data = resp.json()
             
             stock_blocks = data.get("stocks", {})
 
-            filtered_stock_blocks = {
-                sid: details
-                for sid, details in stock_blocks.items()
-                if int(sid) in TARGET_STOCKS
-            }
+            # Only the stored fields are hashed, so daily benefit progress alone does not count as a change
+            records = build_stock_block_records(director["torn_user_id"], stock_blocks)
 
-            process_director_stock_blocks_raw(supabase, director["torn_user_id"], filtered_stock_blocks)
-            send_discord_message(f"[Director Stock Blocks] Processed for {director.get('director_name')} ({director.get('torn_user_id')})")
+            if not cache.changed(director["torn_user_id"], records):
+                cache.record(director["torn_user_id"], records)
+                summary.success(label, started, "unchanged")
+            elif process_director_stock_blocks_raw(supabase, director["torn_user_id"], records):
+                cache.record(director["torn_user_id"], records)
+                summary.success(label, started)
+            else:
+                summary.failure(label, started, "upsert failed")
 
         except Exception as e:
-            print(f"Error fetching education for {director.get('torn_user_id')}: {e}")
-            send_discord_message(f"[Director Stock Blocks] Error fetching education for {director.get('director_name')}: {e}")
+            log.error(f"Error fetching education for {director.get('torn_user_id')}: {e}")
+            summary.failure(label, started, e)
+
+    log.set_context()
+    ledger.follow_up()
+    try:
+        cache.save()
+    except Exception as e:
+        log.error(f"Error saving fetch cache: {e}")
+    report = ledger.report(summary)
+    if report:
+        send_discord_message(report)
 
-    print(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
+    log.info(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
     return {"statusCode": 200, "body": "Cron job executed successfully"}
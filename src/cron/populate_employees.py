@@ -1,10 +1,20 @@
 import json
+import time
 import boto3
 import requests
 from utils.secrets import get_secrets  # type: ignore
+from utils.discord import send_webhook_message  # type: ignore
+from utils.notify import RunSummary  # type: ignore
+from utils.run_ledger import RunLedger  # type: ignore
+from utils import fanout  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.keystore import get_api_keys  # type: ignore
 from datetime import datetime, timezone
 from supabase import create_client, Client
 
+log = get_logger(__name__)
+
 REGION = "ap-southeast-1"
 
 # Fetch shared secrets once
@@ -14,29 +24,9 @@ SUPABASE_URL = SECRETS.get("SUPABASE_URL")
 SUPABASE_KEY = SECRETS.get("SUPABASE_KEY")
 
 
-def get_director_api_key(key_ref: str) -> str | None:
-    """
-    Fetch a single director API key using the shared get_secrets() function.
-    Keeps the code simple by fetching only the 'torn_director_api_keys' secret
-    each time this function is called.
-    """
-    secrets = get_secrets(["torn_director_api_keys"])
-    api_key = secrets.get(key_ref)
-    if not api_key:
-        print(f"Torn API key for {key_ref} not found")
-    return api_key
-
-
 def send_discord_message(message: str):
-    webhook_url = DISCORD_WEBHOOK_CHANNEL_THLC_BOT
-    if not webhook_url:
-        print("Discord webhook missing")
-        return
-    try:
-        r = requests.post(webhook_url, json={"content": message}, timeout=5)
-        print(f"Discord message sent: {r.status_code}")
-    except Exception as e:
-        print(f"Error sending Discord message: {e}")
+    parts = send_webhook_message(DISCORD_WEBHOOK_CHANNEL_THLC_BOT, message)
+    log.info(f"Discord message sent: {sum(1 for p in parts if p['id'])}/{len(parts)} parts")
 
 
 def calculate_allowable_addiction(merits: int) -> int:
@@ -47,6 +37,7 @@ def calculate_allowable_addiction(merits: int) -> int:
     return allowable
 
 
+@span("upsert")
 def process_employees(supabase: Client, director_torn_id: int, company_id, employees: dict):
     supabase.table("employees").delete().eq("company_id", company_id).execute()
 
@@ -78,58 +69,82 @@ def process_employees(supabase: Client, director_torn_id: int, company_id, emplo
         try:
             resp_dict = resp.__dict__
             if resp_dict.get("error"):
-                print(f"[populate_employees] Error inserting employees: {resp_dict['error']}")
+                log.error(f"Error inserting employees: {resp_dict['error']}")
             else:
-                print(f"[populate_employees] Inserted {len(records)} employees successfully")
+                log.info(f"Inserted {len(records)} employees successfully")
         except Exception as e:
-            print(f"[populate_employees] Unexpected response structure: {resp}, error: {e}")
+            log.error(f"Unexpected response structure: {resp}, error: {e}")
     else:
-        print("[populate_employees] No employee records to insert")
+        log.info("No employee records to insert")
 
 
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
     try:
-        directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
+        with span("directors"):
+            directors = supabase.table("directors").select("*").eq("prospective", False).execute().data
     except Exception as e:
         send_discord_message(f"🧑‍💼[populate_employees] Error fetching directors: {e}")
         return {"statusCode": 500, "body": "Failed to fetch directors"}
 
+    ledger = RunLedger(supabase, "employees", event, context)
+    if fanout.schedule(ledger, directors):
+        return {"statusCode": 202, "body": "Directors handed to the cron shard worker"}
+    directors = fanout.shard(directors, event)
+    summary = RunSummary("🧑‍💼 Employees", ledger=ledger)
+
+    try:
+        api_keys = get_api_keys(d.get("api_key") for d in directors if d["torn_user_id"] not in ledger.done)
+    except Exception as e:
+        log.error(f"Error retrieving Torn API keys: {e}")
+        api_keys = {}
+
     for director in directors:
+        if not ledger.claim(director["torn_user_id"]):
+            continue
         key_ref = director.get("api_key")
         company_id = director.get("company_id")
+        label = f"{director.get('director_name')} [{director.get('torn_user_id')}]"
+        log.set_context(director_id=director.get("torn_user_id"), company_id=company_id)
 
         if not key_ref:
-            print(f"No key_ref for director {director.get('torn_user_id')}")
+            log.warning(f"No key_ref for director {director.get('torn_user_id')}")
+            summary.skip(label, "no key_ref")
             continue
 
         # Use shared get_secrets() for Torn API keys
-        api_key = get_director_api_key(key_ref)
+        api_key = api_keys.get(key_ref)
         if not api_key:
+            summary.skip(label, "no API key", retry=True)
             continue
 
+        started = time.perf_counter()
         headers = {"Content-Type": "application/json"}
         try:
-            resp = requests.get(
-                f"https://api.torn.com/company/?selections=employees&key={api_key}",
-                headers=headers,
-                timeout=5
-            )
-            resp.raise_for_status()
-            data = resp.json()
+            with span("torn_fetch"):
+                resp = requests.get(
+                    f"https://api.torn.com/company/?selections=employees&key={api_key}",
+                    headers=headers,
+                    timeout=5
+                )
+                resp.raise_for_status()
+                data = resp.json()
             employees = data.get("company_employees", {})
 
             process_employees(supabase, director["torn_user_id"], company_id, employees)
-            send_discord_message(
-                f"🧑‍💼[populate_employees] Processed for {director.get('director_name')} [{director.get('torn_user_id')}]"
-            )
+            summary.success(label, started, f"{len(employees)} employees")
 
         except Exception as e:
-            print(f"Error fetching employees for {director.get('torn_user_id')}: {e}")
-            send_discord_message(
-                f"🧑‍💼[populate_employees] Error fetching employees for {director.get('director_name')} [{director.get('torn_user_id')}]: {e}"
-            )
+            log.error(f"Error fetching employees for {director.get('torn_user_id')}: {e}")
+            summary.failure(label, started, e)
+
+    log.set_context()
+    ledger.follow_up()
+    report = ledger.report(summary)
+    if report:
+        send_discord_message(report)
 
-    print(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
+    log.info(f"Cron job completed at {datetime.now(timezone.utc).isoformat()}")
     return {"statusCode": 200, "body": "Cron job executed successfully"}
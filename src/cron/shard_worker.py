@@ -0,0 +1,38 @@
+import importlib
+import json
+from utils.metrics import instrumented  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
+# Ledger stage -> populate cron module whose handler processes a shard
+JOBS = {
+    "employees": "populate_employees",
+    "company": "populate_company",
+    "company_stock": "populate_company_stock",
+    "company_financials": "populate_company_financials",
+    "education": "populate_director_education",
+    "stocks": "populate_director_stock_blocks",
+}
+
+
+@instrumented
+def lambda_handler(event, context):
+    """
+    Run one shard of a fanned-out populate cron (see utils/fanout.py).
+    Takes SQS messages from CronShardQueue, or a shard body directly when a
+    shard re-invokes this function to finish after running short of time.
+    """
+    shards = [json.loads(record["body"]) for record in event["Records"]] if "Records" in event else [event]
+    for shard in shards:
+        stage = shard.get("stage")
+        if stage not in JOBS:
+            log.error(f"Unknown cron shard stage: {stage}")
+            continue
+        log.info(f"Run {shard.get('run_id')} ({stage}): shard of {len(shard.get('director_ids', []))} directors")
+        handler = importlib.import_module(JOBS[stage]).lambda_handler
+        result = handler(shard, context)
+        if result.get("statusCode", 200) >= 500:
+            # Let SQS redeliver; the ledger skips directors this attempt finished
+            raise RuntimeError(f"{stage} shard failed: {result.get('body')}")
+    return {"statusCode": 200, "body": f"Processed {len(shards)} shard(s)"}
@@ -0,0 +1,214 @@
+import json
+import os
+import math
+import boto3
+import requests
+from supabase import create_client, Client
+from datetime import datetime, timezone
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+from financial_trends import refresh_history, compute_trends, save_trends
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
+# --- Config ---
+REGION = "ap-southeast-1"
+GSHEET_NAME = "The Hidden Leaf Corp - Reports"
+GSHEET_ID = "1MgX93FK1PduIKgtz8RqIcG9U4kZhxRFJoN0kLtrJrVU"
+TRENDS_TAB = "Company Financials - Trends"
+GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
+REPORTS_CACHE_BUCKET = os.environ.get("REPORTS_CACHE_BUCKET")
+
+# --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
+def get_secrets():
+    client = boto3.client("secretsmanager", region_name=REGION)
+
+    discord_secret = json.loads(
+        client.get_secret_value(SecretId="discord_keys")["SecretString"]
+    )
+    supabase_secret = json.loads(
+        client.get_secret_value(SecretId="supabase_keys")["SecretString"]
+    )
+    google_secret = json.loads(
+        client.get_secret_value(SecretId="google_service_account")["SecretString"]
+    )
+
+    creds_path = GOOGLE_CREDS_FILE
+    with open(creds_path, "w") as f:
+        json.dump(google_secret, f)
+
+    return {
+        "DISCORD_WEBHOOK_CHANNEL_THLC_BOT": discord_secret.get("DISCORD_WEBHOOK_CHANNEL_THLC_BOT"),
+        "SUPABASE_URL": supabase_secret.get("SUPABASE_URL"),
+        "SUPABASE_KEY": supabase_secret.get("SUPABASE_KEY"),
+        "GOOGLE_CREDS_JSON": creds_path
+    }
+
+SECRETS = get_secrets()
+
+# --- Google Sheets client ---
+def gsheets_client():
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    creds = ServiceAccountCredentials.from_json_keyfile_name(SECRETS["GOOGLE_CREDS_JSON"], scope)
+    client = gspread.authorize(creds)
+    return client
+
+# --- Fetch company names and headcount ---
+@span("fetch")
+def fetch_companies(supabase: Client) -> dict[int, dict]:
+    try:
+        rows = supabase.table("company").select("company_id, company_name, employees_hired").execute().data or []
+        return {c["company_id"]: c for c in rows}
+    except Exception as e:
+        log.error(f"Error fetching companies: {e}")
+        return {}
+
+# --- Cell helpers (NaN -> blank) ---
+def whole(value):
+    return "" if value is None or (isinstance(value, float) and math.isnan(value)) else round(value)
+
+def percent(value):
+    return "" if value is None or (isinstance(value, float) and math.isnan(value)) else round(value, 4)
+
+# --- Build trend rows for Google Sheet ---
+@span("build_report")
+def build_trends_sheet_rows(trends, companies: dict[int, dict]) -> list[list]:
+    header = [
+        "Company Name", "Revenue (7d avg)", "Revenue (30d avg)", "Profit (7d avg)",
+        "Profit (30d avg)", "Profit (last 7d)", "Profit (prev 7d)", "WoW Δ", "WoW %",
+        "Revenue / Employee (7d avg)"
+    ]
+    all_rows = [header]
+
+    for r in trends.sort_values("profit_ma7", ascending=False).to_dict("records"):
+        company = companies.get(r["company_id"], {})
+        all_rows.append([
+            company.get("company_name") or f"Company {r['company_id']}",
+            whole(r["revenue_ma7"]),
+            whole(r["revenue_ma30"]),
+            whole(r["profit_ma7"]),
+            whole(r["profit_ma30"]),
+            whole(r["profit_week"]),
+            whole(r["profit_prev_week"]),
+            whole(r["wow_delta"]),
+            percent(r["wow_pct"]),
+            whole(r["revenue_per_employee"]),
+        ])
+
+    # Empty separator row
+    all_rows.append([""] * len(header))
+
+    # As-of and timestamp rows
+    as_of = trends["as_of"].iloc[0] if not trends.empty else "-"
+    utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S TCT")
+    all_rows.append([f"Data as of: {as_of}"] + [""] * (len(header) - 1))
+    all_rows.append([f"Last Updated: {utc_now}"] + [""] * (len(header) - 1))
+
+    return all_rows
+
+# --- Write trends to Google Sheet ---
+@span("sheet_write")
+def write_trends_to_sheet(all_rows):
+    client = gsheets_client()
+    spreadsheet = client.open(GSHEET_NAME)
+
+    try:
+        sheet = spreadsheet.worksheet(TRENDS_TAB)
+    except gspread.WorksheetNotFound:
+        sheet = spreadsheet.add_worksheet(title=TRENDS_TAB, rows=100, cols=len(all_rows[0]))
+
+    sheet.clear()
+
+    num_rows = len(all_rows)
+    num_cols = len(all_rows[0])
+    end_col_letter = chr(64 + num_cols) if num_cols <= 26 else None
+    update_range = f"A1:{end_col_letter}{num_rows}" if end_col_letter else "A1"
+
+    sheet.update(update_range, all_rows)
+    sheet.freeze(rows=1, cols=1)
+
+    try:
+        sheet.format('B2:H', {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}})
+        sheet.format('I2:I', {"numberFormat": {"type": "PERCENT", "pattern": "0.0%"}})
+        sheet.format('J2:J', {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}})
+        log.info("Applied currency/percent formatting.")
+    except Exception as e:
+        log.error(f"Error formatting sheet: {e}")
+
+    return sheet._properties["sheetId"]
+
+# --- Send Google Sheet link to Discord ---
+@span("discord_send")
+def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
+    if not webhook_url:
+        log.warning("Discord webhook URL missing.")
+        return
+
+    utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
+    content = f"📈 Company Financial Trends Report is available.\n\nGenerated: {utc_now}"
+    sheet_url = f"https://docs.google.com/spreadsheets/d/{GSHEET_ID}/edit#gid={gid}"
+
+    embed = {
+        "title": sheet_name,
+        "url": sheet_url,
+        "description": content,
+        "color": 0x00ff00
+    }
+    payload = {"username": "THLC Bot", "embeds": [embed]}
+
+    try:
+        response = requests.post(webhook_url, json=payload, timeout=10)
+        if response.status_code in (200, 204):
+            log.info("Google Sheet link sent to Discord.")
+        else:
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
+    except Exception as e:
+        log.error(f"Error sending Discord message: {e}")
+
+# --- Lambda handler ---
+@instrumented
+def lambda_handler(event=None, context=None):
+    supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
+
+    # Step 1: Bring the cached history up to date (only new days are fetched)
+    try:
+        with span("fetch"):
+            history = refresh_history(supabase, REPORTS_CACHE_BUCKET)
+    except Exception as e:
+        log.error(f"Error refreshing financial history: {e}")
+        return
+
+    if history.empty:
+        log.warning("No financial history found.")
+        return
+
+    # Step 2: Compute trends for all companies at once
+    companies = fetch_companies(supabase)
+    employees_hired = {cid: c.get("employees_hired") or 0 for cid, c in companies.items()}
+    with span("compute_trends"):
+        trends = compute_trends(history, employees_hired)
+    save_trends(trends, REPORTS_CACHE_BUCKET)
+
+    # Step 3: Write to Google Sheet
+    gid = write_trends_to_sheet(build_trends_sheet_rows(trends, companies))
+
+    # Step 4: Send Discord link
+    try:
+        channels = supabase.table("discord_company_channels").select("*").execute().data
+    except Exception as e:
+        log.error(f"Error fetching discord channels: {e}")
+        return
+
+    discord_webhook_url = next(
+        (ch.get("discord_webhook_url") for ch in channels if ch.get("company_id", 0) == 0),
+        None
+    )
+
+    send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid)
+    log.info("Company financial trends report completed successfully.")
+
+if __name__ == "__main__":
+    lambda_handler()
@@ -0,0 +1,166 @@
+# src/cron/trends/financial_trends.py
+"""
+Vectorized trend analytics over the full `company_financials` history.
+
+All companies are processed at once: the daily rows are pivoted into a
+(date x company) frame and the rolling windows run column-wise, so the cost
+grows with the number of days rather than with a Python loop per company.
+"""
+import os
+import boto3
+import numpy as np
+import pandas as pd
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
+
+HISTORY_COLUMNS = ["company_id", "capture_date", "revenue", "stock_cost", "wages", "advertising", "profit"]
+METRIC_COLUMNS = ["revenue", "stock_cost", "wages", "advertising", "profit"]
+
+HISTORY_CACHE_FILE = "/tmp/company_financials_history.csv"
+HISTORY_CACHE_KEY = "financial_trends/company_financials_history.csv"
+TRENDS_CACHE_KEY = "financial_trends/company_financial_trends.csv"
+
+# Days re-fetched behind the newest cached day so late corrections are picked up
+REFRESH_OVERLAP_DAYS = 7
+
+
+# --- History cache (CSV in /tmp, durable copy in S3) ---
+def load_cached_history(bucket: str | None) -> pd.DataFrame:
+    """
+    Return the cached history frame. A warm container reuses /tmp, a cold one
+    pulls the durable copy from S3. Missing cache -> empty frame.
+    """
+    if not os.path.exists(HISTORY_CACHE_FILE) and bucket:
+        try:
+            boto3.client("s3").download_file(bucket, HISTORY_CACHE_KEY, HISTORY_CACHE_FILE)
+        except Exception as e:
+            log.warning(f"No cached history in s3://{bucket}/{HISTORY_CACHE_KEY}: {e}")
+
+    if not os.path.exists(HISTORY_CACHE_FILE):
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    return normalize_history(pd.read_csv(HISTORY_CACHE_FILE))
+
+
+def save_history(history: pd.DataFrame, bucket: str | None):
+    history.to_csv(HISTORY_CACHE_FILE, index=False)
+    if bucket:
+        try:
+            boto3.client("s3").upload_file(HISTORY_CACHE_FILE, bucket, HISTORY_CACHE_KEY)
+        except Exception as e:
+            log.error(f"Error uploading history cache: {e}")
+
+
+def save_trends(trends: pd.DataFrame, bucket: str | None):
+    """Persist the computed trends table as a CSV artifact next to the history."""
+    if not bucket:
+        return
+    try:
+        boto3.client("s3").put_object(
+            Bucket=bucket,
+            Key=TRENDS_CACHE_KEY,
+            Body=trends.to_csv(index=False).encode("utf-8"),
+            ContentType="text/csv",
+        )
+    except Exception as e:
+        log.error(f"Error uploading trends artifact: {e}")
+
+
+def normalize_history(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    df = df[HISTORY_COLUMNS].copy()
+    df["capture_date"] = pd.to_datetime(df["capture_date"]).dt.normalize()
+    df["company_id"] = df["company_id"].astype("int64")
+    df[METRIC_COLUMNS] = df[METRIC_COLUMNS].fillna(0).astype("int64")
+    return df
+
+
+# --- Incremental fetch ---
+def fetch_financials_since(supabase, since_date: str | None) -> pd.DataFrame:
+    """Fetch `company_financials` rows on/after `since_date` (all rows if None)."""
+    rows = stream_rows(
+        supabase, "company_financials", ", ".join(HISTORY_COLUMNS),
+        where=lambda q: q.gte("capture_date", since_date) if since_date else q,
+    )
+    return normalize_history(pd.DataFrame(rows, columns=HISTORY_COLUMNS))
+
+
+def refresh_history(supabase, bucket: str | None) -> pd.DataFrame:
+    """
+    Merge newly captured days into the cached history. Only the days after the
+    newest cached day (minus an overlap for late corrections) are fetched.
+    """
+    cached = load_cached_history(bucket)
+
+    since = None
+    if not cached.empty:
+        since = (cached["capture_date"].max() - pd.Timedelta(days=REFRESH_OVERLAP_DAYS)).date().isoformat()
+
+    fresh = fetch_financials_since(supabase, since)
+    log.info(f"📥 Cached rows: {len(cached)}, fetched rows: {len(fresh)} (since {since or 'start'})")
+
+    frames = [f for f in (cached, fresh) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    history = (
+        pd.concat(frames, ignore_index=True)
+        .drop_duplicates(subset=["company_id", "capture_date"], keep="last")
+        .sort_values(["capture_date", "company_id"])
+        .reset_index(drop=True)
+    )
+    save_history(history, bucket)
+    return history
+
+
+# --- Analytics ---
+def daily_frame(history: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Pivot one metric into a (date x company) frame on a continuous daily index."""
+    wide = history.pivot_table(index="capture_date", columns="company_id", values=metric, aggfunc="sum")
+    full_range = pd.date_range(wide.index.min(), wide.index.max(), freq="D")
+    return wide.reindex(full_range)
+
+
+def compute_trends(history: pd.DataFrame, employees_hired: dict[int, int]) -> pd.DataFrame:
+    """
+    Return one row per company (as of the latest captured day) with:
+    - 7/30-day moving averages of revenue and profit
+    - this week's profit vs the previous 7 days (week-over-week delta / %)
+    - 7-day average revenue per employee
+    """
+    if history.empty:
+        return pd.DataFrame()
+
+    revenue = daily_frame(history, "revenue")
+    profit = daily_frame(history, "profit")
+
+    revenue_ma7 = revenue.rolling(7, min_periods=1).mean()
+    revenue_ma30 = revenue.rolling(30, min_periods=1).mean()
+    profit_ma7 = profit.rolling(7, min_periods=1).mean()
+    profit_ma30 = profit.rolling(30, min_periods=1).mean()
+
+    profit_week = profit.rolling(7, min_periods=1).sum()
+    profit_prev_week = profit_week.shift(7)
+    wow_delta = profit_week - profit_prev_week
+    wow_pct = wow_delta / profit_prev_week.abs().replace(0, np.nan)
+
+    staff = pd.Series(employees_hired, dtype="float64").reindex(revenue.columns).replace(0, np.nan)
+    revenue_per_employee = revenue_ma7.iloc[-1] / staff
+
+    trends = pd.DataFrame({
+        "company_id": revenue.columns,
+        "as_of": revenue.index[-1].date().isoformat(),
+        "revenue_ma7": revenue_ma7.iloc[-1].values,
+        "revenue_ma30": revenue_ma30.iloc[-1].values,
+        "profit_ma7": profit_ma7.iloc[-1].values,
+        "profit_ma30": profit_ma30.iloc[-1].values,
+        "profit_week": profit_week.iloc[-1].values,
+        "profit_prev_week": profit_prev_week.iloc[-1].values,
+        "wow_delta": wow_delta.iloc[-1].values,
+        "wow_pct": wow_pct.iloc[-1].values,
+        "revenue_per_employee": revenue_per_employee.values,
+    })
+    return trends.reset_index(drop=True)
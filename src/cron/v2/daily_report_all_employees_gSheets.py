@@ -6,6 +6,11 @@ from datetime import datetime, timezone
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Config ---
 REGION = "ap-southeast-1"
@@ -15,6 +20,7 @@ EMPLOYEES_TAB = "All Employees"
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -49,20 +55,16 @@ def gsheets_client():
     return client
 
 # --- Fetch all employees from Supabase ---
+@span("fetch")
 def fetch_employees(supabase: Client):
     try:
-        employees_query = (
-            supabase.table("employees")
-            .select(
-                "employee_name, torn_user_id, company_id, position, wage, working_stats, "
-                "effectiveness_total, allowable_addiction, manual_labor, intelligence, endurance, "
-                "addiction, inactivity, days_in_company, company:company_id(company_name)"
-            )
-            .execute()
-        )
-        employees = employees_query.data or []
-
-        for e in employees:
+        employees = []
+        for e in stream_rows(
+            supabase, "employees",
+            "employee_name, torn_user_id, company_id, position, wage, working_stats, "
+            "effectiveness_total, allowable_addiction, manual_labor, intelligence, endurance, "
+            "addiction, inactivity, days_in_company, company:company_id(company_name)",
+        ):
             e["manual_labor"] = e.get("manual_labor") or 0
             e["intelligence"] = e.get("intelligence") or 0
             e["endurance"] = e.get("endurance") or 0
@@ -73,16 +75,18 @@ def fetch_employees(supabase: Client):
             e["addiction"] = e.get("addiction") or 0
             e["inactivity"] = e.get("inactivity") or 0
             e["days_in_company"] = e.get("days_in_company") or 0
+            employees.append(e)
 
         return employees
     except Exception as e:
-        print(f"❌ Error fetching employees: {e}")
+        log.error(f"Error fetching employees: {e}")
         return []
 
 # --- Write employee data to Google Sheet ---
+@span("sheet_write")
 def write_employees_to_sheet(employees):
     if not employees:
-        print("⚠️ No employees to write to Google Sheet.")
+        log.warning("No employees to write to Google Sheet.")
         return
 
     client = gsheets_client()
@@ -142,19 +146,20 @@ def write_employees_to_sheet(employees):
                 "pattern": "$#,##0"
             }
         })
-        print("✅ Applied currency format to Wage column (F).")
+        log.info("Applied currency format to Wage column (F).")
     except Exception as e:
-        print(f"❌ Error applying format: {e}")
+        log.error(f"Error applying format: {e}")
 
-    print(f"✅ Written {len(employees)} employees to Google Sheet tab '{EMPLOYEES_TAB}'.")
+    log.info(f"Written {len(employees)} employees to Google Sheet tab '{EMPLOYEES_TAB}'.")
 
     # Return gid for the Discord link
     return sheet._properties['sheetId']
 
 # --- Send Google Sheet link to Discord ---
+@span("discord_send")
 def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
 
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
@@ -172,13 +177,14 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(url=webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord (embed).")
+            log.info("Google Sheet link sent to Discord (embed).")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
     employees = fetch_employees(supabase)
@@ -190,7 +196,7 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = next(
@@ -5,6 +5,10 @@ from supabase import create_client, Client
 from datetime import datetime, timezone
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
 GSHEET_NAME = "The Hidden Leaf Corp - Reports"
@@ -13,6 +17,7 @@ FINANCIALS_TAB = "Company Financials - Daily"
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -47,6 +52,7 @@ def gsheets_client():
     return client
 
 # --- Fetch latest financials ---
+@span("fetch")
 def fetch_latest_financials(supabase: Client):
     try:
         latest_query = (
@@ -57,7 +63,7 @@ def fetch_latest_financials(supabase: Client):
             .execute()
         )
         if not latest_query.data:
-            print("⚠️ No financial records found.")
+            log.warning("No financial records found.")
             return []
 
         latest_date = latest_query.data[0]["capture_date"]
@@ -90,13 +96,14 @@ def fetch_latest_financials(supabase: Client):
         return financials, latest_date
 
     except Exception as e:
-        print(f"❌ Error fetching financials: {e}")
+        log.error(f"Error fetching financials: {e}")
         return [], None
 
 # --- Write financials to Google Sheet ---
+@span("sheet_write")
 def write_financials_to_sheet(financials, capture_date: str):
     if not financials:
-        print("⚠️ No financials to write.")
+        log.warning("No financials to write.")
         return
 
     client = gsheets_client()
@@ -168,16 +175,17 @@ def write_financials_to_sheet(financials, capture_date: str):
     # Format numeric columns as currency
     try:
         sheet.format('C2:G', {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}})
-        print("✅ Applied currency formatting.")
+        log.info("Applied currency formatting.")
     except Exception as e:
-        print(f"❌ Error formatting sheet: {e}")
+        log.error(f"Error formatting sheet: {e}")
 
     return sheet._properties["sheetId"]
 
 # --- Send Google Sheet link to Discord ---
+@span("discord_send")
 def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
 
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
@@ -195,13 +203,14 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord.")
+            log.info("Google Sheet link sent to Discord.")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
@@ -214,7 +223,7 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = next(
@@ -223,7 +232,7 @@ def lambda_handler(event=None, context=None):
     )
 
     send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid)
-    print("✅ Company financials report completed successfully.")
+    log.info("Company financials report completed successfully.")
 
 if __name__ == "__main__":
     lambda_handler()
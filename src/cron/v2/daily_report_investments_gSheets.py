@@ -6,6 +6,11 @@ from datetime import datetime, timezone
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Config ---
 REGION = "ap-southeast-1"
@@ -15,6 +20,7 @@ INVESTMENTS_TAB = "Investments"
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -49,15 +55,14 @@ def gsheets_client():
     return client
 
 # --- Fetch all investments from Supabase ---
+@span("fetch")
 def fetch_investments(supabase: Client):
     try:
-        investments_query = (
-            supabase.table("company_investments")
-            .select("company_id, investor_name, total_invested, total_returned, company:company_id(company_name)")
-            .eq("status", "active")
-            .execute()
-        )
-        investments = investments_query.data or []
+        investments = list(stream_rows(
+            supabase, "company_investments",
+            "company_id, investor_name, total_invested, total_returned, company:company_id(company_name)",
+            where=lambda q: q.eq("status", "active"),
+        ))
 
         for inv in investments:
             inv["total_invested"] = inv.get("total_invested") or 0
@@ -65,13 +70,14 @@ def fetch_investments(supabase: Client):
 
         return investments
     except Exception as e:
-        print(f"❌ Error fetching investments: {e}")
+        log.error(f"Error fetching investments: {e}")
         return []
 
 # --- Write investment data to Google Sheet ---
+@span("sheet_write")
 def write_investments_to_sheet(investments):
     if not investments:
-        print("⚠️ No investments to write to Google Sheet.")
+        log.warning("No investments to write to Google Sheet.")
         return
 
     client = gsheets_client()
@@ -124,19 +130,20 @@ def write_investments_to_sheet(investments):
                 "pattern": "$#,##0"
             }
         })
-        print("✅ Applied currency format to columns C and D.")
+        log.info("Applied currency format to columns C and D.")
     except Exception as e:
-        print(f"❌ Error applying format: {e}")
+        log.error(f"Error applying format: {e}")
 
-    print(f"✅ Written {len(investments)} investments to Google Sheet tab '{INVESTMENTS_TAB}'.")
+    log.info(f"Written {len(investments)} investments to Google Sheet tab '{INVESTMENTS_TAB}'.")
 
     # Return gid for the Discord link
     return sheet._properties['sheetId']
 
 # --- Send Google Sheet link to Discord ---
+@span("discord_send")
 def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
 
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
@@ -154,13 +161,14 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(url=webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord (embed).")
+            log.info("Google Sheet link sent to Discord (embed).")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
     investments = fetch_investments(supabase)
@@ -172,7 +180,7 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = next(
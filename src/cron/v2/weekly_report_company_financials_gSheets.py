@@ -2,19 +2,25 @@ import json
 import boto3
 import requests
 from supabase import create_client, Client
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Config ---
 REGION = "ap-southeast-1"
 GSHEET_NAME = "The Hidden Leaf Corp - Reports"
 GSHEET_ID = "1MgX93FK1PduIKgtz8RqIcG9U4kZhxRFJoN0kLtrJrVU"
 FINANCIALS_TAB = "Company Financials - Weekly"
+WINDOW_DAYS = 7
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -54,7 +60,8 @@ def format_currency(value: int | None) -> str:
         return "-"
     return f"${value:,.0f}"
 
-# --- Build 7-day financials report for Google Sheet ---
+# --- Build aggregated financials report for Google Sheet ---
+@span("build_report")
 def build_financials_sheet_rows(aggregated_rows: list[dict]) -> list[list]:
     if not aggregated_rows:
         return []
@@ -108,9 +115,10 @@ def build_financials_sheet_rows(aggregated_rows: list[dict]) -> list[list]:
     return all_rows
 
 # --- Write to Google Sheet ---
+@span("sheet_write")
 def write_financials_to_sheet(aggregated_rows):
     if not aggregated_rows:
-        print("⚠️ No financials to write to Google Sheet.")
+        log.warning("No financials to write to Google Sheet.")
         return
 
     client = gsheets_client()
@@ -137,20 +145,21 @@ def write_financials_to_sheet(aggregated_rows):
                 "pattern": "$#,##0"
             }
         })
-        print("✅ Applied currency format to numeric columns (C → G).")
+        log.info("Applied currency format to numeric columns (C → G).")
     except Exception as e:
-        print(f"❌ Error applying format: {e}")
+        log.error(f"Error applying format: {e}")
 
     return sheet._properties['sheetId']
 
 # --- Send Google Sheet link to Discord ---
-def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
+@span("discord_send")
+def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int, window_days: int = WINDOW_DAYS):
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
 
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
-    content = f"📊 7-Day Aggregated Company Financials Report is now available.\n\nGenerated: {utc_now}"
+    content = f"📊 {window_days}-Day Aggregated Company Financials Report is now available.\n\nGenerated: {utc_now}"
     sheet_url = f"https://docs.google.com/spreadsheets/d/{GSHEET_ID}/edit#gid={gid}"
 
     embed = {
@@ -164,89 +173,59 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(url=webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord (embed).")
+            log.info("Google Sheet link sent to Discord (embed).")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
+
+# --- Fetch per-company totals for the window (aggregated in Postgres) ---
+@span("fetch")
+def fetch_window_financials(supabase: Client, window_days: int, end_date) -> list[dict]:
+    """
+    Call the `company_financials_window` RPC, which returns one row per company
+    with SUMs over the window already joined to `company`.
+    """
+    resp = supabase.rpc(
+        "company_financials_window",
+        {"p_window_days": window_days, "p_end_date": str(end_date)},
+    ).execute()
+    return resp.data or []
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
-    # Step 1: Fetch all records in the last 7 days
+    # Window length can be overridden from the invoking event, e.g. {"window_days": 30}
+    try:
+        window_days = int((event or {}).get("window_days", WINDOW_DAYS))
+    except (TypeError, ValueError):
+        window_days = 0
+    if window_days < 1:
+        log.error(f"Invalid window_days {(event or {}).get('window_days')!r}: must be a whole number of days, 1 or more")
+        return {"statusCode": 400, "body": "window_days must be 1 or more"}
     end_date = datetime.now(timezone.utc).date()
-    start_date = end_date - timedelta(days=6)
 
+    # Step 1: Fetch per-company totals for the window
     try:
-        financials_query = (
-            supabase.table("company_financials")
-            .select("company_id, revenue, stock_cost, wages, advertising, profit")
-            .gte("capture_date", str(start_date))
-            .lte("capture_date", str(end_date))
-            .execute()
-        )
-        financials = financials_query.data or []
+        merged = fetch_window_financials(supabase, window_days, end_date)
     except Exception as e:
-        print(f"❌ Error fetching financials: {e}")
+        log.error(f"Error fetching financials: {e}")
         return
 
-    if not financials:
-        print("⚠️ No financial data found for the 7-day period.")
-        return
-
-    # Step 2: Aggregate by company_id
-    aggregates = {}
-    for row in financials:
-        cid = row["company_id"]
-        if cid not in aggregates:
-            aggregates[cid] = {
-                "company_id": cid,
-                "revenue": 0,
-                "stock_cost": 0,
-                "wages": 0,
-                "advertising": 0,
-                "profit": 0,
-            }
-        aggregates[cid]["revenue"] += row.get("revenue", 0) or 0
-        aggregates[cid]["stock_cost"] += row.get("stock_cost", 0) or 0
-        aggregates[cid]["wages"] += row.get("wages", 0) or 0
-        aggregates[cid]["advertising"] += row.get("advertising", 0) or 0
-        aggregates[cid]["profit"] += row.get("profit", 0) or 0
-
-    # Step 3: Fetch company info
-    try:
-        company_ids = list(aggregates.keys())
-        companies_query = (
-            supabase.table("company")
-            .select("company_id, company_name, days_old")
-            .in_("company_id", company_ids)
-            .execute()
-        )
-        companies = {c["company_id"]: c for c in companies_query.data}
-    except Exception as e:
-        print(f"❌ Error fetching company info: {e}")
+    if not merged:
+        log.warning(f"No financial data found for the {window_days}-day period.")
         return
 
-    # Step 4: Merge into final list
-    merged = []
-    for cid, data in aggregates.items():
-        c = companies.get(cid, {})
-        merged.append({
-            "company_id": cid,
-            "company_name": c.get("company_name", f"Company {cid}"),
-            "days_old": c.get("days_old", 0),
-            **data,
-        })
-
-    # Step 5: Write to Google Sheet
+    # Step 2: Write to Google Sheet
     gid = write_financials_to_sheet(merged)
 
-    # Step 6: Send Discord link
+    # Step 3: Send Discord link
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = next(
@@ -254,9 +233,9 @@ def lambda_handler(event=None, context=None):
         None
     )
 
-    send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid)
+    send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid, window_days)
 
-    print("✅ 7-day aggregated financials report completed successfully.")
+    log.info(f"{window_days}-day aggregated financials report completed successfully.")
 
 if __name__ == "__main__":
     lambda_handler()
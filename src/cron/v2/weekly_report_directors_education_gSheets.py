@@ -6,6 +6,11 @@ from datetime import datetime, timezone
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Config ---
 REGION = "ap-southeast-1"
@@ -15,6 +20,7 @@ EDUCATION_TAB = "Director Education"
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -52,15 +58,15 @@ def gsheets_client():
     return client
 
 # --- Fetch directors and courses from Supabase ---
+@span("fetch")
 def fetch_directors_and_courses(supabase: Client):
     # Directors
-    directors_query = (
-        supabase.table("directors")
-        .select("torn_user_id, director_name, company_id, company:company(company_id, company_name, company_acronym)")
-        .eq("prospective", False)
-        .execute()
+    directors_raw = stream_rows(
+        supabase, "directors",
+        "torn_user_id, director_name, company_id, company:company(company_id, company_name, company_acronym)",
+        key="torn_user_id",
+        where=lambda q: q.eq("prospective", False),
     )
-    directors_raw = directors_query.data or []
 
     directors = []
     for d in directors_raw:
@@ -79,8 +85,10 @@ def fetch_directors_and_courses(supabase: Client):
     courses = courses_query.data or []
 
     # Completed education
-    completed_query = supabase.table("director_education").select("torn_user_id, course_id").eq("completed", True).execute()
-    completed_rows = completed_query.data or []
+    completed_rows = stream_rows(
+        supabase, "director_education", "torn_user_id, course_id",
+        where=lambda q: q.eq("completed", True),
+    )
 
     completed_map = {}
     for row in completed_rows:
@@ -92,6 +100,7 @@ def fetch_directors_and_courses(supabase: Client):
     return directors, courses
 
 # --- Write data to Google Sheet ---
+@span("sheet_write")
 def write_education_to_sheet(directors, courses):
     client = gsheets_client()
     sheet = client.open(GSHEET_NAME).worksheet(EDUCATION_TAB)
@@ -139,10 +148,11 @@ def write_education_to_sheet(directors, courses):
     return sheet._properties['sheetId']
 
 
+@span("discord_send")
 def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
     
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
@@ -167,20 +177,21 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(url=webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord (embed).")
+            log.info("Google Sheet link sent to Discord (embed).")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
 
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
     directors, courses = fetch_directors_and_courses(supabase)
     if not directors or not courses:
-        print("⚠️ No directors or courses found.")
+        log.warning("No directors or courses found.")
         return
     gid = write_education_to_sheet(directors, courses)
     
@@ -188,7 +199,7 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = None
@@ -198,11 +209,11 @@ def lambda_handler(event=None, context=None):
             break
 
     if not discord_webhook_url:
-        print("⚠️ No group ops discord webhook found.")
+        log.warning("No group ops discord webhook found.")
         return
     
     send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid)
-    print(f"✅ Directors education written to Google Sheet '{GSHEET_NAME}' tab '{EDUCATION_TAB}'.")
+    log.info(f"Directors education written to Google Sheet '{GSHEET_NAME}' tab '{EDUCATION_TAB}'.")
 
 if __name__ == "__main__":
     lambda_handler()
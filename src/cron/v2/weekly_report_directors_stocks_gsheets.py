@@ -7,6 +7,11 @@ from datetime import datetime, timezone
 import os
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Config ---
 REGION = "ap-southeast-1"
@@ -16,6 +21,7 @@ STOCKS_TAB = "Director Stocks"
 GOOGLE_CREDS_FILE = "/tmp/gCreds.json"
 
 # --- Fetch secrets from AWS Secrets Manager ---
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
 
@@ -51,24 +57,21 @@ def gsheets_client():
     return client
 
 # --- Fetch directors and stocks from Supabase ---
+@span("fetch")
 def fetch_director_stock_data(supabase: Client):
     try:
-        directors_query = (
-            supabase.table("director_stock_blocks")
-            .select(
-                "torn_user_id, shares_held, has_block, "
-                "director:directors(torn_user_id, director_name, prospective, company_id, company:company(company_id, company_name)), "
-                "stock:ref_stocks(stock_id, stock_name, stock_acronym)"
-            )
-            .execute()
+        rows = stream_rows(
+            supabase, "director_stock_blocks",
+            "torn_user_id, shares_held, has_block, "
+            "director:directors(torn_user_id, director_name, prospective, company_id, company:company(company_id, company_name)), "
+            "stock:ref_stocks(stock_id, stock_name, stock_acronym)",
         )
-        rows = directors_query.data or []
 
         # Keep only rows where director.prospective is False
         rows = [r for r in rows if not (r.get("director") or {}).get("prospective")]
 
     except Exception as e:
-        print(f"❌ Error fetching director stock data: {e}")
+        log.error(f"Error fetching director stock data: {e}")
         return [], [], []
 
     # Flatten structure into usable rows with safe defaults
@@ -107,13 +110,14 @@ def fetch_director_stock_data(supabase: Client):
         stocks_data = stocks_query.data or []
         stocks_list = sorted({s.get("stock_acronym") or "UNKNOWN" for s in stocks_data})
     except Exception as e:
-        print(f"❌ Error fetching stock acronyms: {e}")
+        log.error(f"Error fetching stock acronyms: {e}")
         # fallback: use any found in flattened
         stocks_list = sorted({d["stock_acronym"] for d in flattened if d.get("stock_acronym")})
 
     return flattened, directors_list, stocks_list
 
 # --- Build matrix rows for Google Sheet ---
+@span("build_report")
 def build_stocks_sheet_rows(flattened, directors_list, stocks_list):
     header = ["Director / Company"] + stocks_list
     all_rows = [header]
@@ -147,6 +151,7 @@ def build_stocks_sheet_rows(flattened, directors_list, stocks_list):
     return all_rows
 
 # --- Write matrix to Google Sheet ---
+@span("sheet_write")
 def write_stocks_to_sheet(all_rows):
     client = gsheets_client()
 
@@ -177,9 +182,10 @@ def write_stocks_to_sheet(all_rows):
     return sheet._properties.get("sheetId")
 
 # --- Send Google Sheet link to Discord ---
+@span("discord_send")
 def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     if not webhook_url:
-        print("⚠️ Discord webhook URL missing.")
+        log.warning("Discord webhook URL missing.")
         return
 
     utc_now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M TCT")
@@ -197,19 +203,20 @@ def send_discord_sheet_link(webhook_url: str, sheet_name: str, gid: int):
     try:
         response = requests.post(url=webhook_url, json=payload, timeout=10)
         if response.status_code in (200, 204):
-            print("✅ Google Sheet link sent to Discord (embed).")
+            log.info("Google Sheet link sent to Discord (embed).")
         else:
-            print(f"⚠️ Discord returned {response.status_code}: {response.text}")
+            log.warning(f"Discord returned {response.status_code}: {response.text}")
     except Exception as e:
-        print(f"❌ Error sending Discord message: {e}")
+        log.error(f"Error sending Discord message: {e}")
 
 # --- Lambda handler ---
+@instrumented
 def lambda_handler(event=None, context=None):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
     flattened, directors_list, stocks_list = fetch_director_stock_data(supabase)
     if not flattened:
-        print("⚠️ No director stock data found.")
+        log.warning("No director stock data found.")
         return
 
     all_rows = build_stocks_sheet_rows(flattened, directors_list, stocks_list)
@@ -219,7 +226,7 @@ def lambda_handler(event=None, context=None):
     try:
         channels = supabase.table("discord_company_channels").select("*").execute().data
     except Exception as e:
-        print(f"❌ Error fetching discord channels: {e}")
+        log.error(f"Error fetching discord channels: {e}")
         return
 
     discord_webhook_url = None
@@ -229,11 +236,11 @@ def lambda_handler(event=None, context=None):
             break
 
     if not discord_webhook_url:
-        print("⚠️ No group ops discord webhook found.")
+        log.warning("No group ops discord webhook found.")
         return
 
     send_discord_sheet_link(discord_webhook_url, GSHEET_NAME, gid)
-    print(f"✅ Directors stock matrix written to Google Sheet '{GSHEET_NAME}' tab '{STOCKS_TAB}'.")
+    log.info(f"Directors stock matrix written to Google Sheet '{GSHEET_NAME}' tab '{STOCKS_TAB}'.")
 
 if __name__ == "__main__":
     lambda_handler()
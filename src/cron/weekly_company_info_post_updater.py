@@ -1,11 +1,15 @@
 import json
 import boto3
-import requests
-from datetime import datetime
+from collections import defaultdict
 from supabase import create_client, Client
+from utils.discord import channel_target, send_parts  # type: ignore
+from utils.metrics import instrumented, span  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
 
 REGION = "ap-southeast-1"
-DISCORD_BASE = "https://discord.com/api/v10"
+MAX_RATING = 10
 
 
 REQUIREMENTS_TEXT = (
@@ -23,6 +27,7 @@ POLICY_TEXT = (
     "3 strikes over a 6 month period will see you ejected from The Hidden Leaf Corp."
 )
 
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
     discord_secret = json.loads(client.get_secret_value(SecretId="discord_keys")["SecretString"])
@@ -37,30 +42,51 @@ def get_secrets():
 SECRETS = get_secrets()
 
 
-def get_company_benefits(company_type: int, rating: int, supabase: Client):
-    """Return list of cumulative benefits for a company up to its rating."""
-    data = (
+@span("fetch")
+def load_benefits_index(supabase: Client) -> dict[tuple[int, int], list[str]]:
+    """
+    Load all of ref_company in one query and return an index mapping
+    (company_type, rating) -> cumulative benefits unlocked up to that rating.
+    """
+    rows = (
         supabase.table("ref_company")
-        .select("benefit_description")
-        .eq("company_type", company_type)
-        .lte("rating", rating)
+        .select("company_type, rating, benefit_description")
+        .order("company_type", desc=False)
         .order("rating", desc=False)
         .execute()
         .data
-    )
-    return [row["benefit_description"] for row in data] if data else []
+    ) or []
+
+    by_type = defaultdict(list)
+    for row in rows:
+        by_type[row["company_type"]].append(row)
 
+    index = {}
+    for company_type, type_rows in by_type.items():
+        for rating in range(MAX_RATING + 1):
+            index[(company_type, rating)] = [
+                r["benefit_description"] for r in type_rows if r["rating"] <= rating
+            ]
+    return index
+
+
+def get_company_benefits(company_type: int, rating: int, benefits_index: dict):
+    """Return list of cumulative benefits for a company up to its rating."""
+    return benefits_index.get((company_type, min(rating or 0, MAX_RATING)), [])
 
+
+@span("directors")
 def load_directors_map(supabase: Client):
     """Return dict mapping torn_user_id -> director_name"""
     try:
         rows = supabase.table("directors").select("torn_user_id,director_name").eq("prospective", False).execute().data
         return {r["torn_user_id"]: r.get("director_name") for r in rows} if rows else {}
     except Exception as e:
-        print(f"[DiscordUpdater] Error fetching directors: {e}")
+        log.error(f"Error fetching directors: {e}")
         return {}
 
 
+@span("build_report")
 def build_company_message(company, director_name, benefits):
     """Builds the Discord message text."""
     stars = "⭐" * company.get("rating", 0)
@@ -87,66 +113,68 @@ def build_company_message(company, director_name, benefits):
     return msg
 
 
-def update_discord_message(channel_id, message_id, content):
+def sync_discord_message(company, content):
+    """
+    Post or edit the company's info message. The edit is skipped when the
+    content hash matches the one stored from the last run. Returns the new
+    (message_id, hash), or (None, None) if nothing could be sent.
+    """
     headers = {
         "Authorization": f"Bot {SECRETS['DISCORD_BOT_TOKEN']}",
         "Content-Type": "application/json",
     }
-    url = f"{DISCORD_BASE}/channels/{channel_id}/messages/{message_id}"
-    payload = {"content": content}
-    r = requests.patch(url, headers=headers, json=payload, timeout=10)
-    return r.status_code, r.text
-
-
-def post_discord_message(channel_id, content):
-    headers = {
-        "Authorization": f"Bot {SECRETS['DISCORD_BOT_TOKEN']}",
-        "Content-Type": "application/json",
-    }
-    url = f"{DISCORD_BASE}/channels/{channel_id}/messages"
-    payload = {"content": content}
-    r = requests.post(url, headers=headers, json=payload, timeout=10)
-    return r.status_code, r.json() if r.ok else r.text
+    previous = [{"id": company.get("discord_message_id"), "hash": company.get("discord_message_hash")}]
+    state = send_parts([{"content": content}], channel_target(company["discord_channel_id"]), previous, headers)
+    return state[0]["id"], state[0]["hash"]
 
 
+@instrumented
 def lambda_handler(event, context):
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
 
-    # Preload director names
+    # Preload director names and the benefits index
     directors_map = load_directors_map(supabase)
 
+    try:
+        benefits_index = load_benefits_index(supabase)
+    except Exception as e:
+        log.error(f"Error fetching ref_company: {e}")
+        return {"statusCode": 500, "body": "Failed to fetch ref_company"}
+
     try:
         companies = supabase.table("company").select("*").execute().data
     except Exception as e:
-        print(f"[DiscordUpdater] Error fetching companies: {e}")
+        log.error(f"Error fetching companies: {e}")
         return {"statusCode": 500, "body": "Failed to fetch companies"}
 
     for company in companies:
         company_id = company["company_id"]
-        print(f"[DiscordUpdater] Processing company {company_id} ({company['company_name']})")
+        log.info(f"Processing company {company_id} ({company['company_name']})")
 
         channel_id = company.get("discord_channel_id")
         if not channel_id:
-            print(f"[DiscordUpdater] No Discord channel for {company_id}")
+            log.info(f"No Discord channel for {company_id}")
             continue
 
         director_name = directors_map.get(company.get("torn_user_id"))
-        benefits = get_company_benefits(company["company_type"], company.get("rating", 0), supabase)
+        benefits = get_company_benefits(company["company_type"], company.get("rating", 0), benefits_index)
         content = build_company_message(company, director_name, benefits)
 
-        message_id = company.get("discord_message_id")
-
-        if message_id:
-            status, result = update_discord_message(channel_id, message_id, content)
-            print(f"[DiscordUpdater] Updated message {message_id}: {status}")
-        else:
-            status, resp = post_discord_message(channel_id, content)
-            if status in (200, 201):
-                msg_id = resp["id"]
-                supabase.table("company").update({"discord_message_id": msg_id}).eq("company_id", company_id).execute()
-                print(f"[DiscordUpdater] Created new message for {company_id}: {msg_id}")
-            else:
-                print(f"[DiscordUpdater] Failed to post for {company_id}: {resp}")
-
-    print("[DiscordUpdater] Completed successfully.")
+        old_id = company.get("discord_message_id")
+        old_hash = company.get("discord_message_hash")
+        msg_id, msg_hash = sync_discord_message(company, content)
+
+        if not msg_id:
+            log.error(f"Failed to post for {company_id}")
+            continue
+        if str(msg_id) == str(old_id) and msg_hash == old_hash:
+            log.info(f"Message {msg_id} unchanged, skipped")
+            continue
+
+        supabase.table("company").update(
+            {"discord_message_id": msg_id, "discord_message_hash": msg_hash}
+        ).eq("company_id", company_id).execute()
+        log.info(f"{'Updated' if str(msg_id) == str(old_id) else 'Created'} message for {company_id}: {msg_id}")
+
+    log.info("Completed successfully.")
     return {"statusCode": 200, "body": "Discord updater completed"}
@@ -26,3 +26,7 @@ ADD COLUMN rating integer DEFAULT 0,
 ADD COLUMN discord_message_id BIGINT,
 ADD COLUMN discord_channel_id BIGINT,
 ADD COLUMN custom_msg_1 TEXT;
+
+-- Hash of the content last posted to discord_message_id (weekly updater skips unchanged posts)
+ALTER TABLE public.company
+ADD COLUMN discord_message_hash TEXT;
@@ -0,0 +1,49 @@
+-- ============================================================
+--  Function: company_financials_window
+--  Purpose: Per-company totals of company_financials over the
+--           last p_window_days days (ending on p_end_date),
+--           joined to company so reports get one row per company
+--
+--  Usage (PostgREST RPC):
+--    supabase.rpc("company_financials_window",
+--                 {"p_window_days": 7, "p_end_date": "2025-10-26"})
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION company_financials_window(
+    p_window_days INTEGER DEFAULT 7,
+    p_end_date DATE DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    company_id INTEGER,
+    company_name TEXT,
+    days_old INTEGER,
+    days_captured BIGINT,
+    revenue BIGINT,
+    stock_cost BIGINT,
+    wages BIGINT,
+    advertising BIGINT,
+    profit BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        cf.company_id,
+        COALESCE(c.company_name, 'Company ' || cf.company_id) AS company_name,
+        COALESCE(c.days_old, 0) AS days_old,
+        COUNT(*) AS days_captured,
+        COALESCE(SUM(cf.revenue), 0)::BIGINT AS revenue,
+        COALESCE(SUM(cf.stock_cost), 0)::BIGINT AS stock_cost,
+        COALESCE(SUM(cf.wages), 0)::BIGINT AS wages,
+        COALESCE(SUM(cf.advertising), 0)::BIGINT AS advertising,
+        COALESCE(SUM(cf.profit), 0)::BIGINT AS profit
+    FROM company_financials cf
+    LEFT JOIN company c
+        ON c.company_id = cf.company_id
+    WHERE cf.capture_date BETWEEN p_end_date - (p_window_days - 1) AND p_end_date
+    GROUP BY cf.company_id, c.company_name, c.days_old;
+$$;
+
+-- Range scans on capture_date across all companies
+CREATE INDEX IF NOT EXISTS idx_company_financials_capture_date
+    ON company_financials (capture_date);
@@ -0,0 +1,134 @@
+-- ============================================================
+--  Tables: company_financials_weekly / company_financials_monthly
+--  Purpose: Persisted per-company rollups of company_financials
+--           (daily granularity is company_financials itself)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS company_financials_weekly (
+    id SERIAL PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+
+    -- ISO week this rollup represents (week_start is the Monday)
+    iso_year INTEGER NOT NULL,
+    iso_week INTEGER NOT NULL,
+    week_start DATE NOT NULL,
+
+    days_captured INTEGER DEFAULT 0,
+    revenue BIGINT DEFAULT 0,
+    stock_cost BIGINT DEFAULT 0,
+    wages BIGINT DEFAULT 0,
+    advertising BIGINT DEFAULT 0,
+    profit BIGINT DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    CONSTRAINT uq_company_financials_weekly UNIQUE (company_id, week_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_financials_weekly_start
+    ON company_financials_weekly (week_start DESC);
+
+ALTER TABLE company_financials_weekly ENABLE ROW LEVEL SECURITY;
+
+
+CREATE TABLE IF NOT EXISTS company_financials_monthly (
+    id SERIAL PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+
+    -- First day of the calendar month this rollup represents
+    month_start DATE NOT NULL,
+
+    days_captured INTEGER DEFAULT 0,
+    revenue BIGINT DEFAULT 0,
+    stock_cost BIGINT DEFAULT 0,
+    wages BIGINT DEFAULT 0,
+    advertising BIGINT DEFAULT 0,
+    profit BIGINT DEFAULT 0,
+
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    CONSTRAINT uq_company_financials_monthly UNIQUE (company_id, month_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_financials_monthly_start
+    ON company_financials_monthly (month_start DESC);
+
+ALTER TABLE company_financials_monthly ENABLE ROW LEVEL SECURITY;
+
+
+-- ============================================================
+--  Function: refresh_company_financials_rollups
+--  Purpose: Re-aggregate the ISO week and calendar month that
+--           contain p_capture_date for one company.
+--           Always recomputes from company_financials, so it is
+--           idempotent and safe to call again after a late
+--           correction to any day in the period.
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION refresh_company_financials_rollups(
+    p_company_id INTEGER,
+    p_capture_date DATE
+)
+RETURNS VOID AS $$
+DECLARE
+    v_week_start DATE := date_trunc('week', p_capture_date)::DATE;
+    v_month_start DATE := date_trunc('month', p_capture_date)::DATE;
+BEGIN
+    -- Weekly
+    DELETE FROM company_financials_weekly
+    WHERE company_id = p_company_id
+      AND week_start = v_week_start;
+
+    INSERT INTO company_financials_weekly (
+        company_id, iso_year, iso_week, week_start, days_captured,
+        revenue, stock_cost, wages, advertising, profit, updated_at
+    )
+    SELECT
+        p_company_id,
+        EXTRACT(ISOYEAR FROM v_week_start)::INTEGER,
+        EXTRACT(WEEK FROM v_week_start)::INTEGER,
+        v_week_start,
+        COUNT(*),
+        COALESCE(SUM(revenue), 0),
+        COALESCE(SUM(stock_cost), 0),
+        COALESCE(SUM(wages), 0),
+        COALESCE(SUM(advertising), 0),
+        COALESCE(SUM(profit), 0),
+        NOW()
+    FROM company_financials
+    WHERE company_id = p_company_id
+      AND capture_date >= v_week_start
+      AND capture_date < v_week_start + 7
+    HAVING COUNT(*) > 0;
+
+    -- Monthly
+    DELETE FROM company_financials_monthly
+    WHERE company_id = p_company_id
+      AND month_start = v_month_start;
+
+    INSERT INTO company_financials_monthly (
+        company_id, month_start, days_captured,
+        revenue, stock_cost, wages, advertising, profit, updated_at
+    )
+    SELECT
+        p_company_id,
+        v_month_start,
+        COUNT(*),
+        COALESCE(SUM(revenue), 0),
+        COALESCE(SUM(stock_cost), 0),
+        COALESCE(SUM(wages), 0),
+        COALESCE(SUM(advertising), 0),
+        COALESCE(SUM(profit), 0),
+        NOW()
+    FROM company_financials
+    WHERE company_id = p_company_id
+      AND capture_date >= v_month_start
+      AND capture_date < (v_month_start + INTERVAL '1 month')::DATE
+    HAVING COUNT(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- One-off backfill of all existing history (safe to re-run)
+-- SELECT refresh_company_financials_rollups(company_id, capture_date)
+-- FROM company_financials;
@@ -0,0 +1,33 @@
+-- ============================================================
+--  Table: company_stock_forecast
+--  Purpose: Daily per-item sales forecast derived from the full
+--           company_stock_daily history (see src/cron/forecast)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS company_stock_forecast (
+    id SERIAL PRIMARY KEY,
+    company_id INTEGER NOT NULL,
+    item_name TEXT NOT NULL,
+
+    -- The snapshot_date the forecast was produced from
+    forecast_date DATE NOT NULL,
+
+    days_of_history INTEGER NOT NULL,       -- days of sales history used
+    ewma_daily_sales NUMERIC(12, 2),        -- deseasonalised EWMA of daily sales
+    forecast_daily_sales NUMERIC(12, 2),    -- average forecast daily sales over the horizon
+
+    in_stock INTEGER NOT NULL,
+    on_order INTEGER NOT NULL,
+    forecast_remaining_days INTEGER,        -- NULL when stock outlasts the horizon / no sales
+    depletion_date DATE,                    -- forecast_date + forecast_remaining_days
+    recommended_order INTEGER NOT NULL DEFAULT 0,
+
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    CONSTRAINT uq_company_stock_forecast UNIQUE (company_id, item_name, forecast_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_stock_forecast_date
+    ON company_stock_forecast (forecast_date DESC, company_id);
+
+ALTER TABLE company_stock_forecast ENABLE ROW LEVEL SECURITY;
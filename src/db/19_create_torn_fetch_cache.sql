@@ -0,0 +1,19 @@
+-- ============================================================
+--  Table: torn_fetch_cache
+--  Purpose: Last Torn fetch per director and selection, so crons
+--           can skip re-fetching (and re-upserting) data that
+--           rarely changes (see layers/shared/python/utils/fetch_cache.py)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS torn_fetch_cache (
+    torn_user_id BIGINT NOT NULL REFERENCES directors(torn_user_id) ON DELETE CASCADE,
+    selection TEXT NOT NULL,                -- Torn selection, e.g. 'education', 'stocks'
+
+    payload_hash TEXT NOT NULL,             -- sha256 of the data last written to Supabase
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    changed_at TIMESTAMP WITH TIME ZONE,    -- last fetch whose hash differed
+
+    PRIMARY KEY (torn_user_id, selection)
+);
+
+ALTER TABLE torn_fetch_cache ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,19 @@
+-- ============================================================
+--  Table: processed_interactions
+--  Purpose: Discord interactions the slash command worker has
+--           already handled. SQS delivers at least once; the
+--           primary key makes a redelivered message a no-op
+--           (see src/discord_bot/idempotency.py)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS processed_interactions (
+    interaction_id BIGINT PRIMARY KEY,      -- Discord interaction snowflake
+    command_name TEXT NOT NULL,
+    initiator_id BIGINT,
+    processed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_processed_interactions_processed_at
+    ON processed_interactions (processed_at);
+
+ALTER TABLE processed_interactions ENABLE ROW LEVEL SECURITY;
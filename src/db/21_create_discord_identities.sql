@@ -0,0 +1,24 @@
+-- ============================================================
+--  Table: discord_identities
+--  Purpose: Discord member -> Torn user map, parsed once from
+--           the "Name [12345]" nickname. Kept current by role
+--           sync and /register; read by the slash command
+--           handlers (see src/discord_bot/identities.py)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS discord_identities (
+    discord_user_id BIGINT PRIMARY KEY,     -- Discord user snowflake
+    torn_user_id BIGINT,                    -- NULL while the nickname has no [id]
+    nickname TEXT,
+    last_seen TIMESTAMPTZ DEFAULT NOW()     -- last time role sync or a command saw the member
+);
+
+CREATE INDEX IF NOT EXISTS idx_discord_identities_torn_user_id
+    ON discord_identities (torn_user_id);
+
+ALTER TABLE discord_identities ENABLE ROW LEVEL SECURITY;
+
+-- Guild member snapshot: roles as of the last role sync, so handlers can
+-- check a member without listing the guild
+ALTER TABLE discord_identities
+ADD COLUMN IF NOT EXISTS roles JSONB DEFAULT '[]'::jsonb;  -- role ids as strings
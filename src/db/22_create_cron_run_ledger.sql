@@ -0,0 +1,50 @@
+-- ============================================================
+--  Table: cron_run_ledger
+--  Purpose: One row per director per cron run, written as each
+--           director finishes. A retried or follow-up invocation
+--           of the same run skips directors already done
+--           (see layers/shared/python/utils/run_ledger.py)
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS cron_run_ledger (
+    run_id TEXT NOT NULL,                   -- scheduled event id, or run_id passed in the event
+    stage TEXT NOT NULL,                    -- cron, e.g. 'employees', 'education'
+    torn_user_id BIGINT NOT NULL,           -- director
+
+    status TEXT NOT NULL,                   -- 'success', 'failed', 'skipped' or 'skipped_retry'
+    seconds NUMERIC,                        -- time spent on the director (NULL when skipped)
+    note TEXT,                              -- skip reason, error or summary note
+    finished_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    PRIMARY KEY (run_id, stage, torn_user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cron_run_ledger_stage_finished_at
+    ON cron_run_ledger (stage, finished_at);
+
+ALTER TABLE cron_run_ledger ENABLE ROW LEVEL SECURITY;
+
+-- Per-run timings, e.g. SELECT * FROM cron_run_stats WHERE stage = 'employees' ORDER BY finished_at DESC;
+CREATE OR REPLACE VIEW cron_run_stats AS
+SELECT
+    run_id,
+    stage,
+    COUNT(*) FILTER (WHERE status = 'success') AS succeeded,
+    COUNT(*) FILTER (WHERE status = 'failed') AS failed,
+    COUNT(*) FILTER (WHERE status IN ('skipped', 'skipped_retry')) AS skipped,
+    ROUND(AVG(seconds), 3) AS avg_seconds,
+    MAX(seconds) AS max_seconds,
+    SUM(seconds) AS total_seconds,
+    MIN(finished_at) AS first_finished_at,
+    MAX(finished_at) AS finished_at
+FROM cron_run_ledger
+WHERE torn_user_id > 0  -- directors only, not the fan-out marker rows
+GROUP BY run_id, stage;
+
+-- Director label for summaries rebuilt from the ledger (fanned-out runs).
+-- Fanned-out runs also keep marker rows here: one per shard at
+-- torn_user_id -(index + 1) (status 'shard_planned', 'shard_queued' or
+-- 'shard_done', note = the shard's director ids), and torn_user_id 0
+-- once the run's summary has been posted.
+ALTER TABLE cron_run_ledger
+ADD COLUMN IF NOT EXISTS label TEXT;
@@ -3,6 +3,9 @@ import json
 import requests
 import boto3
 from supabase import create_client, Client
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
 
 DISCORD_API_BASE = "https://discord.com/api/v10/webhooks"
 
@@ -55,9 +58,9 @@ def handle_link_company(msg: dict):
         )
 
     # Extract webhook URL
-    print(f"msg: {msg}")
+    log.debug("Link message", message=msg)
     discord_webhook_url = msg.get("webhook_url")
-    print(f"discord_webhook_url: {discord_webhook_url}")
+    log.debug(f"discord_webhook_url: {discord_webhook_url}")
     if not discord_webhook_url and payload:
         options = payload.get("data", {}).get("options", [])
         discord_webhook_url = next(
@@ -73,12 +76,12 @@ def handle_link_company(msg: dict):
                    or (payload.get("channel", {}).get("name") if payload else None) \
                    or f"channel_{channel_id}"
     
-    print(f"company_id: {company_id}, channel_id: {channel_id}, channel_name:{channel_name}")
+    log.info(f"company_id: {company_id}, channel_id: {channel_id}, channel_name:{channel_name}")
 
     # Validation
     if not company_id or not channel_id or not discord_webhook_url:
         err = f"Missing company_id, channel_id, or webhook_url (company_id={company_id}, channel_id={channel_id}, webhook_url={discord_webhook_url})"
-        print("❌", err)
+        log.error(err)
         if interaction_token:
             send_followup(interaction_token, f"❌ {err}")
         return
@@ -98,22 +101,22 @@ def handle_link_company(msg: dict):
         resp = supabase.table("discord_company_channels").insert(row).execute()
         if resp.data:
             success_msg = f"✅ Linked company `{company_id}` to channel <#{channel_id}> (webhook stored)"
-            print(success_msg)
+            log.info(success_msg)
             if interaction_token:
                 send_followup(interaction_token, success_msg)
         else:
-            print(f"Insert completed for company {company_id}, no new data returned.")
+            log.info(f"Insert completed for company {company_id}, no new data returned.")
 
     except Exception as e:
         err_str = str(e)
         if "duplicate key value violates unique constraint" in err_str:
             warning_msg = f"⚠️ Company `{company_id}` is already linked to channel <#{channel_id}>"
-            print(warning_msg)
+            log.warning(warning_msg)
             if interaction_token:
                 send_followup(interaction_token, warning_msg)
         else:
             err_msg = f"❌ Error linking company `{company_id}`: {e}"
-            print(err_msg)
+            log.error(err_msg)
             if interaction_token:
                 send_followup(interaction_token, err_msg)
 
@@ -123,12 +126,12 @@ def send_followup(interaction_token: str, content: str):
     Send a follow-up using the interaction token (webhook URL).
     """
     if not SECRETS.get("DISCORD_APPLICATION_ID"):
-        print("DISCORD_APPLICATION_ID missing; cannot send follow-up.")
+        log.warning("DISCORD_APPLICATION_ID missing; cannot send follow-up.")
         return
 
     try:
         webhook_url = f"{DISCORD_API_BASE}/{SECRETS['DISCORD_APPLICATION_ID']}/{interaction_token}"
         r = requests.post(webhook_url, json={"content": content}, timeout=5)
-        print("Follow-up message sent:", r.status_code, r.content)
+        log.info("Follow-up message sent", status=r.status_code, body=r.content)
     except Exception as e:
-        print("Error sending follow-up to Discord:", e)
+        log.error(f"Error sending follow-up to Discord: {e}")
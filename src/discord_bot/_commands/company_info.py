@@ -1,9 +1,12 @@
 # src/discord_bot/_commands/company_info.py
 import json
 import boto3
-import requests
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.discord import content_payloads, send_parts, webhook_target  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
 
 # --- Secrets ---
 def get_secrets():
@@ -36,7 +39,7 @@ def handle_company_info(msg):
             "company_acronym, company_name, last_updated"
         ).order("company_acronym", desc=False).execute()
     except Exception as e:
-        print(f"⚠️ Supabase query failed: {e}")
+        log.warning(f"Supabase query failed: {e}")
         return send_followup(payload, "🚫 Failed to fetch company data.")
 
     companies = resp.data or []
@@ -68,26 +71,20 @@ def handle_company_info(msg):
 
 
 def send_followup(payload, content: str, edit_original: bool = True) -> str | None:
+    """
+    Send `content` as the interaction response. Content over Discord's 2,000
+    character limit is split into parts (code blocks stay intact): the first
+    part edits the original response, the rest are posted as follow-ups.
+    """
     token = payload.get("token")
     app_id = SECRETS["DISCORD_APPLICATION_ID"]
 
-    if edit_original:
-        url = f"https://discord.com/api/webhooks/{app_id}/{token}/messages/@original"
-        method = "patch"
-    else:
-        url = f"https://discord.com/api/webhooks/{app_id}/{token}"
-        method = "post"
-
+    target = webhook_target(f"https://discord.com/api/webhooks/{app_id}/{token}")
+    previous = [{"id": "@original", "hash": None}] if edit_original else None
     headers = {"Content-Type": "application/json"}
-    body = {"content": content}
 
-    try:
-        r = requests.request(method, url, headers=headers, json=body)
-        if r.status_code in [200, 201]:
-            return r.json().get("id")
-        else:
-            print(f"⚠️ Discord follow-up failed: {r.status_code}, {r.text}")
-            return None
-    except Exception as e:
-        print(f"⚠️ Discord follow-up exception: {e}")
-        return None
\ No newline at end of file
+    state = send_parts(content_payloads(content), target, previous=previous, headers=headers)
+    if not state or not state[0]["id"]:
+        log.warning("Discord follow-up failed")
+        return None
+    return state[0]["id"]
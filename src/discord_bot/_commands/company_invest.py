@@ -1,10 +1,13 @@
 # src/discord_bot/_commands/company_invest.py
 import json
-import re
 import boto3
 import requests
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.log import get_logger  # type: ignore
+from identities import torn_id_for
+
+log = get_logger(__name__)
 
 # --- Secrets ---
 def get_secrets():
@@ -49,7 +52,9 @@ def handle_company_invest(msg):
 
     if delegate_option:
         delegate_discord_id = delegate_option["value"]
-        delegate_member = payload["data"]["resolved"]["members"].get(delegate_discord_id)
+        # Only trust roles Discord resolved with this interaction: the stored
+        # snapshot can be a day old, too stale to authorize a delegate
+        delegate_member = payload["data"].get("resolved", {}).get("members", {}).get(delegate_discord_id)
         if not delegate_member:
             return send_followup(payload, f"🚫 Could not resolve delegate <@{delegate_discord_id}>")
 
@@ -57,18 +62,17 @@ def handle_company_invest(msg):
         if not delegate_roles.intersection(ALLOWED_DELEGATORS):
             return send_followup(payload, f"🚫 Delegate <@{delegate_discord_id}> is not allowed to act as investor.")
 
-        delegate_nick = delegate_member.get("nick") or delegate_member["user"]["username"]
-        match = re.search(r"\[(\d+)\]", delegate_nick)
-        if not match:
+        delegate_nick = delegate_member.get("nick") or delegate_member.get("user", {}).get("username")
+        delegate_torn_id = torn_id_for(delegate_discord_id, delegate_nick)
+        if not delegate_torn_id:
             return send_followup(payload, f"🚫 Could not extract Torn ID from delegate {delegate_discord_id}")
-        initiator_id = int(match.group(1))
+        initiator_id = delegate_torn_id
         initiator_name = delegate_nick
     else:
         # No delegate, use the command issuer
-        match = re.search(r"\[(\d+)\]", user_nick or "")
-        if not match:
+        initiator_id = torn_id_for(member_info["user"]["id"], user_nick)
+        if not initiator_id:
             return send_followup(payload, f"⚠️ Could not extract Torn user ID from `{user_nick}`")
-        initiator_id = int(match.group(1))
         initiator_name = user_nick
 
     # --- Extract other command options ---
@@ -84,7 +88,7 @@ def handle_company_invest(msg):
     except (TypeError, ValueError):
         return send_followup(payload, f"🚫 Invalid amount: `{amount}`. Must be a number.")
 
-    print(f"[INFO] {initiator_name} ({initiator_id}) investing {amount} to {acronym} under note '{note}'")
+    log.info(f"{initiator_name} ({initiator_id}) investing {amount} to {acronym} under note '{note}'")
 
     # Lookup company by acronym
     try:
@@ -170,8 +174,8 @@ def send_followup(payload, content: str, edit_original: bool = True) -> str | No
         if r.status_code in [200, 201]:
             return r.json().get("id")
         else:
-            print(f"⚠️ Discord follow-up failed: {r.status_code}, {r.text}")
+            log.warning(f"Discord follow-up failed: {r.status_code}, {r.text}")
             return None
     except Exception as e:
-        print(f"⚠️ Discord follow-up exception: {e}")
+        log.warning(f"Discord follow-up exception: {e}")
         return None
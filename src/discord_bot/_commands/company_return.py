@@ -1,10 +1,13 @@
 # src/discord_bot/_commands/company_return.py
 import json
-import re
 import boto3
 import requests
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.log import get_logger  # type: ignore
+from identities import torn_id_for
+
+log = get_logger(__name__)
 
 # --- Secrets ---
 def get_secrets():
@@ -56,7 +59,9 @@ def handle_company_return(msg):
     delegate_option = next((opt for opt in options if opt["name"] == "delegate"), None)
     if delegate_option:
         delegate_discord_id = delegate_option["value"]
-        delegate_member = payload["data"]["resolved"]["members"].get(delegate_discord_id)
+        # Only trust roles Discord resolved with this interaction: the stored
+        # snapshot can be a day old, too stale to authorize a delegate
+        delegate_member = payload["data"].get("resolved", {}).get("members", {}).get(delegate_discord_id)
         if not delegate_member:
             return send_followup(payload, f"🚫 Could not resolve delegate <@{delegate_discord_id}>")
 
@@ -65,24 +70,23 @@ def handle_company_return(msg):
         if not delegate_roles.intersection(ALLOWED_DELEGATORS):
             return send_followup(payload, f"🚫 <@{delegate_discord_id}> is not allowed to be a delegate.")
 
-        delegate_nick = delegate_member.get("nick") or delegate_member["user"]["username"]
-        match = re.search(r"\[(\d+)\]", delegate_nick)
-        if not match:
+        delegate_nick = delegate_member.get("nick") or delegate_member.get("user", {}).get("username")
+        delegate_torn_id = torn_id_for(delegate_discord_id, delegate_nick)
+        if not delegate_torn_id:
             return send_followup(payload, f"🚫 Could not extract Torn ID from delegate {delegate_discord_id}")
 
-        investor_id = int(match.group(1))
+        investor_id = delegate_torn_id
         investor_name = delegate_nick
         initiator_id = investor_id  # for transaction initiated_by
     else:
         user_nick = payload["member"].get("nick")
-        match = re.search(r"\[(\d+)\]", user_nick or "")
-        investor_id = int(match.group(1)) if match else None
+        investor_id = torn_id_for(payload["member"]["user"]["id"], user_nick)
         if not investor_id:
             return send_followup(payload, f"⚠️ Could not extract Torn user ID from `{user_nick}`")
         investor_name = user_nick
         initiator_id = investor_id
 
-    print(f"[INFO] {investor_name} ({investor_id}) returning {amount} to {acronym} under note '{note}'")
+    log.info(f"{investor_name} ({investor_id}) returning {amount} to {acronym} under note '{note}'")
 
     # Lookup company by acronym
     try:
@@ -133,11 +137,11 @@ def handle_company_return(msg):
         "recorded_at": timestamp,
     }
 
-    print("[DEBUG] Inserting company_investment_transactions:", transaction_payload)
+    log.debug("Inserting company_investment_transactions", payload=transaction_payload)
     txn_resp = supabase.table("company_investment_transactions").insert(transaction_payload).execute()
 
     if not txn_resp.data:
-        print(f"[ERROR] Failed to insert company_investment_transactions: {txn_resp}")
+        log.error(f"Failed to insert company_investment_transactions: {txn_resp}")
         return send_followup(payload, "⚠️ Failed to record return transaction.")
 
     # 3️⃣ Send follow-up message to Discord
@@ -169,8 +173,8 @@ def send_followup(payload, content: str, edit_original: bool = True) -> str | No
         if r.status_code in [200, 201]:
             return r.json().get("id")
         else:
-            print(f"⚠️ Discord follow-up failed: {r.status_code}, {r.text}")
+            log.warning(f"Discord follow-up failed: {r.status_code}, {r.text}")
             return None
     except Exception as e:
-        print(f"⚠️ Discord follow-up exception: {e}")
+        log.warning(f"Discord follow-up exception: {e}")
         return None
@@ -1,5 +1,9 @@
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
 def handle_ping(payload):
-    print(f"payload: {payload}")
+    log.debug("Ping payload", payload=payload)
     return {
         "type": 4,
         "data": {
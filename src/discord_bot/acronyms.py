@@ -0,0 +1,58 @@
+# src/discord_bot/acronyms.py
+import os
+import time
+from supabase import create_client, Client
+from utils.secrets import get_secrets  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
+TTL_SECONDS = float(os.environ.get("ACRONYM_INDEX_TTL", "300"))
+MAX_CHOICES = 25  # Discord rejects autocomplete responses with more
+
+_index: list[tuple[str, str]] = []  # (acronym, company name), sorted by acronym
+_loaded_at = 0.0  # unset until a load succeeds, even one returning no companies
+_supabase: Client | None = None
+
+
+def _client() -> Client:
+    global _supabase
+    if _supabase is None:
+        secrets = get_secrets(["supabase_keys"])
+        _supabase = create_client(secrets["SUPABASE_URL"], secrets["SUPABASE_KEY"])
+    return _supabase
+
+
+def _refresh():
+    global _index, _loaded_at
+    if _loaded_at and time.monotonic() - _loaded_at < TTL_SECONDS:
+        return
+    try:
+        rows = _client().table("company").select("company_acronym, company_name").execute().data or []
+    except Exception as e:
+        # Keep answering from the previous index; retry on the next keystroke
+        log.error(f"Could not load company acronyms: {e}")
+        return
+    _index = sorted(
+        (row["company_acronym"].upper(), row.get("company_name") or "")
+        for row in rows
+        if row.get("company_acronym")
+    )
+    _loaded_at = time.monotonic()
+    log.debug("Company acronym index loaded", companies=len(_index))
+
+
+def suggest(text: str) -> list[dict]:
+    """
+    Autocomplete choices for a partly typed acronym: acronyms starting with
+    the text first, then acronyms or company names containing it. Served from
+    a per-container index reloaded from the company table every TTL_SECONDS.
+    """
+    _refresh()
+    text = (text or "").strip().upper()
+    prefix = [c for c in _index if c[0].startswith(text)]
+    rest = [c for c in _index if not c[0].startswith(text) and (text in c[0] or text in c[1].upper())]
+    return [
+        {"name": f"{acronym} - {name}"[:100] if name else acronym, "value": acronym}
+        for acronym, name in (prefix + rest)[:MAX_CHOICES]
+    ]
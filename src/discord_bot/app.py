@@ -1,15 +1,26 @@
 import json
 import os
+import time
 import boto3
 from nacl.signing import VerifyKey              # type: ignore
 from nacl.exceptions import BadSignatureError   # type: ignore
 import roles as roles
 from _commands.ping import handle_ping
+import acronyms
+from utils.metrics import instrumented  # type: ignore
+from utils.log import get_logger  # type: ignore
 #from _commands.company_channels import handle_link_company
 
+log = get_logger(__name__)
+
 DISCORD_API_BASE = "https://discord.com/api/v10/interactions"
 
 SLASH_COMMAND_QUEUE_URL = os.environ.get("SLASH_COMMAND_QUEUE_URL")
+SLOW_COMMAND_QUEUE_URL = os.environ.get("SLOW_COMMAND_QUEUE_URL") or SLASH_COMMAND_QUEUE_URL
+
+# Commands that call Torn and write Secrets Manager go to their own queue and
+# worker, so they can't hold up quick commands like /company invest
+SLOW_COMMANDS = {"register", "chunin_register"}
 
 
 
@@ -39,7 +50,7 @@ SECRETS = get_secrets()
 
 def verify_discord_request(signature, timestamp, body):
     if not SECRETS['DISCORD_PUBLIC_KEY']:
-        print("Warning: DISCORD_PUBLIC_KEY not set")
+        log.warning("Warning: DISCORD_PUBLIC_KEY not set")
         return True
     try:
         verify_key = VerifyKey(bytes.fromhex(SECRETS['DISCORD_PUBLIC_KEY']))
@@ -48,6 +59,17 @@ def verify_discord_request(signature, timestamp, body):
     except BadSignatureError:
         return False
 
+def _focused_option(options):
+    """The option the user is typing in, searched through subcommand groups."""
+    for option in options or []:
+        if option.get("focused"):
+            return option
+        found = _focused_option(option.get("options"))
+        if found:
+            return found
+    return None
+
+@instrumented
 def lambda_handler(event, context):
     import json
     body = event.get("body", "")
@@ -62,6 +84,11 @@ def lambda_handler(event, context):
         return {"statusCode": 401, "body": "Invalid request signature"}
 
     payload = json.loads(body)
+    log.set_context(
+        interaction_id=payload.get("id"),
+        command=payload.get("data", {}).get("name"),
+        user_id=(payload.get("member") or {}).get("user", {}).get("id") or payload.get("user", {}).get("id"),
+    )
 
     # --- Handle PING ---
     if payload["type"] == 1:
@@ -71,6 +98,18 @@ def lambda_handler(event, context):
             "body": json.dumps({"type": 1})
         }
 
+    # --- Autocomplete: answered here, never queued ---
+    if payload["type"] == 4:
+        choices = []
+        focused = _focused_option(payload.get("data", {}).get("options", []))
+        if payload.get("data", {}).get("name") == "company" and focused and focused.get("name") == "acronym":
+            choices = acronyms.suggest(str(focused.get("value", "")))
+        return {
+            "statusCode": 200,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"type": 8, "data": {"choices": choices}})
+        }
+
     # --- Slash commands ---
     if payload["type"] == 2:
         data = payload.get("data", {})
@@ -208,10 +247,10 @@ def lambda_handler(event, context):
         if command_name in EPHEMERAL_COMMANDS:
             # make the initial ACK ephemeral so first follow-up is private
             defer_response = {"type": 5, "data": {"flags": 64}}
-            print(f"Deferring {command_name} as ephemeral (private).")
+            log.info(f"Deferring {command_name} as ephemeral (private).")
         else:
             defer_response = {"type": 5}
-            print(f"Deferring {command_name} as normal (public).")
+            log.info(f"Deferring {command_name} as normal (public).")
 
 
         response = {
@@ -223,15 +262,16 @@ def lambda_handler(event, context):
         # --- Push to SQS synchronously (fast) ---
         try:
             sqs_client.send_message(
-                QueueUrl=SLASH_COMMAND_QUEUE_URL,
+                QueueUrl=SLOW_COMMAND_QUEUE_URL if command_name in SLOW_COMMANDS else SLASH_COMMAND_QUEUE_URL,
                 MessageBody=json.dumps({
                     "command_name": command_name,
                     "payload": payload,
-                    "initiator_id": payload["member"]["user"]["id"]
+                    "initiator_id": payload["member"]["user"]["id"],
+                    "enqueued_at": time.time(),
                 })
             )
         except Exception as e:
-            print(f"Error pushing {command_name} payload to SQS:", e)
+            log.error(f"Error pushing {command_name} payload to SQS: {e}")
 
         return response
 
@@ -0,0 +1,63 @@
+# src/discord_bot/idempotency.py
+from collections import OrderedDict
+from supabase import create_client, Client
+from utils.secrets import get_secrets  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
+TABLE = "processed_interactions"
+LRU_SIZE = 1024  # interaction ids remembered per container
+
+_seen = OrderedDict()  # interaction_id -> None, most recent last
+_supabase: Client | None = None
+
+
+def _client() -> Client:
+    global _supabase
+    if _supabase is None:
+        secrets = get_secrets(["supabase_keys"])
+        _supabase = create_client(secrets["SUPABASE_URL"], secrets["SUPABASE_KEY"])
+    return _supabase
+
+
+def _remember(interaction_id: int):
+    _seen[interaction_id] = None
+    _seen.move_to_end(interaction_id)
+    if len(_seen) > LRU_SIZE:
+        _seen.popitem(last=False)
+
+
+def claim(interaction_id, command_name: str, initiator_id=None) -> bool:
+    """
+    Record an interaction as processed before handling it.
+    Returns True the first time an id is claimed and False for a redelivery:
+    ids this container already handled are answered from the LRU without a
+    query, others by one insert that the primary key turns into a no-op.
+
+    A message whose handler crashes after claiming is not retried, so money
+    commands run at most once. If the table can't be reached the message is
+    processed anyway, as before.
+    """
+    if not interaction_id:
+        return True
+    interaction_id = int(interaction_id)
+    if interaction_id in _seen:
+        _seen.move_to_end(interaction_id)
+        return False
+
+    row = {
+        "interaction_id": interaction_id,
+        "command_name": command_name,
+        "initiator_id": int(initiator_id) if initiator_id else None,
+    }
+    try:
+        inserted = _client().table(TABLE).upsert(
+            row, on_conflict="interaction_id", ignore_duplicates=True
+        ).execute().data
+    except Exception as e:
+        log.error(f"Could not record interaction {interaction_id}, processing anyway: {e}")
+        return True
+
+    _remember(interaction_id)
+    return bool(inserted)
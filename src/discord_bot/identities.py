@@ -0,0 +1,131 @@
+# src/discord_bot/identities.py
+import re
+from datetime import datetime, timezone
+from supabase import create_client, Client
+from utils.secrets import get_secrets  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+from utils.log import get_logger  # type: ignore
+
+log = get_logger(__name__)
+
+TABLE = "discord_identities"
+UPSERT_BATCH = 500
+
+# Members are nicknamed "Torn Name [1234567]"
+NICK_PATTERN = re.compile(r"^(.*?)\s*\[(\d+)\]")
+
+COLUMNS = "discord_user_id, torn_user_id, nickname, roles"
+
+_cache: dict[int, dict] = {}  # discord_user_id -> identity row ({} if unknown)
+_supabase: Client | None = None
+
+
+def _client() -> Client:
+    global _supabase
+    if _supabase is None:
+        secrets = get_secrets(["supabase_keys"])
+        _supabase = create_client(secrets["SUPABASE_URL"], secrets["SUPABASE_KEY"])
+    return _supabase
+
+
+def parse_nick(nick) -> tuple[str | None, int | None]:
+    """Split "Name [123]" into ("Name", 123); (None, None) if there is no [id]."""
+    match = NICK_PATTERN.search(str(nick or ""))
+    if not match:
+        return None, None
+    return match.group(1).strip() or None, int(match.group(2))
+
+
+def _row(discord_user_id, torn_user_id, nickname, roles=None) -> dict:
+    row = {
+        "discord_user_id": int(discord_user_id),
+        "torn_user_id": torn_user_id,
+        "nickname": nickname,
+        "last_seen": datetime.now(timezone.utc).isoformat(),
+    }
+    if roles is not None:
+        row["roles"] = sorted(str(r) for r in roles)  # snowflakes as strings, like Discord
+    return row
+
+
+def member(discord_user_id) -> dict | None:
+    """
+    Snapshot of one guild member ({torn_user_id, nickname, roles}) as of the
+    last role sync, without a Discord call. Cached for the life of the
+    container; None if the member is unknown or the lookup failed. Too stale
+    to authorize with: check roles from the interaction payload instead.
+    """
+    discord_user_id = int(discord_user_id)
+    if discord_user_id not in _cache:
+        try:
+            rows = _client().table(TABLE).select(COLUMNS).eq("discord_user_id", discord_user_id).execute().data
+        except Exception as e:
+            log.error(f"Identity lookup failed for {discord_user_id}: {e}")
+            return None
+        _cache[discord_user_id] = rows[0] if rows else {}
+    return _cache[discord_user_id] or None
+
+
+def torn_id_for(discord_user_id, nick=None) -> int | None:
+    """
+    Torn ID of a Discord member. The nickname on the interaction wins when it
+    carries an [id]; otherwise (no nickname, e.g. a resolved delegate without
+    one) the stored identity is used.
+    """
+    _, torn_user_id = parse_nick(nick)
+    if torn_user_id:
+        return torn_user_id
+    return (member(discord_user_id) or {}).get("torn_user_id")
+
+
+def remember(discord_user_id, torn_user_id, nickname):
+    """Store one member's identity, e.g. after /register verified it."""
+    row = _row(discord_user_id, torn_user_id, nickname)
+    try:
+        _client().table(TABLE).upsert(row, on_conflict="discord_user_id").execute()
+        _cache[row["discord_user_id"]] = {**_cache.get(row["discord_user_id"], {}), **row}
+    except Exception as e:
+        log.error(f"Could not store identity for {discord_user_id}: {e}")
+
+
+def _nick(m: dict):
+    return m.get("nick") or m["user"].get("username")
+
+
+def torn_ids(members: list[dict]) -> dict[int, int | None]:
+    """
+    {discord_user_id: torn_user_id} for a freshly listed guild. Stored
+    identities are loaded in one keyset-paged read; only members that are
+    new or whose nickname changed are re-parsed.
+    """
+    stored = {int(row["discord_user_id"]): row for row in stream_rows(_client(), TABLE, COLUMNS, key="discord_user_id")}
+    _cache.update(stored)
+    ids = {}
+    for m in members:
+        discord_user_id = int(m["user"]["id"])
+        row = stored.get(discord_user_id)
+        if row is not None and row.get("nickname") == _nick(m):
+            ids[discord_user_id] = row.get("torn_user_id")
+        else:
+            ids[discord_user_id] = parse_nick(_nick(m))[1]
+    return ids
+
+
+def save_members(members: list[dict]):
+    """
+    Refresh the stored member snapshot from a guild listing, writing only
+    members whose nickname or roles differ from what is stored. Call after
+    torn_ids(), which loads the stored rows.
+    """
+    changed = []
+    for m in members:
+        discord_user_id = int(m["user"]["id"])
+        row = _cache.get(discord_user_id) or {}
+        roles = sorted(str(r) for r in m.get("roles", []))
+        if row.get("nickname") != _nick(m) or sorted(str(r) for r in row.get("roles") or []) != roles:
+            changed.append(_row(discord_user_id, parse_nick(_nick(m))[1], _nick(m), roles))
+
+    for i in range(0, len(changed), UPSERT_BATCH):
+        _client().table(TABLE).upsert(changed[i:i + UPSERT_BATCH], on_conflict="discord_user_id").execute()
+    _cache.update({row["discord_user_id"]: row for row in changed})
+    log.info(f"Member snapshot: {len(changed)} new or changed of {len(members)} members")
@@ -1,13 +1,16 @@
 # src/discord_bot/register_worker.py
 import json
-import re
 import requests
 import boto3
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.log import get_logger  # type: ignore
+from utils.keystore import put_api_key  # type: ignore
+from identities import parse_nick, remember
+
+log = get_logger(__name__)
 
 DISCORD_API_BASE = "https://discord.com/api/v10/webhooks"  # follow-up endpoint
-SECRET_NAME = "torn_director_api_keys"
 REGION = "ap-southeast-1"
 
 def get_secrets():
@@ -35,44 +38,11 @@ SECRETS = get_secrets()
 
 def upsert_director_api_key(director_name: str, director_id: int, api_key: str) -> str:
     """
-    Create or update a director's API key inside the shared JSON secret.
-    - Creates the secret if it doesn't exist.
-    - Updates only the calling director's entry if it does.
-    - Keeps other directors' keys intact.
+    Store a director's API key in its own secret (see utils.keystore).
     Returns the key reference string stored in Supabase.
     """
-    client = boto3.client("secretsmanager", region_name=REGION)
     key_ref = f"{director_name}_{director_id}"
-
-    try:
-        # Load existing JSON from the secret
-        secret_value = client.get_secret_value(SecretId=SECRET_NAME)
-        secret_dict = json.loads(secret_value["SecretString"])
-    except client.exceptions.ResourceNotFoundException:
-        # Secret does not exist yet → create from scratch
-        secret_dict = {}
-
-    # Upsert this director's entry
-    secret_dict[key_ref] = api_key
-    secret_string = json.dumps(secret_dict)
-
-    try:
-        # Create fresh if missing
-        client.create_secret(
-            Name=SECRET_NAME,
-            SecretString=secret_string,
-            Description="Torn director API keys",
-            AddReplicaRegions=[{"Region": "ap-southeast-2"}],
-        )
-        print(f"Secret {SECRET_NAME} created with {key_ref}")
-    except client.exceptions.ResourceExistsException:
-        # Update if it already exists
-        client.update_secret(
-            SecretId=SECRET_NAME,
-            SecretString=secret_string,
-        )
-        print(f"Secret {SECRET_NAME} updated with {key_ref}")
-
+    put_api_key(key_ref, api_key)
     return key_ref
 
 
@@ -87,8 +57,7 @@ def process_register(payload):
     interaction_token = payload["token"]
 
     # Extract Torn user ID
-    match = re.search(r"\[(\d+)\]", user_nick)
-    torn_user_id = int(match.group(1)) if match else None
+    _, torn_user_id = parse_nick(user_nick)
 
     content = ""
     try:
@@ -125,6 +94,7 @@ def process_register(payload):
             # THIS NEEDS TO BE FLIPPED TO == WHEN READY
             if director_id == torn_user_id:
                 supabase.table("directors").upsert(director_data, on_conflict="torn_user_id").execute()
+                remember(payload["member"]["user"]["id"], torn_user_id, user_nick)
                 content = f"Company director: {director_data}"
             else:
                 content = "You are not a company director"
@@ -137,8 +107,8 @@ def process_register(payload):
         webhook_url = f"{DISCORD_API_BASE}/{SECRETS['DISCORD_APPLICATION_ID']}/{interaction_token}"
         try:
             r = requests.post(webhook_url, json={"content": content}, timeout=5)
-            print("Follow-up message sent:", r.status_code, r.content)
+            log.info("Follow-up message sent", status=r.status_code, body=r.content)
         except Exception as e:
-            print("Error sending follow-up to Discord:", e)
+            log.error(f"Error sending follow-up to Discord: {e}")
     else:
-        print("DISCORD_APPLICATION_ID missing, cannot send follow-up")
+        log.warning("DISCORD_APPLICATION_ID missing, cannot send follow-up")
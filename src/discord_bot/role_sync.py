@@ -1,20 +1,33 @@
 import json
-import re
-import time
 import boto3
 import requests
 import roles as roles
+import identities
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from utils.metrics import instrumented, span  # type: ignore
+from utils.discord import discord_request  # type: ignore
+from utils.run_ledger import DEADLINE_MARGIN, MAX_CONTINUATIONS  # type: ignore
+from utils.log import get_logger  # type: ignore
+from utils.pages import stream_rows  # type: ignore
+
+log = get_logger(__name__)
 
 # ---------- CONFIG ----------
 REGION = "ap-southeast-1"
 DISCORD_BASE = "https://discord.com/api/v10"
 GUILD_ID = "1419520053971517633"
 CHUNIN_ROLE_ID = roles.ROLE_CHUNIN
+JONIN_ROLE_ID = roles.ROLE_JONIN
+# Roles this job owns: members gain and lose them to match Supabase.
+# Every other role a member holds is left alone. Jonin is granted to
+# directors but never removed: admins and Hokage hold it without a
+# directors row, and it is also handed out by hand.
+MANAGED_ROLES = {CHUNIN_ROLE_ID} | set(roles.COMPANY_ADMIN_ROLES.values())
 DRY_RUN = False  # ⬅️ Toggle this to False to go live
 
 # ---------- Secrets ----------
+@span("secrets")
 def get_secrets():
     client = boto3.client("secretsmanager", region_name=REGION)
     discord_secret = json.loads(client.get_secret_value(SecretId="discord_keys")["SecretString"])
@@ -29,17 +42,31 @@ def get_secrets():
 SECRETS = get_secrets()
 
 # ---------- Supabase ----------
+@span("fetch")
 def get_employees():
-    print("[INFO] Fetching employees from Supabase...")
+    log.info("Fetching employees from Supabase...")
     supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
-    data = supabase.table("employees").select("torn_user_id, employee_name").execute().data
-    employees = {str(emp["torn_user_id"]) for emp in data}
-    print(f"[INFO] Retrieved {len(employees)} employees.")
+    employees = {str(emp["torn_user_id"]) for emp in stream_rows(supabase, "employees", "torn_user_id")}
+    log.info(f"Retrieved {len(employees)} employees.")
     return employees
 
+@span("directors")
+def get_directors():
+    """{torn_user_id: company_id} for registered (non-prospective) directors."""
+    log.info("Fetching directors from Supabase...")
+    supabase: Client = create_client(SECRETS["SUPABASE_URL"], SECRETS["SUPABASE_KEY"])
+    directors = {
+        str(d["torn_user_id"]): d.get("company_id")
+        for d in stream_rows(supabase, "directors", "torn_user_id, company_id, prospective", key="torn_user_id")
+        if not d.get("prospective")
+    }
+    log.info(f"Retrieved {len(directors)} directors.")
+    return directors
+
 # ---------- Discord ----------
+@span("discord_members")
 def get_discord_members():
-    print("[INFO] Fetching Discord members...")
+    log.info("Fetching Discord members...")
     headers = {"Authorization": f"Bot {SECRETS['DISCORD_BOT_TOKEN']}"}
     members = []
     after = None
@@ -49,7 +76,7 @@ def get_discord_members():
             url += f"&after={after}"
         resp = requests.get(url, headers=headers)
         if resp.status_code != 200:
-            print(f"[ERROR] Discord API error: {resp.status_code} - {resp.text}")
+            log.error(f"Discord API error: {resp.status_code} - {resp.text}")
             break
         batch = resp.json()
         if not batch:
@@ -58,99 +85,154 @@ def get_discord_members():
         after = batch[-1]["user"]["id"]
         if len(batch) < 1000:
             break
-    print(f"[INFO] Retrieved {len(members)} Discord members.")
+    log.info(f"Retrieved {len(members)} Discord members.")
     return members
 
 # ---------- Role Management ----------
-def add_role(user_id):
-    headers = {
-        "Authorization": f"Bot {SECRETS['DISCORD_BOT_TOKEN']}",
-        "Content-Type": "application/json",
-    }
-    url = f"{DISCORD_BASE}/guilds/{GUILD_ID}/members/{user_id}/roles/{CHUNIN_ROLE_ID}"
-    resp = requests.put(url, headers=headers)
-    if resp.status_code in [204, 200]:
-        print(f"[SUCCESS] Added Chunin role to {user_id}")
-    else:
-        print(f"[ERROR] Failed to add Chunin role to {user_id}: {resp.status_code} - {resp.text}")
-
-def remove_role(user_id):
+def desired_roles(torn_id, employees, directors):
+    """The managed roles a member should hold; none when unverified."""
+    if not torn_id:
+        return set()
+    wanted = set()
+    if str(torn_id) in employees:
+        wanted.add(CHUNIN_ROLE_ID)
+    if str(torn_id) in directors:
+        wanted.add(JONIN_ROLE_ID)
+        admin_role = roles.COMPANY_ADMIN_ROLES.get(directors[str(torn_id)])
+        if admin_role:
+            wanted.add(admin_role)
+    return wanted
+
+@span("set_roles")
+def set_roles(user_id, to_add, to_remove):
+    """
+    Apply a role change in one call. The PATCH replaces the whole role list,
+    so the member is re-read first and the change applied to the roles they
+    hold now, not the list fetched at the start of the run. discord_request
+    waits out 429s and empty rate-limit buckets, so no fixed delay is needed.
+    Returns the member's new role ids, or None on failure.
+    """
     headers = {
         "Authorization": f"Bot {SECRETS['DISCORD_BOT_TOKEN']}",
         "Content-Type": "application/json",
     }
-    url = f"{DISCORD_BASE}/guilds/{GUILD_ID}/members/{user_id}/roles/{CHUNIN_ROLE_ID}"
-    resp = requests.delete(url, headers=headers)
-    if resp.status_code in [204, 200]:
-        print(f"[SUCCESS] Removed Chunin role from {user_id}")
-    else:
-        print(f"[ERROR] Failed to remove Chunin role from {user_id}: {resp.status_code} - {resp.text}")
+    url = f"{DISCORD_BASE}/guilds/{GUILD_ID}/members/{user_id}"
+    resp = discord_request("get", url, headers=headers)
+    if resp is None or resp.status_code != 200:
+        log.error(f"Failed to read roles of {user_id}: {getattr(resp, 'status_code', None)} - {getattr(resp, 'text', '')}")
+        return None
+    current = {int(r) for r in resp.json().get("roles", [])}
+    new_roles = (current - to_remove) | to_add
+    if new_roles == current:
+        log.debug(f"[SKIP] Roles of {user_id} already up to date")
+        return current
+
+    body = {"roles": [str(r) for r in sorted(new_roles)]}
+    resp = discord_request("patch", url, headers=headers, json=body)
+    if resp is not None and resp.status_code in [204, 200]:
+        log.debug(f"[SUCCESS] Updated roles of {user_id}")
+        return new_roles
+    log.error(f"Failed to update roles of {user_id}: {getattr(resp, 'status_code', None)} - {getattr(resp, 'text', '')}")
+    return None
+
+def out_of_time(context) -> bool:
+    """True once the invocation is within DEADLINE_MARGIN seconds of its timeout."""
+    return context is not None and context.get_remaining_time_in_millis() < DEADLINE_MARGIN * 1000
+
+def follow_up(event, context, applied: int) -> bool:
+    """
+    Invoke this function again, asynchronously, to apply the changes left
+    when the deadline stopped this run. The next run recomputes the changes
+    from scratch, so members already patched are not touched again.
+    """
+    continuation = int((event or {}).get("continuation", 0))
+    if not applied or continuation >= MAX_CONTINUATIONS:
+        log.warning("Role changes left unapplied, not continuing")
+        return False
+    try:
+        boto3.client("lambda").invoke(
+            FunctionName=context.function_name,
+            InvocationType="Event",
+            Payload=json.dumps({**(event or {}), "continuation": continuation + 1}),
+        )
+        log.info(f"Remaining role changes handed to follow-up {continuation + 1}")
+        return True
+    except Exception as e:
+        log.error(f"Could not start role sync follow-up: {e}")
+        return False
 
 # ---------- Main Logic ----------
+@instrumented
 def lambda_handler(event=None, context=None):
-    print("=" * 60)
     run_mode = "DRY-RUN" if DRY_RUN else "LIVE"
-    print(f"[START] {run_mode} Chunin Role Sync @ {datetime.now(timezone.utc)} UTC")
-    print("=" * 60)
+    log.info(f"[START] {run_mode} Role Sync @ {datetime.now(timezone.utc)} UTC")
 
     employees = get_employees()
     members = get_discord_members()
+    try:
+        torn_ids = identities.torn_ids(members)
+    except Exception as e:
+        log.error(f"Identity sync failed, parsing nicknames directly: {e}")
+        torn_ids = {
+            int(m["user"]["id"]): identities.parse_nick(m.get("nick") or m["user"].get("username"))[1]
+            for m in members
+        }
 
-    to_add = []
-    to_remove = []
+    directors = get_directors()
+    changes = []  # (member, roles to add, roles to remove)
+    adds = removes = 0
 
     for m in members:
         user_id = m["user"]["id"]
-        username = m["user"].get("username", "")
-        nick = m.get("nick") or username
-        roles = m.get("roles", [])
-        has_chunin = CHUNIN_ROLE_ID in roles
-        torn_match = re.search(r"\[(\d+)\]", str(nick))
-
-        if not torn_match:
-            if has_chunin:
-                print(f"[REMOVE] {username} ({user_id}) is unverified → removing Chunin role")
-                to_remove.append(user_id)
-            else:
-                print(f"[SKIP] {username} ({user_id}) is unverified → no role to remove")
-            continue
-
-        torn_id = torn_match.group(1)
+        nick = m.get("nick") or m["user"].get("username", "")
+        current = {int(r) for r in m.get("roles", [])}
+        wanted = desired_roles(torn_ids.get(int(user_id)), employees, directors)
 
-        if torn_id in employees:
-            if not has_chunin:
-                print(f"[ADD] {nick} ({user_id}) → Needs Chunin role")
-                to_add.append(user_id)
-            else:
-                print(f"[OK] {nick} ({user_id}) already has Chunin role")
-        else:
-            if has_chunin:
-                print(f"[REMOVE] {nick} ({user_id}) → Should not have Chunin role")
-                to_remove.append(user_id)
-            else:
-                print(f"[OK] {nick} ({user_id}) correctly without Chunin role")
+        to_add = wanted - current
+        to_remove = (current & MANAGED_ROLES) - wanted
+        if not to_add and not to_remove:
+            continue
+        log.debug(f"[CHANGE] {nick} ({user_id}) +{sorted(to_add)} -{sorted(to_remove)}")
+        changes.append((m, to_add, to_remove))
+        adds += len(to_add)
+        removes += len(to_remove)
 
-    print("-" * 60)
-    print(f"[SUMMARY] ADD role to: {len(to_add)} members")
-    print(f"[SUMMARY] REMOVE role from: {len(to_remove)} members")
-    print(f"[MODE] {'Dry-run only — no changes made.' if DRY_RUN else 'Live mode — applying changes now!'}")
-    print("-" * 60)
+    log.info(f"[SUMMARY] {len(changes)} members to update: {adds} roles to add, {removes} to remove")
+    log.info(f"[MODE] {'Dry-run only — no changes made.' if DRY_RUN else 'Live mode — applying changes now!'}")
 
-    # Execute changes if not dry-run
+    # Execute changes if not dry-run: one PATCH per changed member, stopping
+    # short of the Lambda timeout so the snapshot below is always saved
+    applied = failed = deferred = 0
     if not DRY_RUN:
-        for user_id in to_add:
-            add_role(user_id)
-            time.sleep(1)  # avoid rate limits
+        for i, (m, to_add, to_remove) in enumerate(changes):
+            if out_of_time(context):
+                deferred = len(changes) - i
+                log.warning(f"Out of time, {deferred} members left to update")
+                break
+            new_roles = set_roles(m["user"]["id"], to_add, to_remove)
+            if new_roles is not None:
+                m["roles"] = [str(r) for r in new_roles]
+                applied += 1
+            else:
+                failed += 1
+        if deferred:
+            follow_up(event, context, applied)
 
-        for user_id in to_remove:
-            remove_role(user_id)
-            time.sleep(1)
+    # Store what the guild looks like now for handlers' member lookups;
+    # members not patched keep the roles Discord listed
+    try:
+        identities.save_members(members)
+    except Exception as e:
+        log.error(f"Failed to save member snapshot: {e}")
 
     summary = {
         "time": datetime.now(timezone.utc).isoformat(),
         "mode": run_mode,
-        "add_count": len(to_add),
-        "remove_count": len(to_remove),
+        "add_count": adds,
+        "remove_count": removes,
+        "member_count": len(changes),
+        "failed_count": failed,
+        "deferred_count": deferred,
     }
 
     # Optional webhook summary
@@ -158,16 +240,17 @@ def lambda_handler(event=None, context=None):
         try:
             payload = {
                 "content": (
-                    f"📋 **Chunin Role Sync ({run_mode})**\n"
+                    f"📋 **Role Sync ({run_mode})**\n"
                     f"🕒 `{summary['time']}` UTC\n"
+                    f"👥 MEMBERS: {summary['member_count']}\n"
                     f"✅ ADD: {summary['add_count']}\n"
                     f"❌ REMOVE: {summary['remove_count']}"
+                    + (f"\n⏳ DEFERRED: {summary['deferred_count']}" if deferred else "")
                 )
             }
             requests.post(SECRETS["DISCORD_WEBHOOK"], json=payload, timeout=10)
         except Exception as e:
-            print(f"[WARN] Failed to post webhook summary: {e}")
+            log.warning(f"Failed to post webhook summary: {e}")
 
-    print(f"[END] {run_mode} complete.")
-    print("=" * 60)
-    return {"status": run_mode.lower(), "adds": len(to_add), "removes": len(to_remove)}
+    log.info(f"[END] {run_mode} complete.")
+    return {"status": run_mode.lower(), "adds": adds, "removes": removes, "members": len(changes), "failed": failed, "deferred": deferred}
@@ -33,4 +33,8 @@ ALL_ADMIN_CHANNELS = {
     CHANNEL_JIRAIYAS_BADDRAGON_ADMIN,
     CHANNEL_ZERODB_STORE_ADMIN,
     CHANNEL_BURN_UNIT_CANDLES_ADMIN
-}
\ No newline at end of file
+}
+
+# Torn company_id -> that company's admin role, granted by role sync to the
+# company's registered director. Companies left out are not managed.
+COMPANY_ADMIN_ROLES: dict[int, int] = {}
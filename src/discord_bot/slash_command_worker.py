@@ -1,9 +1,20 @@
 # src/discord_bot/slash_command_worker.py
 import json
+import os
+import time
 import boto3
+import idempotency
 from register_worker import process_register
+from utils.metrics import count, instrumented, observe  # type: ignore
+from utils.log import get_logger  # type: ignore
 
+log = get_logger(__name__)
 
+# "fast" or "slow": which queue this worker consumes (see SLOW_COMMANDS in app.py)
+LANE = os.environ.get("COMMAND_LANE", "fast")
+
+
+@instrumented
 def lambda_handler(event, context):
     """
     Worker Lambda triggered by SQS. 
@@ -13,12 +24,27 @@ def lambda_handler(event, context):
         msg = json.loads(record["body"])
         command = msg.get("command_name")
         payload = msg.get("payload")
+        log.set_context(
+            command=command,
+            interaction_id=(payload or {}).get("id"),
+            user_id=msg.get("initiator_id"),
+        )
+
+        enqueued_at = msg.get("enqueued_at")
+        if enqueued_at:
+            observe(f"{LANE}_queue_wait", time.time() - enqueued_at)
 
-        print(f"Router received command: {command}")
-        print(record)
+        log.info(f"Router received command: {command}")
+        log.debug("SQS record", record=record)
 
         if not command:
-            print("⚠️ Missing command_name in message, skipping")
+            log.warning("Missing command_name in message, skipping")
+            continue
+
+        # SQS is at-least-once: a redelivered interaction must not run twice
+        if not idempotency.claim((payload or {}).get("id"), command, msg.get("initiator_id")):
+            log.warning("Interaction already processed, skipping redelivery")
+            count("DuplicateDeliveries")
             continue
 
         if command == "register":
@@ -26,50 +52,50 @@ def lambda_handler(event, context):
                 import register_worker  # or from _commands.register_worker import process_register
                 register_worker.process_register(payload)
             except Exception as e:
-                print(f"❌ Error processing register: {e}")
+                log.error(f"Error processing register: {e}")
 
         elif command == "link":
             try:
                 from _commands.company_channels import handle_link_company
                 handle_link_company(msg)
             except Exception as e:
-                print(f"❌ Error processing link: {e}")
+                log.error(f"Error processing link: {e}")
 
         elif command == "company_invest":
-            print("company_invest")
             try:
                 from _commands.company_invest import handle_company_invest
                 handle_company_invest(msg)
             except Exception as e:
-                print(f"❌ Error processing company_invest: {e}")
+                log.error(f"Error processing company_invest: {e}")
 
         elif command == "company_return":
-            print("company_return")
             try:
                 from _commands.company_return import handle_company_return
                 handle_company_return(msg)
             except Exception as e:
-                print(f"❌ Error processing company_return {e}")
+                log.error(f"Error processing company_return {e}")
 
         elif command == "company_info":
-            print("company_invest")
             try:
                 from _commands.company_info import handle_company_info
                 handle_company_info(msg)
             except Exception as e:
-                print(f"❌ Error processing company_invest: {e}")
+                log.error(f"Error processing company_invest: {e}")
 
         elif command == "chunin_register":
-            print(f"Command: {command}")
-            print(f"msg: {msg}")
+            log.debug("Message", message=msg)
             try:
                 from _commands.chunin_register import handle_chunin_register
                 handle_chunin_register(payload)
             except Exception as e:
-                print(f"❌ Error processing chunin_register: {e}")
+                log.error(f"Error processing chunin_register: {e}")
 
         else:
-            print(f"⚠️ Unhandled command: {command}")
+            log.warning(f"Unhandled command: {command}")
+
+        # Interaction received by app.py -> command handled, per lane
+        if enqueued_at:
+            observe(f"{LANE}_end_to_end", time.time() - enqueued_at)
 
 
     return {"statusCode": 200}